@@ -0,0 +1,75 @@
+"""
+Compare cold and warm load times with the parse cache (``cache=True``).
+
+Usage: python benchmarks/bench_cache.py [sections] [repeat]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+
+from configobj import ConfigObj, CACHE_SUFFIX
+
+
+def make_config(sections):
+    lines = ['# a generated config file', 'name = benchmark']
+    for s in range(sections):
+        lines.append('[section%d]' % s)
+        lines.append('    # a comment')
+        for k in range(40):
+            lines.append('    key%d = value number %d  # inline' % (k, k))
+            lines.append('    list%d = a, b, "c d", e' % k)
+            lines.append('    plain%d = /usr/local/lib' % k)
+        lines.append('    [[sub]]')
+        lines.append('        x = "quoted value"')
+    return '\n'.join(lines) + '\n'
+
+
+def best_of(repeat, function):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(sections=500, repeat=5):
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, 'bench.ini')
+        with open(filename, 'w') as h:
+            h.write(make_config(sections))
+        cache_file = os.path.join(directory, '.bench.ini' + CACHE_SUFFIX)
+
+        def cold():
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+            ConfigObj(filename, cache=True)
+
+        def warm():
+            ConfigObj(filename, cache=True)
+
+        uncached = best_of(repeat, lambda: ConfigObj(filename))
+        cold_time = best_of(repeat, cold)
+        warm_time = best_of(repeat, warm)
+
+        print('%d sections, %.1f MB file, %.1f MB cache' % (
+            sections, os.path.getsize(filename) / 1e6,
+            os.path.getsize(cache_file) / 1e6))
+        print('no cache     %.3fs' % uncached)
+        print('cold cache   %.3fs' % cold_time)
+        print('warm cache   %.3fs  (%.1fx faster than no cache)' % (
+            warm_time, uncached / warm_time))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,81 @@
+"""
+Compare the memory used per key by a ``ConfigObj`` with the memory used by
+the same values in plain dicts.
+
+Sections only store the comments that aren't empty, and create their
+``defaults``, ``default_values`` and ``extra_values`` when they are first
+used. The "all allocated" line fills all of those in for every key and
+section, as the layout before did, to show what they cost.
+
+Usage: python benchmarks/bench_memory.py [sections] [keys per section]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+
+from configobj import ConfigObj
+
+
+def make_config(sections, keys):
+    lines = ['# a generated config file', 'name = benchmark']
+    for s in range(sections):
+        if s % 10 == 0:
+            lines.append('# a comment on some of the sections')
+        lines.append('[section%d]' % s)
+        for k in range(keys):
+            if k == 0:
+                lines.append('key%d = value %d  # inline' % (k, k))
+            else:
+                lines.append('key%d = value %d' % (k, k))
+    return lines
+
+
+def allocate_all(section):
+    """Give every key a comment list and an inline comment, as before."""
+    for key in section:
+        section.comments[key]
+        if section.inline_comments[key] is None:
+            section.inline_comments[key] = ''
+    section.defaults
+    section.default_values
+    section.extra_values
+    for name in section.sections:
+        allocate_all(section[name])
+
+
+def measure(function):
+    """Return the result of ``function`` and the memory it holds on to."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def main(sections=2000, keys=5):
+    lines = make_config(sections, keys)
+    total = sections * keys + 1
+    config, compact = measure(lambda: ConfigObj(lines))
+    data, plain = measure(config.dict)
+    del data
+    __, allocated = measure(lambda: allocate_all(config))
+
+    print('%d sections of %d keys' % (sections, keys))
+    print('plain dicts     %6.1f bytes per key' % (plain / total))
+    print('ConfigObj       %6.1f bytes per key  (%.1f overhead)' % (
+        compact / total, (compact - plain) / total))
+    print('all allocated   %6.1f bytes per key  (%.1f overhead)' % (
+        (compact + allocated) / total,
+        (compact + allocated - plain) / total))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
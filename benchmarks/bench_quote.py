@@ -0,0 +1,66 @@
+"""
+Compare writing a config with 100k values using the quoting fast path of
+``ConfigObj._quote`` and using ``_quote_value`` for every value.
+
+Usage: python benchmarks/bench_quote.py [values] [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+
+from configobj import ConfigObj
+
+
+# a mix of the values found in real config files
+VALUES = [
+    'True', 'False', 'yes', '8080', '0.5', '/usr/local/lib/python3',
+    'C:\\Program Files\\App', 'hello world', ' padded ', 'a, b, c',
+    '# not a comment', "it's", 'say "hi"', ['a', 'b', 'c'], ['one item'],
+    'multi\nline',
+]
+
+
+def make_config(values):
+    config = ConfigObj()
+    per_section = 100
+    for s in range(values // per_section):
+        config['section%d' % s] = {}
+        section = config['section%d' % s]
+        for k in range(per_section):
+            value = VALUES[(s + k) % len(VALUES)]
+            if k % 4 == 0 and isinstance(value, str):
+                # values that are all different
+                value = '%s %d' % (value, k)
+            section['key%d' % k] = value
+    return config
+
+
+def best_of(repeat, config):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        config.write()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(values=100000, repeat=5):
+    config = make_config(values)
+    fast = best_of(repeat, config)
+    lines = config.write()
+    # every value through the full set of checks
+    config._quote = config._quote_value
+    slow = best_of(repeat, config)
+    assert config.write() == lines
+    print('%d values' % values)
+    print('_quote_value  %.3fs' % slow)
+    print('_quote        %.3fs  (%.1fx faster)' % (fast, slow / fast))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,88 @@
+"""
+Compare validating many configs against one configspec with
+``ConfigObj.validate`` and with a ``ValidationPlan``.
+
+Usage: python benchmarks/bench_validate.py [configs] [sections] [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+
+from configobj import ConfigObj, ValidationPlan
+from configobj.validate import Validator
+
+
+def make_spec(sections):
+    lines = ['name = string', 'port = integer(1, 65535, default=8080)']
+    for s in range(sections):
+        lines.append('[section%d]' % s)
+        lines.append('    enabled = boolean(default=True)')
+        lines.append('    size = integer(0, 100)')
+        lines.append('    ratio = float(default=0.5)')
+        lines.append('    hosts = string_list(default=list(a, b))')
+        lines.append('    mode = option(fast, slow, default=fast)')
+    lines.append('[users]')
+    lines.append('    [[__many__]]')
+    lines.append('        uid = integer')
+    lines.append('        shell = string(default=/bin/sh)')
+    return lines
+
+
+def make_config(sections, tenant):
+    lines = ['name = tenant%d' % tenant]
+    for s in range(sections):
+        lines.append('[section%d]' % s)
+        lines.append('    size = %d' % (s % 100))
+        if s % 3 == 0:
+            lines.append('    mode = slow')
+    lines.append('[users]')
+    for u in range(5):
+        lines.append('    [[user%d]]' % u)
+        lines.append('        uid = %d' % (1000 + u))
+    return lines
+
+
+def best_of(repeat, configs, function):
+    best = None
+    for _ in range(repeat):
+        # validating changes the configs, so each run gets fresh ones
+        fresh = [ConfigObj(lines) for lines in configs]
+        start = time.perf_counter()
+        for config in fresh:
+            function(config)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(configs=200, sections=50, repeat=5):
+    spec = ConfigObj(make_spec(sections), _inspec=True)
+    tenants = [make_config(sections, tenant) for tenant in range(configs)]
+    validator = Validator()
+
+    def validate(config):
+        config.configspec = spec
+        assert config.validate(validator) is True
+
+    start = time.perf_counter()
+    plan = ValidationPlan(spec, validator)
+    compile_time = time.perf_counter() - start
+
+    def run_plan(config):
+        assert plan.validate(config) is True
+
+    plain = best_of(repeat, tenants, validate)
+    planned = best_of(repeat, tenants, run_plan)
+
+    print('%d configs of %d sections' % (configs, sections))
+    print('validate    %.3fs' % plain)
+    print('plan        %.3fs  (%.1fx faster, compiled in %.4fs)' % (
+        planned, plain / planned, compile_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,51 @@
+"""
+Compare writing a large config after changing one value, with and without
+``keep_formatting``.
+
+Usage: python benchmarks/bench_write.py [sections] [keys] [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+
+from configobj import ConfigObj
+
+
+def make_config(sections, keys):
+    lines = ['# a generated config file', 'name = benchmark']
+    for s in range(sections):
+        lines.append('[section%d]' % s)
+        lines.append('    # the settings of section %d' % s)
+        for k in range(keys):
+            lines.append('    key%d = "value, %d"  # a comment' % (k, k))
+            lines.append('    list%d = a, b, c' % k)
+    return lines
+
+
+def best_of(repeat, lines, **options):
+    config = ConfigObj(lines, **options)
+    best = None
+    for run in range(repeat):
+        config['section0']['key0'] = 'changed %d' % run
+        start = time.perf_counter()
+        config.write()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(sections=500, keys=100, repeat=5):
+    lines = make_config(sections, keys)
+    plain = best_of(repeat, lines)
+    kept = best_of(repeat, lines, keep_formatting=True)
+    print('%d sections of %d keys' % (sections, keys * 2))
+    print('write            %.3fs' % plain)
+    print('keep_formatting  %.3fs  (%.1fx faster)' % (kept, plain / kept))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -21,7 +21,7 @@ import re
 import sys
 from contextlib import closing
 
-from setuptools import setup
+from setuptools import Extension, setup
 
 if sys.version_info[0] < 2:
     print('for Python versions < 3 use configobj '
@@ -96,6 +96,12 @@ AUTHOR = 'Rob Dennis, Eli Courtwright (Michael Foord & Nicola Larosa original ma
 
 AUTHOR_EMAIL = 'rdennis+configobj@gmail.com, eli@courtwright.org, michael@python.org, nico@tekNico.net'
 
+# The C lexer is optional, ConfigObj falls back to pure Python without it
+EXT_MODULES = [
+    Extension('configobj._speedups', ['src/configobj/_speedups.c'],
+              optional=True),
+]
+
 KEYWORDS = "config, ini, dictionary, application, admin, sysadmin, configuration, validation".split(', ')
 
 project = dict(
@@ -109,6 +115,7 @@ project = dict(
     py_modules=MODULES,
     package_dir={'': 'src'},
     packages=PACKAGES,
+    ext_modules=EXT_MODULES,
     python_requires='>=3.7',
     classifiers=CLASSIFIERS,
     keywords=KEYWORDS,
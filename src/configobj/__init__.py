@@ -13,17 +13,33 @@
 # ConfigObj 5 - main repository for documentation and issue tracking:
 # https://github.com/DiffSK/configobj
 
+import gc
+import marshal
 import os
 import re
 import sys
 
-from codecs import BOM_UTF8, BOM_UTF16, BOM_UTF16_BE, BOM_UTF16_LE
+from codecs import (BOM_UTF8, BOM_UTF16, BOM_UTF16_BE, BOM_UTF16_LE,
+                    getincrementalencoder)
+from copy import deepcopy
+from stat import S_IMODE
 
 from ._version import __version__
 
 # imported lazily to avoid startup performance hit if it isn't used
 compiler = None
 
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+# the optional C implementation of the lexer
+try:
+    from . import _speedups
+except ImportError:
+    _speedups = None
+
 # A dictionary mapping BOM to
 # the encoding to decode with, and what to set the
 # encoding attribute to.
@@ -68,6 +84,21 @@ def match_utf8(encoding):
     return BOM_LIST.get(encoding.lower()) == 'utf_8'
 
 
+def _fsync_directory(directory):
+    """Flush a rename in ``directory`` to disk, where that is possible."""
+    try:
+        fd = os.open(directory or os.curdir, os.O_RDONLY)
+    except OSError:
+        # directories can't be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 # Quote strings used for writing values
 squot = "'%s'"
 dquot = '"%s"'
@@ -75,6 +106,11 @@ noquot = "%s"
 wspace_plus = ' \r\n\v\t\'"'
 tsquot = '"""%s"""'
 tdquot = "'''%s'''"
+# a value that needs no quotes: it doesn't start or end with whitespace or a
+# quote, and has no newline, comment or comma
+_unquoted = re.compile(r'''[^ \r\n\v\t'"#,](?:[^\n#,]*[^ \r\n\v\t'"#,])?\Z''')
+# the most quoted strings ``write`` remembers
+_QUOTE_MEMO_SIZE = 4096
 
 # Sentinel for use in getattr calls to replace hasattr
 MISSING = object()
@@ -82,10 +118,12 @@ MISSING = object()
 __all__ = (
     'DEFAULT_INDENT_TYPE',
     'DEFAULT_INTERPOLATION',
+    'WRITE_CHUNK_SIZE',
     'ConfigObjError',
     'NestingError',
     'ParseError',
     'DuplicateError',
+    'FrozenSection',
     'ConfigspecError',
     'ConfigObj',
     'SimpleVal',
@@ -94,16 +132,27 @@ __all__ = (
     'MissingInterpolationOption',
     'RepeatSectionError',
     'ReloadError',
+    'ReadOnlyError',
     'UnreprError',
     'UnknownType',
+    'ValidationPlan',
     'flatten_errors',
-    'get_extra_values'
+    'get_extra_values',
+    'validate_many',
+    'KeyList',
+    'iterparse',
 )
 
 DEFAULT_INTERPOLATION = 'configparser'
 DEFAULT_INDENT_TYPE = '    '
+# roughly how many characters ``write_iter`` puts in each chunk
+WRITE_CHUNK_SIZE = 1 << 16
 MAX_INTERPOL_DEPTH = 10
 
+# bumped when the format of the parse cache changes
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.configobj-cache'
+
 OPTION_DEFAULTS = {
     'interpolation': True,
     'raise_errors': False,
@@ -118,8 +167,20 @@ OPTION_DEFAULTS = {
     'default_encoding': None,
     'unrepr': False,
     'write_empty_values': False,
+    # one of PARSERS, or None for the fastest available
+    'parser': None,
+    'lazy': False,
+    # False, True to cache next to the file, or a cache directory
+    'cache': False,
+    # don't keep comments, for configs that are never written
+    'read_only': False,
+    # write the lines that haven't changed as they were in the file
+    'keep_formatting': False,
 }
 
+# The engines available for parsing config files
+PARSERS = ('regex', 'lexer')
+
 def getObj(s):
     global compiler
     if compiler is None:
@@ -210,6 +271,18 @@ class ConfigObjError(SyntaxError):
         self.line_number = line_number
         SyntaxError.__init__(self, message)
 
+    def __reduce__(self):
+        # rebuilt from the message, as subclasses take other arguments
+        return (_unpickle_error, (self.__class__, self.args, self.__dict__))
+
+
+def _unpickle_error(cls, args, state):
+    """Rebuild a ``ConfigObjError`` without calling the ``__init__`` of ``cls``."""
+    error = cls.__new__(cls)
+    SyntaxError.__init__(error, *args)
+    error.__dict__.update(state)
+    return error
+
 
 class NestingError(ConfigObjError):
     """
@@ -234,6 +307,17 @@ class ReloadError(IOError):
         IOError.__init__(self, 'reload failed, filename is not set.')
 
 
+class ReadOnlyError(IOError):
+    """
+    A ConfigObj loaded with ``read_only=True`` can't be written, because its
+    comments weren't kept.
+    This exception is a subclass of ``IOError``.
+    """
+    def __init__(self):
+        IOError.__init__(self, 'cannot write a ConfigObj loaded with '
+                               'read_only=True, its comments were not kept.')
+
+
 class DuplicateError(ConfigObjError):
     """
     The keyword or section specified already exists.
@@ -251,12 +335,21 @@ class InterpolationError(ConfigObjError):
 
 
 class InterpolationLoopError(InterpolationError):
-    """Maximum interpolation depth exceeded in string interpolation."""
+    """
+    Maximum interpolation depth exceeded in string interpolation.
 
-    def __init__(self, option):
-        InterpolationError.__init__(
-            self,
-            'interpolation loop detected in value "%s".' % option)
+    When raised by ``Section.resolve_all`` the ``cycle`` attribute is the list
+    of ``(path, key)`` in the loop, starting and ending with the same one.
+    Otherwise it is ``None``.
+    """
+
+    def __init__(self, option, cycle=None):
+        msg = 'interpolation loop detected in value "%s"' % option
+        if cycle:
+            msg += ': ' + ' -> '.join(['/'.join(path + (key,))
+                                       for (path, key) in cycle])
+        InterpolationError.__init__(self, msg + '.')
+        self.cycle = cycle
 
 
 class RepeatSectionError(ConfigObjError):
@@ -293,12 +386,22 @@ class InterpolationEngine(object):
     def __init__(self, section):
         # the Section instance that "owns" this engine
         self.section = section
+        # the interpolated values, by (key, value). They are dropped when a
+        # key they looked up is changed, see ``Section._invalidate``
+        self._plans = {}
+        # the keys looked up by ``_fetch``, while interpolating
+        self._lookups = None
 
 
     def interpolate(self, key, value):
         # short-cut
         if not self._cookie in value:
             return value
+        plan_key = (key, value)
+        try:
+            return self._plans[plan_key]
+        except KeyError:
+            pass
         
         def recursive_interpolate(key, value, section, backtrail):
             """The function that does the actual work.
@@ -344,10 +447,95 @@ class InterpolationEngine(object):
 
         # Back in interpolate(), all we have to do is kick off the recursive
         # function with appropriate starting values
-        value = recursive_interpolate(key, value, self.section, {})
+        self._lookups = lookups = set([key])
+        try:
+            value = recursive_interpolate(key, value, self.section, {})
+        finally:
+            self._lookups = None
+        
+        self._cache(plan_key, value, lookups)
         return value
 
 
+    def _cache(self, plan_key, value, lookups):
+        """Cache a result until one of the keys it looked up changes."""
+        self._plans[plan_key] = value
+        dependents = self.section.main._interpolation_dependents
+        entry = (self, plan_key)
+        for name in lookups:
+            try:
+                dependents[name].add(entry)
+            except KeyError:
+                dependents[name] = set([entry])
+
+
+    def resolve_all(self):
+        """
+        Interpolate all the values of the owning section, caching the results.
+
+        The references between the values are followed depth first, so that
+        each key is only looked up and interpolated once, however many values
+        refer to it. Interpolation must be switched off while this runs.
+        """
+        section = self.section
+        # (value, keys looked up) for the keys interpolated so far
+        resolved = {}
+        # the keys being interpolated, and the sections they were found in
+        stack = []
+
+        def fetch(key):
+            try:
+                return resolved[key]
+            except KeyError:
+                pass
+            for index, (name, found) in enumerate(stack):
+                if name == key:
+                    cycle = [(_section_path(found), name)
+                             for (name, found) in stack[index:]]
+                    raise InterpolationLoopError(key, cycle + cycle[:1])
+            self._lookups = set()
+            try:
+                value, found = self._find(key)
+                lookups = self._lookups
+            finally:
+                self._lookups = None
+            result = resolved[key] = resolve(key, value, found, lookups)
+            return result
+
+        def resolve(key, value, found, lookups):
+            stack.append((key, found))
+            parts = []
+            start = 0
+            for match in self._KEYCRE.finditer(value):
+                name, text = self._match_key(match)
+                if name is not None:
+                    text, more = fetch(name)
+                    lookups.update(more)
+                parts.append(value[start:match.start()])
+                parts.append(text)
+                start = match.end()
+            parts.append(value[start:])
+            stack.pop()
+            return ''.join(parts), lookups
+
+        for key in section.scalars:
+            value = dict.__getitem__(section, key)
+            if isinstance(value, str):
+                values = [value]
+            elif isinstance(value, list):
+                values = [entry for entry in value if isinstance(entry, str)]
+            else:
+                continue
+            for entry in values:
+                if self._cookie not in entry or (key, entry) in self._plans:
+                    continue
+                result, lookups = resolve(key, entry, section, set([key]))
+                self._cache((key, entry), result, lookups)
+                if entry is value:
+                    # as ``fetch`` would find it
+                    resolved[key] = (result, lookups)
+
+
     def _fetch(self, key):
         """Helper function to fetch values from owning section.
 
@@ -356,7 +544,17 @@ class InterpolationEngine(object):
         # switch off interpolation before we try and fetch anything !
         save_interp = self.section.main.interpolation
         self.section.main.interpolation = False
+        try:
+            return self._find(key)
+        finally:
+            # restore interpolation to previous value before returning
+            self.section.main.interpolation = save_interp
 
+
+    def _find(self, key):
+        """``_fetch``, for when interpolation is already switched off."""
+        if self._lookups is not None:
+            self._lookups.add(key)
         # Start at section that "owns" this InterpolationEngine
         current_section = self.section
         while True:
@@ -365,6 +563,8 @@ class InterpolationEngine(object):
             if val is not None and not isinstance(val, Section):
                 break
             # try "DEFAULT" next
+            if self._lookups is not None:
+                self._lookups.add('DEFAULT')
             val = current_section.get('DEFAULT', {}).get(key)
             if val is not None and not isinstance(val, Section):
                 break
@@ -375,8 +575,6 @@ class InterpolationEngine(object):
                 break
             current_section = current_section.parent
 
-        # restore interpolation to previous value before returning
-        self.section.main.interpolation = save_interp
         if val is None:
             raise MissingInterpolationOption(key)
         return val, current_section
@@ -399,6 +597,16 @@ class InterpolationEngine(object):
         (e.g., if we interpolated "$$" and returned "$").
         """
         raise NotImplementedError()
+
+
+    def _match_key(self, match):
+        """Implementation-dependent helper function, for ``resolve_all``.
+
+        Returns a 2-tuple: the key that ``match`` refers to and ``None``, or
+        ``None`` and the text to replace the match with (as ``_parse_match``
+        does when no further interpolation should be performed).
+        """
+        raise NotImplementedError()
     
 
 
@@ -412,6 +620,9 @@ class ConfigParserInterpolation(InterpolationEngine):
         value, section = self._fetch(key)
         return key, value, section
 
+    def _match_key(self, match):
+        return match.group(1), None
+
 
 
 class TemplateInterpolation(InterpolationEngine):
@@ -439,6 +650,14 @@ class TemplateInterpolation(InterpolationEngine):
         # Anything else: ignore completely, just return it unchanged
         return None, match.group(), None
 
+    def _match_key(self, match):
+        key = match.group('named') or match.group('braced')
+        if key is not None:
+            return key, None
+        if match.group('escaped') is not None:
+            return None, self._delimiter
+        return None, match.group()
+
 
 interpolation_engines = {
     'configparser': ConfigParserInterpolation,
@@ -446,6 +665,337 @@ interpolation_engines = {
 }
 
 
+def _section_path(section):
+    """The names of the sections leading to ``section``, as a tuple."""
+    path = []
+    while section.parent is not section:
+        path.append(section.name)
+        section = section.parent
+    return tuple(reversed(path))
+
+
+def _section_end(node):
+    """
+    The index after the last member line of a section from
+    ``ConfigObj._scan_sections``, including its subsections.
+    """
+    while node[5]:
+        node = node[5][-1]
+    return node[4]
+
+
+class KeyList(list):
+    """
+    The ordered keys of a ``Section``, as its ``scalars``, ``sections`` and
+    ``defaults`` attributes.
+    
+    It is a list, which also keeps an index of its keys, so checking for a
+    key takes the same time however many there are, and finding one to remove
+    or rename doesn't scan the whole list. A key is only listed once:
+    appending or inserting a key that is already listed moves it.
+    
+    Iterating over it goes over a copy, so members can be deleted from the
+    section in the loop.
+    """
+
+    __slots__ = ('_index', '_removed')
+
+    def __init__(self, keys=()):
+        list.__init__(self)
+        self._set_list(keys)
+
+
+    def _set_list(self, keys):
+        # duplicates are dropped, keeping the first
+        list.__setitem__(self, slice(None), list(dict.fromkeys(keys)))
+        self._reindex()
+
+
+    def _reindex(self):
+        # the position of each key when it was indexed, or appended. Removing
+        # a key moves the ones after it down, so a key can be up to
+        # ``_removed`` places before its indexed position
+        self._index = dict(
+            zip(list.__iter__(self), range(list.__len__(self)))) or _NO_INDEX
+        self._removed = 0
+
+
+    def _position(self, key):
+        """Return the position of ``key``, or raise ``ValueError``."""
+        try:
+            position = self._index[key]
+        except (KeyError, TypeError):
+            raise ValueError('%r is not in list' % (key,))
+        return list.index(self, key, max(position - self._removed, 0),
+                          position + 1)
+
+
+    def _moved(self):
+        # the positions are found by searching back up to ``_removed`` places,
+        # so the index is rebuilt once that costs about as much as rebuilding
+        self._removed += 1
+        if self._removed * self._removed > 16 * list.__len__(self):
+            self._reindex()
+
+
+    def __contains__(self, key):
+        try:
+            return key in self._index
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return iter(list.copy(self))
+
+    def __reversed__(self):
+        return reversed(list.copy(self))
+
+    def __setitem__(self, index, value):
+        keys = list.copy(self)
+        keys[index] = value
+        self._set_list(keys)
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._reindex()
+
+    def __eq__(self, other):
+        if isinstance(other, tuple):
+            other = list(other)
+        return list.__eq__(self, other)
+
+    def __ne__(self, other):
+        if isinstance(other, tuple):
+            other = list(other)
+        return list.__ne__(self, other)
+
+    __hash__ = None
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, count):
+        if count <= 0:
+            self.clear()
+        # otherwise the copies of the keys would be dropped
+        return self
+
+    def __reduce__(self):
+        return (KeyList, (list.copy(self),))
+
+
+    def append(self, key):
+        if key in self._index:
+            # this can rebuild the index
+            self.remove(key)
+        index = self._index
+        if index is _NO_INDEX:
+            index = self._index = {}
+        index[key] = list.__len__(self)
+        list.append(self, key)
+
+    def extend(self, keys):
+        for key in keys:
+            self.append(key)
+
+    def insert(self, index, key):
+        keys = [entry for entry in list.__iter__(self) if entry != key]
+        keys.insert(index, key)
+        self._set_list(keys)
+
+    def remove(self, key):
+        list.__delitem__(self, self._position(key))
+        del self._index[key]
+        self._moved()
+
+    def replace(self, key, new_key):
+        """Replace ``key`` with ``new_key``, in the same position."""
+        position = self._position(key)
+        if new_key in self._index:
+            raise ValueError('%r is already in list' % (new_key,))
+        list.__setitem__(self, position, new_key)
+        self._index[new_key] = self._index.pop(key)
+
+    def pop(self, index=-1):
+        key = list.pop(self, index)
+        del self._index[key]
+        if index != -1:
+            self._moved()
+        return key
+
+    def clear(self):
+        list.clear(self)
+        self._reindex()
+
+    def index(self, key, *args):
+        if args:
+            return list.index(self, key, *args)
+        return self._position(key)
+
+    def count(self, key):
+        return int(key in self)
+
+    def copy(self):
+        return KeyList(list.copy(self))
+
+    def sort(self, key=None, reverse=False):
+        list.sort(self, key=key, reverse=reverse)
+        self._reindex()
+
+    def reverse(self):
+        list.reverse(self)
+        self._reindex()
+
+# shared by the empty key lists, and never changed
+_NO_INDEX = {}
+
+# the comment lines of a key without any, shared and never changed
+_NO_COMMENTS = ()
+
+
+class CommentDict(dict):
+    """
+    The ``comments`` or ``inline_comments`` of a ``Section``.
+
+    Only the comments that have been set are stored, but every member of the
+    section is a key. A member without comment lines has an empty list, which
+    is stored when it is looked up so that it can be changed in place. A
+    member without an inline comment has ``None``.
+    """
+
+    __slots__ = ('_section', '_inline')
+
+    def __init__(self, section, inline=False, comments=()):
+        dict.__init__(self, comments)
+        self._section = section
+        self._inline = inline
+
+
+    def _default(self):
+        return None if self._inline else []
+
+
+    def _snapshot(self):
+        """A plain dict of the comments, storing nothing."""
+        return dict((key, dict.get(self, key) if dict.__contains__(self, key)
+                     else self._default()) for key in self)
+
+
+    def __missing__(self, key):
+        if not dict.__contains__(self._section, key):
+            raise KeyError(key)
+        if self._inline:
+            return None
+        comment_list = []
+        dict.__setitem__(self, key, comment_list)
+        return comment_list
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or dict.__contains__(self._section, key)
+
+    def __iter__(self):
+        section = self._section
+        for key in dict.__iter__(section):
+            yield key
+        for key in dict.__iter__(self):
+            if not dict.__contains__(section, key):
+                yield key
+
+    def __len__(self):
+        section = self._section
+        return dict.__len__(section) + sum(
+            1 for key in dict.__iter__(self) if not dict.__contains__(section, key))
+
+    def __setitem__(self, key, value):
+        self._section._changed(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+        elif not dict.__contains__(self._section, key):
+            raise KeyError(key)
+        self._section._changed(key)
+
+    def __eq__(self, other):
+        if isinstance(other, CommentDict):
+            other = other._snapshot()
+        if not isinstance(other, dict):
+            return NotImplemented
+        return self._snapshot() == other
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._snapshot())
+
+    def __reduce__(self):
+        return (CommentDict, (self._section, self._inline, dict(dict.items(self))))
+
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            self._section._changed(key)
+            return dict.pop(self, key)
+        if dict.__contains__(self._section, key):
+            return self._default()
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return self._snapshot()
+
+
+def _created_on_use(slot, create):
+    """
+    A property for a ``Section`` attribute that is stored in ``slot``, and
+    only created, by ``create(section)``, when it is first used.
+    """
+    def get(self):
+        value = getattr(self, slot)
+        if value is None:
+            value = create(self)
+            setattr(self, slot, value)
+        return value
+    def set(self, value):
+        setattr(self, slot, value)
+    return property(get, set)
+
+
+# the conversions done by ``as_bool``, ``as_int``, ``as_float`` and
+# ``as_list``, which ``Section`` remembers
+_TYPED_KINDS = ('bool', 'int', 'float', 'list')
+
+
 def __newobj__(cls, *args):
     # Hack for pickle
     return cls.__new__(cls, *args) 
@@ -468,13 +1018,38 @@ class Section(dict):
     Iteration follows the order: scalars, then sections.
     """
 
+    # sections are kept small: the attributes that are usually empty are only
+    # created when they are used, and only the comments that aren't empty
+    # are stored. The ``__dict__``, for attributes set by the user, is only
+    # created when one is set
+    __slots__ = ('parent', 'main', 'depth', 'name', 'scalars', 'sections',
+                 'configspec', '_defaults', '_default_values', '_extra_values',
+                 '_comments', '_inline_comments', '_created', '_source',
+                 '_typed', '_interpolation_engine', '_lazy', '__dict__',
+                 '__weakref__')
+
+    comments = _created_on_use('_comments', CommentDict)
+    inline_comments = _created_on_use('_inline_comments',
+                                      lambda self: CommentDict(self, True))
+    defaults = _created_on_use('_defaults', lambda self: KeyList())
+    default_values = _created_on_use('_default_values', lambda self: {})
+    extra_values = _created_on_use('_extra_values', lambda self: [])
+
     
     def __setstate__(self, state):
         dict.update(self, state[0])
-        self.__dict__.update(state[1])
+        Section._initialise(self)
+        for name, value in state[1].items():
+            setattr(self, name, value)
 
     def __reduce__(self):
-        state = (dict(self), self.__dict__)
+        attributes = dict(getattr(self, '__dict__', {}))
+        for name in Section.__slots__:
+            if (name not in ('_lazy', '_source', '_typed', '__dict__',
+                             '__weakref__') and
+                    hasattr(self, name)):
+                attributes[name] = getattr(self, name)
+        state = (dict(self), attributes)
         return (__newobj__, (self.__class__,), state)
     
     
@@ -506,19 +1081,70 @@ class Section(dict):
             
     def _initialise(self):
         # the sequence of scalar values in this Section
-        self.scalars = []
+        self.scalars = KeyList()
         # the sequence of sections in this Section
-        self.sections = []
+        self.sections = KeyList()
         # for comments :-)
-        self.comments = {}
-        self.inline_comments = {}
+        self._comments = None
+        self._inline_comments = None
         # the configspec
         self.configspec = None
         # for defaults
-        self.defaults = []
-        self.default_values = {}
-        self.extra_values = []
+        self._defaults = None
+        self._default_values = None
+        self._extra_values = None
         self._created = False
+        # the lines each member was parsed from, for ``keep_formatting``
+        self._source = None
+        # the values converted by ``as_bool`` and friends, by (kind, key)
+        self._typed = None
+
+
+    def _changed(self, key):
+        """Forget the lines ``key`` was parsed from, as it has been changed."""
+        source = self._source
+        if source is not None:
+            source.pop(key, None)
+
+
+    def _retyped(self, key):
+        """Forget the converted values of ``key``, as it has been changed."""
+        typed = self._typed
+        for kind in _TYPED_KINDS:
+            typed.pop((kind, key), None)
+
+
+    def _get_comments(self, key):
+        """
+        The comment lines and inline comment of ``key``, without storing
+        anything for a key that has none.
+        """
+        comments = self._comments
+        inline_comments = self._inline_comments
+        return (_NO_COMMENTS if comments is None
+                    else dict.get(comments, key, _NO_COMMENTS),
+                None if inline_comments is None
+                    else dict.get(inline_comments, key))
+
+
+    def _set_comments(self, key, comment_list, comment):
+        """Set the comments of ``key``, only storing those that aren't empty."""
+        if self._source is not None:
+            self._changed(key)
+        if comment_list:
+            dict.__setitem__(self.comments, key, comment_list)
+        elif self._comments is not None:
+            dict.pop(self._comments, key, None)
+        if comment is not None:
+            dict.__setitem__(self.inline_comments, key, comment)
+        elif self._inline_comments is not None:
+            dict.pop(self._inline_comments, key, None)
+
+
+    def _drop_comments(self, key):
+        for comments in (self._comments, self._inline_comments):
+            if comments is not None:
+                dict.pop(comments, key, None)
 
 
     def _interpolate(self, key, value):
@@ -527,23 +1153,38 @@ class Section(dict):
             engine = self._interpolation_engine
         except AttributeError:
             # not yet: first time running _interpolate(), so pick the engine
-            name = self.main.interpolation
-            if name == True:  # note that "if name:" would be incorrect here
-                # backwards-compatibility: interpolation=True means use default
-                name = DEFAULT_INTERPOLATION
-            name = name.lower()  # so that "Template", "template", etc. all work
-            class_ = interpolation_engines.get(name, None)
-            if class_ is None:
-                # invalid value for self.main.interpolation
-                self.main.interpolation = False
+            engine = self._make_engine()
+            if engine is None:
                 return value
-            else:
-                # save reference to engine so we don't have to do this again
-                engine = self._interpolation_engine = class_(self)
         # let the engine do the actual work
         return engine.interpolate(key, value)
 
 
+    def _make_engine(self):
+        """Create the interpolation engine, or return ``None`` if there isn't one."""
+        name = self.main.interpolation
+        if name == True:  # note that "if name:" would be incorrect here
+            # backwards-compatibility: interpolation=True means use default
+            name = DEFAULT_INTERPOLATION
+        name = name.lower()  # so that "Template", "template", etc. all work
+        class_ = interpolation_engines.get(name, None)
+        if class_ is None:
+            # invalid value for self.main.interpolation
+            self.main.interpolation = False
+            return None
+        # save reference to engine so we don't have to do this again
+        engine = self._interpolation_engine = class_(self)
+        return engine
+
+
+    def _invalidate(self, key):
+        """Drop the cached interpolations that looked up ``key``."""
+        plans = self.main._interpolation_dependents.pop(key, None)
+        if plans:
+            for engine, plan_key in plans:
+                engine._plans.pop(plan_key, None)
+
+
     def __getitem__(self, key):
         """Fetch the item and do string interpolation."""
         val = dict.__getitem__(self, key)
@@ -574,17 +1215,33 @@ class Section(dict):
         
         ``unrepr`` must be set when setting a value to a dictionary, without
         creating a new sub-section.
+        
+        A new member has an empty inline comment.
+        """
+        new = isinstance(key, str) and key not in self
+        self._set_member(key, value, unrepr)
+        if new:
+            # where a member parsed without an inline comment has ``None``
+            dict.__setitem__(self.inline_comments, key, '')
+
+
+    def _set_member(self, key, value, unrepr=False):
+        """
+        ``__setitem__``, without giving a new member an inline comment, for
+        members that are parsed.
         """
         if not isinstance(key, str):
             raise ValueError('The key "%s" is not a string.' % key)
-        
-        # add the comment
-        if key not in self.comments:
-            self.comments[key] = []
-            self.inline_comments[key] = ''
+        if self.main._interpolation_dependents:
+            self._invalidate(key)
+        if self._source is not None:
+            self._changed(key)
+        if self._typed:
+            self._retyped(key)
         # remove the entry from defaults
-        if key in self.defaults:
-            self.defaults.remove(key)
+        defaults = self._defaults
+        if defaults and key in defaults:
+            defaults.remove(key)
         #
         if isinstance(value, Section):
             if key not in self:
@@ -623,12 +1280,17 @@ class Section(dict):
     def __delitem__(self, key):
         """Remove items from the sequence when deleting."""
         dict. __delitem__(self, key)
+        if self.main._interpolation_dependents:
+            self._invalidate(key)
+        if self._source is not None:
+            self._changed(key)
+        if self._typed:
+            self._retyped(key)
         if key in self.scalars:
             self.scalars.remove(key)
         else:
             self.sections.remove(key)
-        del self.comments[key]
-        del self.inline_comments[key]
+        self._drop_comments(key)
 
 
     def get(self, key, default=None):
@@ -682,14 +1344,19 @@ class Section(dict):
         Leaves other attributes alone :
             depth/main/parent are not affected
         """
+        if self.main._interpolation_dependents:
+            for key in self:
+                self._invalidate(key)
         dict.clear(self)
-        self.scalars = []
-        self.sections = []
-        self.comments = {}
-        self.inline_comments = {}
+        self.scalars = KeyList()
+        self.sections = KeyList()
+        self._comments = None
+        self._inline_comments = None
         self.configspec = None
-        self.defaults = []
-        self.extra_values = []
+        self._defaults = None
+        self._extra_values = None
+        self._source = None
+        self._typed = None
 
 
     def setdefault(self, key, default=None):
@@ -703,7 +1370,7 @@ class Section(dict):
 
     def items(self):
         """D.items() -> list of D's (key, value) pairs, as 2-tuples"""
-        return list(zip((self.scalars + self.sections), list(self.values())))
+        return list(zip(self.keys(), list(self.values())))
 
 
     def keys(self):
@@ -713,7 +1380,7 @@ class Section(dict):
 
     def values(self):
         """D.values() -> list of D's values"""
-        return [self[key] for key in (self.scalars + self.sections)]
+        return [self[key] for key in self.keys()]
 
 
     def iteritems(self):
@@ -723,7 +1390,7 @@ class Section(dict):
 
     def iterkeys(self):
         """D.iterkeys() -> an iterator over the keys of D"""
-        return iter((self.scalars + self.sections))
+        return iter(self.keys())
 
     __iter__ = iterkeys
 
@@ -741,7 +1408,7 @@ class Section(dict):
             except MissingInterpolationOption:
                 return dict.__getitem__(self, key)
         return '{%s}' % ', '.join([('%s: %s' % (repr(key), repr(_getval(key))))
-            for key in (self.scalars + self.sections)])
+            for key in self.keys()])
 
     __str__ = __repr__
     __str__.__doc__ = "x.__str__() <==> str(x)"
@@ -777,6 +1444,122 @@ class Section(dict):
         return newdict
 
 
+    def resolve_all(self):
+        """
+        Interpolate every value in this section and its subsections up front,
+        caching the results so that fetching them later is fast.
+        
+        All the references between values are followed, so the first
+        ``MissingInterpolationOption`` or ``InterpolationLoopError`` is raised
+        now. The ``cycle`` attribute of an ``InterpolationLoopError`` lists
+        every ``(path, key)`` in the loop.
+        """
+        if not self.main.interpolation:
+            return
+        try:
+            engine = self._interpolation_engine
+        except AttributeError:
+            engine = self._make_engine()
+            if engine is None:
+                return
+        save_interp = self.main.interpolation
+        self.main.interpolation = False
+        try:
+            engine.resolve_all()
+            resolved = True
+        except NotImplementedError:
+            resolved = False
+        finally:
+            self.main.interpolation = save_interp
+        if not resolved:
+            # an engine without ``_match_key`` interpolates one value at a time
+            for key in self.scalars:
+                self[key]
+        for name in self.sections:
+            self[name].resolve_all()
+
+
+    def interpolated(self):
+        """
+        Return a deepcopy of self as a dictionary, with every value
+        interpolated.
+        
+        The values are interpolated by ``resolve_all``, which also caches
+        them.
+        """
+        self.resolve_all()
+        return self.dict()
+
+
+    def freeze(self):
+        """
+        Return an immutable snapshot of this section, as a ``FrozenSection``.
+        
+        Every value is interpolated by ``resolve_all`` first, and values
+        converted by ``validate`` keep their types. Changing the section
+        afterwards doesn't change the snapshot.
+        """
+        self.resolve_all()
+        return FrozenSection(self, self.name)
+
+
+    def overlay(self):
+        """
+        Return a copy-on-write copy of this section, to change without
+        changing this one.
+        
+        Values are read from this section until the copy is changed, and
+        then only the subsections that are changed are copied. A subsection
+        that hasn't been changed yet shares the members of this one, so it
+        sees changes made to them here.
+        """
+        return OverlaySection(self.parent, self)
+
+
+    def _copy_members(self, section, members=None):
+        """
+        Copy the members of ``section`` into this new section, with copies of
+        their lists and comments. The subsections become ``OverlaySection``.
+        
+        ``members`` are the members that have already been copied, by name.
+        """
+        members = members or {}
+        self.scalars = KeyList(section.scalars)
+        self.sections = KeyList(section.sections)
+        for key in self.scalars:
+            try:
+                value = members[key]
+            except KeyError:
+                value = dict.__getitem__(section, key)
+                if isinstance(value, list):
+                    value = list(value)
+            dict.__setitem__(self, key, value)
+        for name in self.sections:
+            child = members.get(name)
+            if not isinstance(child, Section):
+                child = OverlaySection(self, dict.__getitem__(section, name))
+            dict.__setitem__(self, name, child)
+        comments = section._comments
+        self._comments = None if not comments else CommentDict(
+            self, False, [(key, list(comment_list)) for (key, comment_list)
+                          in dict.items(comments) if comment_list])
+        comments = section._inline_comments
+        self._inline_comments = None if not comments else CommentDict(
+            self, True, [(key, comment) for (key, comment)
+                         in dict.items(comments) if comment is not None])
+        self.configspec = section.configspec
+        defaults = section._defaults
+        self._defaults = KeyList(defaults) if defaults else None
+        values = section._default_values
+        self._default_values = dict(values) if values else None
+        values = section._extra_values
+        self._extra_values = list(values) if values else None
+        self._created = section._created
+        source = section._source
+        self._source = dict(source) if source else None
+        self._typed = None
+
+
     def merge(self, indict):
         """
         A recursive update - useful for merging config files.
@@ -819,19 +1602,30 @@ class Section(dict):
             the_list = self.sections
         else:
             raise KeyError('Key "%s" not found.' % oldkey)
-        pos = the_list.index(oldkey)
         #
         val = self[oldkey]
         dict.__delitem__(self, oldkey)
         dict.__setitem__(self, newkey, val)
-        the_list.remove(oldkey)
-        the_list.insert(pos, newkey)
-        comm = self.comments[oldkey]
-        inline_comment = self.inline_comments[oldkey]
-        del self.comments[oldkey]
-        del self.inline_comments[oldkey]
-        self.comments[newkey] = comm
-        self.inline_comments[newkey] = inline_comment
+        if isinstance(the_list, KeyList):
+            the_list.replace(oldkey, newkey)
+        else:
+            # a list set by the caller
+            the_list[the_list.index(oldkey)] = newkey
+        if self.main._interpolation_dependents:
+            self._invalidate(oldkey)
+            self._invalidate(newkey)
+        if self._source is not None:
+            self._changed(oldkey)
+            self._changed(newkey)
+        if self._typed:
+            self._retyped(oldkey)
+            self._retyped(newkey)
+        for comments in (self._comments, self._inline_comments):
+            if comments is not None:
+                dict.pop(comments, newkey, None)
+                if dict.__contains__(comments, oldkey):
+                    dict.__setitem__(comments, newkey,
+                                     dict.pop(comments, oldkey))
 
 
     def walk(self, function, raise_errors=True,
@@ -947,7 +1741,15 @@ class Section(dict):
         >>> a.as_bool('b')
         0
         """
-        val = self[key]
+        try:
+            return self._typed['bool', key]
+        except (KeyError, TypeError):
+            # not converted yet, or nothing has been (``_typed`` is None)
+            return self._convert('bool', key, self._to_bool)
+
+
+    def _to_bool(self, val):
+        """The conversion done by ``as_bool``."""
         if val == True:
             return True
         elif val == False:
@@ -983,7 +1785,10 @@ class Section(dict):
         Traceback (most recent call last):
         ValueError: invalid literal for int() with base 10: '3.2'
         """
-        return int(self[key])
+        try:
+            return self._typed['int', key]
+        except (KeyError, TypeError):
+            return self._convert('int', key, int)
 
 
     def as_float(self, key):
@@ -1005,7 +1810,10 @@ class Section(dict):
         >>> a.as_float('b')  #doctest: +ELLIPSIS
         3.2...
         """
-        return float(self[key])
+        try:
+            return self._typed['float', key]
+        except (KeyError, TypeError):
+            return self._convert('float', key, float)
     
     
     def as_list(self, key):
@@ -1024,11 +1832,36 @@ class Section(dict):
         >>> a.as_list('a')
         [1]
         """
-        result = self[key]
-        if isinstance(result, (tuple, list)):
-            return list(result)
-        return [result]
+        try:
+            result = self._typed['list', key]
+        except (KeyError, TypeError):
+            result = self._convert('list', key, _as_tuple)
+        # a new list each time, as the caller may change it
+        return list(result)
+
+
+    def _convert(self, kind, key, convert):
+        """
+        Return the value of ``key`` converted by ``convert``, for ``as_bool``
+        and friends, remembering it until the value is changed.
         
+        Values that interpolation could change, and values that can be
+        changed in place (like lists), are converted again every time.
+        """
+        result = convert(self[key])
+        value = dict.__getitem__(self, key)
+        if isinstance(value, str):
+            for engine in interpolation_engines.values():
+                if engine._cookie in value:
+                    return result
+        elif not isinstance(value, (int, float)):
+            return result
+        typed = self._typed
+        if typed is None:
+            typed = self._typed = {}
+        typed[kind, key] = result
+        return result
+
 
     def restore_default(self, key):
         """
@@ -1041,6 +1874,11 @@ class Section(dict):
         """
         default = self.default_values[key]
         dict.__setitem__(self, key, default)
+        if self.main._interpolation_dependents:
+            self._invalidate(key)
+        self._changed(key)
+        if self._typed:
+            self._retyped(key)
         if key not in self.defaults:
             self.defaults.append(key)
         return default
@@ -1056,53 +1894,305 @@ class Section(dict):
         
         It doesn't delete or modify entries without default values.
         """
-        for key in self.default_values:
+        for key in self._default_values or ():
             self.restore_default(key)
             
         for section in self.sections:
             self[section].restore_defaults()
 
 
-class ConfigObj(Section):
-    """An object to read, create, and write config files."""
+def _as_tuple(value):
+    """The conversion done by ``as_list``, as a tuple that can be shared."""
+    if isinstance(value, (tuple, list)):
+        return tuple(value)
+    return (value,)
 
-    _keyword = re.compile(r'''^ # line start
-        (\s*)                   # indentation
-        (                       # keyword
-            (?:".*?")|          # double quotes
-            (?:'.*?')|          # single quotes
-            (?:[^'"=].*?)       # no quotes
-        )
-        \s*=\s*                 # divider
-        (.*)                    # value (including list values and comments)
-        $   # line end
-        ''',
-        re.VERBOSE)
 
-    _sectionmarker = re.compile(r'''^
-        (\s*)                     # 1: indentation
-        ((?:\[\s*)+)              # 2: section marker open
-        (                         # 3: section name open
-            (?:"\s*\S.*?\s*")|    # at least one non-space with double quotes
-            (?:'\s*\S.*?\s*')|    # at least one non-space with single quotes
-            (?:[^'"\s].*?)        # at least one non-space unquoted
-        )                         # section name close
-        ((?:\s*\])+)              # 4: section marker close
-        \s*(\#.*)?                # 5: optional comment
-        $''',
-        re.VERBOSE)
+class LazySection(Section):
+    """
+    A section of a config file loaded with ``lazy=True``.
 
-    # this regexp pulls list values out as a single string
-    # or single values and comments
-    # FIXME: this regex adds a '' to the end of comma terminated lists
-    #   workaround in ``_handle_value``
-    _valueexp = re.compile(r'''^
-        (?:
-            (?:
-                (
-                    (?:
-                        (?:
-                            (?:".*?")|              # double quotes
+    Its members are parsed the first time it is used, when it becomes an
+    ordinary ``Section``.
+    """
+
+    __slots__ = ()
+
+    # the attributes that are only set once the section is parsed
+    _lazy_attributes = ('scalars', 'sections', '_comments', '_inline_comments',
+                        '_source', '_typed')
+
+    def __init__(self, parent, depth, main, infile, node):
+        """
+        * infile is the list of lines of the config file
+        * node describes the section, as found by ``ConfigObj._scan_sections``
+        """
+        Section.__init__(self, parent, depth, main, name=node[0])
+        for name in self._lazy_attributes:
+            delattr(self, name)
+        self._lazy = (infile, node)
+
+
+    def __getattr__(self, name):
+        if name in self._lazy_attributes:
+            self._materialise()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+
+    def _materialise(self):
+        """Parse the members, and turn into a ``Section``."""
+        (infile, node) = self._lazy
+        del self._lazy
+        self.__class__ = Section
+        self.scalars = KeyList()
+        self.sections = KeyList()
+        self._comments = None
+        self._inline_comments = None
+        self._source = None
+        self._typed = None
+        self.main._parse_section(self, infile, node)
+
+
+def _materialising(name):
+    """Wrap a ``Section`` method that doesn't use the lazy attributes."""
+    method = getattr(Section, name)
+    def wrapper(self, *args):
+        self._materialise()
+        return method(self, *args)
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+for _name in ('__getitem__', '__delitem__', '__contains__', '__len__',
+              '__eq__', '__ne__', '__reduce__', 'clear', 'copy',
+              'restore_default'):
+    setattr(LazySection, _name, _materialising(_name))
+del _name
+
+
+class OverlaySection(LazySection):
+    """
+    A copy-on-write copy of a section, made by ``Section.overlay`` or
+    ``ConfigObj.derive``.
+
+    Values are read from the section it copies, and kept as they are read:
+    a list is copied, and a subsection becomes an overlay in turn. It copies
+    the rest of the members the first time it is changed (or its other
+    attributes, like ``scalars`` or ``comments``, are used), and becomes an
+    ordinary ``Section``. So only the sections that are changed are copied.
+    """
+
+    __slots__ = ()
+
+    # the typed values are kept as values are read
+    _lazy_attributes = tuple(
+        [name for name in LazySection._lazy_attributes if name != '_typed'] +
+        ['configspec', '_defaults', '_default_values', '_extra_values',
+         '_created'])
+
+    def __init__(self, parent, section):
+        """
+        * parent is the section above
+        * section is the section to copy
+        """
+        # the other attributes are all lazy, so are left unset
+        self.parent = parent
+        self.main = parent.main
+        self.depth = parent.depth + 1
+        self.name = section.name
+        self._typed = None
+        self._lazy = section
+
+
+    def _read(self, key):
+        """Keep the member ``key`` of the section being copied, as it is read."""
+        section = self._lazy
+        if isinstance(section, OverlaySection):
+            if not dict.__contains__(section, key):
+                section._read(key)
+        elif isinstance(section, LazySection):
+            section._materialise()
+        value = dict.__getitem__(section, key)
+        if isinstance(value, Section):
+            value = OverlaySection(self, value)
+        elif isinstance(value, list):
+            value = list(value)
+        dict.__setitem__(self, key, value)
+
+
+    def __getitem__(self, key):
+        if not dict.__contains__(self, key):
+            self._read(key)
+        return Section.__getitem__(self, key)
+
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._lazy
+
+
+    def __len__(self):
+        return len(self._lazy)
+
+
+    def keys(self):
+        return self._lazy.keys()
+
+
+    def _materialise(self):
+        """Copy the members, and turn into a ``Section``."""
+        section = self._lazy
+        del self._lazy
+        # the members read so far are already copies
+        members = dict(dict.items(self))
+        dict.clear(self)
+        self.__class__ = Section
+        self._copy_members(section, members)
+
+
+def _freeze_value(value, name=None):
+    """
+    Return an immutable version of a value, for a ``FrozenSection``. A
+    dictionary becomes a ``FrozenSection`` called ``name``.
+    """
+    if isinstance(value, FrozenSection):
+        return value
+    if isinstance(value, dict):
+        return FrozenSection(value, name)
+    if isinstance(value, (list, tuple)):
+        return tuple([_freeze_value(entry) for entry in value])
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError('A FrozenSection can not be changed.')
+
+
+def _unpickle_frozen(values, name):
+    """Rebuild a pickled ``FrozenSection``, whose values are already frozen."""
+    frozen = FrozenSection.__new__(FrozenSection)
+    dict.update(frozen, values)
+    frozen._initialise(name)
+    return frozen
+
+
+class FrozenSection(dict):
+    """
+    An immutable snapshot of a section, as returned by ``Section.freeze``.
+
+    It is a dictionary of the values in their final form: interpolated, with
+    lists as tuples, and subsections (and dictionary values) as
+    ``FrozenSection`` instances. Reading it is as fast as reading a
+    dictionary, and any attempt to change it raises ``TypeError``, so it can
+    be shared between threads without locking. It is hashable, and pickles
+    to a plain tree of values.
+    """
+
+    __slots__ = ('name', 'scalars', 'sections', '_hash')
+
+    def __init__(self, mapping=(), name=None):
+        if isinstance(mapping, dict):
+            mapping = mapping.items()
+        dict.__init__(self, [(key, _freeze_value(value, key))
+                             for (key, value) in mapping])
+        self._initialise(name)
+
+
+    def _initialise(self, name):
+        object.__setattr__(self, 'name', name)
+        # the keys of values and of subsections, in order
+        object.__setattr__(self, 'scalars', tuple(
+            [key for (key, value) in dict.items(self)
+             if not isinstance(value, FrozenSection)]))
+        object.__setattr__(self, 'sections', tuple(
+            [key for (key, value) in dict.items(self)
+             if isinstance(value, FrozenSection)]))
+        object.__setattr__(self, '_hash', None)
+
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = _immutable
+    clear = pop = popitem = setdefault = update = __ior__ = _immutable
+
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash',
+                               hash(frozenset(dict.items(self))))
+        return self._hash
+
+
+    def __reduce__(self):
+        return (_unpickle_frozen, (dict(self), self.name))
+
+
+    def __copy__(self):
+        return self
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+    def __repr__(self):
+        return 'FrozenSection(%s)' % dict.__repr__(self)
+
+
+    def dict(self):
+        """
+        Return a copy as an ordinary dictionary, with subsections turned to
+        dictionaries and tuples to lists.
+        """
+        def thaw(value):
+            if isinstance(value, FrozenSection):
+                return value.dict()
+            if isinstance(value, tuple):
+                return [thaw(entry) for entry in value]
+            return value
+        return dict((key, thaw(value)) for (key, value) in dict.items(self))
+
+
+class ConfigObj(Section):
+    """An object to read, create, and write config files."""
+
+    _keyword = re.compile(r'''^ # line start
+        (\s*)                   # indentation
+        (                       # keyword
+            (?:".*?")|          # double quotes
+            (?:'.*?')|          # single quotes
+            (?:[^'"=].*?)       # no quotes
+        )
+        \s*=\s*                 # divider
+        (.*)                    # value (including list values and comments)
+        $   # line end
+        ''',
+        re.VERBOSE)
+
+    _sectionmarker = re.compile(r'''^
+        (\s*)                     # 1: indentation
+        ((?:\[\s*)+)              # 2: section marker open
+        (                         # 3: section name open
+            (?:"\s*\S.*?\s*")|    # at least one non-space with double quotes
+            (?:'\s*\S.*?\s*')|    # at least one non-space with single quotes
+            (?:[^'"\s].*?)        # at least one non-space unquoted
+        )                         # section name close
+        ((?:\s*\])+)              # 4: section marker close
+        \s*(\#.*)?                # 5: optional comment
+        $''',
+        re.VERBOSE)
+
+    # this regexp pulls list values out as a single string
+    # or single values and comments
+    # FIXME: this regex adds a '' to the end of comma terminated lists
+    #   workaround in ``_handle_value``
+    _valueexp = re.compile(r'''^
+        (?:
+            (?:
+                (
+                    (?:
+                        (?:
+                            (?:".*?")|              # double quotes
                             (?:'.*?')|              # single quotes
                             (?:[^'",\#][^,\#]*?)    # unquoted
                         )
@@ -1170,7 +2260,9 @@ class ConfigObj(Section):
                  interpolation=True, raise_errors=False, list_values=True,
                  create_empty=False, file_error=False, stringify=True,
                  indent_type=None, default_encoding=None, unrepr=False,
-                 write_empty_values=False, _inspec=False):
+                 write_empty_values=False, parser=None, lazy=False,
+                 cache=False, read_only=False, keep_formatting=False,
+                 _inspec=False):
         """
         Parse a config file or create a config file object.
         
@@ -1178,7 +2270,9 @@ class ConfigObj(Section):
                     interpolation=True, raise_errors=False, list_values=True,
                     create_empty=False, file_error=False, stringify=True,
                     indent_type=None, default_encoding=None, unrepr=False,
-                    write_empty_values=False, _inspec=False)``
+                    write_empty_values=False, parser=None, lazy=False,
+                    cache=False, read_only=False, keep_formatting=False,
+                    _inspec=False)``
         """
         self._inspec = _inspec
         # init the superclass
@@ -1192,7 +2286,10 @@ class ConfigObj(Section):
                     'create_empty': create_empty, 'file_error': file_error,
                     'stringify': stringify, 'indent_type': indent_type,
                     'default_encoding': default_encoding, 'unrepr': unrepr,
-                    'write_empty_values': write_empty_values}
+                    'write_empty_values': write_empty_values,
+                    'parser': parser, 'lazy': lazy, 'cache': cache,
+                    'read_only': read_only,
+                    'keep_formatting': keep_formatting}
 
         if options is None:
             options = _options
@@ -1225,11 +2322,18 @@ class ConfigObj(Section):
         
         
     def _load(self, infile, configspec):
+        cache_key = None
         if isinstance(infile, str):
             self.filename = infile
             if os.path.isfile(infile):
-                with open(infile, 'rb') as h:
-                    content = h.readlines() or []
+                if self.cache and not self.keep_formatting:
+                    # the cache doesn't keep the lines
+                    cache_key = self._cache_key(infile)
+                if cache_key is not None and self._read_cache(infile, cache_key):
+                    # no parsing needed
+                    content = None
+                else:
+                    content = self._read_file(infile)
             elif self.file_error:
                 # raise an error if the file doesn't exist
                 raise IOError('Config file not found: "%s".' % self.filename)
@@ -1243,7 +2347,7 @@ class ConfigObj(Section):
                 content = []
                 
         elif isinstance(infile, (list, tuple)):
-            content = list(infile)
+            content = self._decode_content(list(infile))
             
         elif isinstance(infile, dict):
             # initialise self
@@ -1271,12 +2375,43 @@ class ConfigObj(Section):
         
         elif getattr(infile, 'read', MISSING) is not MISSING:
             # This supports file like objects
-            content = infile.read() or []
             # needs splitting into lines - but needs doing *after* decoding
             # in case it's not an 8 bit encoding
+            content = self._decode_content(infile.read() or [])
         else:
             raise TypeError('infile must be a filename, file like object, or list of lines.')
 
+        if content is None:
+            del self._errors
+        elif cache_key is None:
+            if self.lazy:
+                self._parse_lazy(content)
+            else:
+                self._parse(content)
+            self._raise_errors()
+        else:
+            # parsed in full so that it can be cached, keeping the
+            # indentation used in the file for loads that don't set it
+            indent_type = self.indent_type
+            self.indent_type = None
+            self._parse(content)
+            file_indent_type = self.indent_type
+            if indent_type is not None:
+                self.indent_type = indent_type
+            self._raise_errors()
+            self._write_cache(infile, cache_key, file_indent_type)
+        
+        if configspec is None:
+            self.configspec = None
+        else:
+            self._handle_configspec(configspec)
+
+
+    def _decode_content(self, content):
+        """
+        Decode the content of a config file, returning a list of lines without
+        their line endings.
+        """
         if content:
             # don't do it for the empty ConfigObj
             content = self._handle_bom(content)
@@ -1294,9 +2429,219 @@ class ConfigObj(Section):
                 break
 
         assert all(isinstance(line, str) for line in content), repr(content)
-        content = [line.rstrip('\r\n') for line in content]
+        return [line.rstrip('\r\n') for line in content]
+
+
+    def _read_file(self, filename):
+        """Read a config file, returning its lines as ``_decode_content`` does."""
+        content = self._map_file(filename)
+        if content is None:
+            with open(filename, 'rb') as h:
+                content = self._decode_content(h.readlines() or [])
+        return content
+
+
+    def _map_file(self, filename):
+        """
+        Read a config file through ``mmap``, decoding and splitting it a line
+        at a time so that only one copy of the content is held in memory.
+        
+        Returns a list of lines as ``_decode_content`` does, or ``None`` if
+        the file can't be mapped or needs decoding as a whole (UTF16).
+        """
+        if mmap is None:
+            return None
+        with open(filename, 'rb') as h:
+            if not os.fstat(h.fileno()).st_size:
+                # empty, or a special file with no size
+                return None
+            try:
+                data = mmap.mmap(h.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+        
+        with data:
+            # the same BOM handling as ``_handle_bom``
+            if self.encoding is None:
+                if data[:2] in (BOM_UTF16_BE, BOM_UTF16_LE):
+                    return None
+                BOM = BOM_UTF8
+            else:
+                enc = BOM_LIST.get(self.encoding.lower())
+                if enc == 'utf_16':
+                    return None
+                BOM = BOM_SET[enc] if enc is not None else None
+            if BOM is not None and data[:len(BOM)] == BOM:
+                data.seek(len(BOM))
+                self.BOM = True
+            encoding = self.encoding or 'utf-8'
             
-        self._parse(content)
+            advice = getattr(mmap, 'MADV_SEQUENTIAL', None)
+            if advice is not None:
+                data.madvise(advice)
+            content = []
+            if self.BOM and len(data) == len(BOM):
+                # just the BOM, which leaves a single empty line
+                content.append('')
+            for line in iter(data.readline, b''):
+                line = line.decode(encoding)
+                if self.newlines is None and line[-1:] in ('\r', '\n'):
+                    # the first line ending found
+                    for end in ('\r\n', '\n', '\r'):
+                        if line.endswith(end):
+                            self.newlines = end
+                            break
+                content.append(line.rstrip('\r\n'))
+        return content
+
+
+    def _cache_file(self, filename):
+        """The name of the parse cache for ``filename``."""
+        filename = os.path.abspath(filename)
+        directory, name = os.path.split(filename)
+        if self.cache is True:
+            return os.path.join(directory, '.' + name + CACHE_SUFFIX)
+        # files with the same name in different directories can share a
+        # cache directory
+        import hashlib
+        digest = hashlib.sha1(os.fsencode(filename)).hexdigest()[:16]
+        return os.path.join(self.cache, name + '-' + digest + CACHE_SUFFIX)
+
+
+    def _cache_key(self, filename):
+        """
+        The key for the parse cache of ``filename``: its size, modification
+        time and hash, along with the options that change how it is parsed.
+        """
+        import hashlib
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as h:
+            stat = os.fstat(h.fileno())
+            for chunk in iter(lambda: h.read(1 << 20), b''):
+                digest.update(chunk)
+        return (CACHE_VERSION, __version__, tuple(sys.version_info[:2]),
+                stat.st_size, stat.st_mtime_ns, digest.hexdigest(),
+                self.encoding, self.list_values, self.unrepr, self.stringify,
+                self.read_only, self._inspec)
+
+
+    def _read_cache(self, filename, key):
+        """
+        Load the config from the parse cache of ``filename``.
+        
+        Returns ``False`` if there is no cache, or it doesn't match ``key``.
+        """
+        # the garbage collector would keep scanning the objects being
+        # created, which can take longer than creating them
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            try:
+                with open(self._cache_file(filename), 'rb') as h:
+                    # much faster than reading from the file with marshal.load
+                    (cached_key, data) = marshal.loads(h.read())
+            except (OSError, EOFError, ValueError, TypeError):
+                return False
+            if cached_key != key:
+                return False
+            try:
+                (initial_comment, final_comment, indent_type, newlines, BOM,
+                 encoding, tree) = data
+                self._load_cache_tree(self, tree)
+            except (ValueError, TypeError):
+                # a damaged cache
+                Section.clear(self)
+                return False
+            self.initial_comment = initial_comment
+            self.final_comment = final_comment
+            if self.indent_type is None:
+                self.indent_type = indent_type
+            self.newlines = newlines
+            self.BOM = BOM
+            self.encoding = encoding
+            return True
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+
+    def _write_cache(self, filename, key, indent_type):
+        """
+        Save the parsed config to the parse cache of ``filename``.
+        
+        Failing to write the cache isn't an error.
+        """
+        stat = os.stat(filename)
+        if (stat.st_size, stat.st_mtime_ns) != key[3:5]:
+            # changed while we were reading it
+            return
+        data = (self.initial_comment, self.final_comment, indent_type,
+                self.newlines, self.BOM, self.encoding,
+                self._cache_tree(self))
+        cache_file = self._cache_file(filename)
+        # written under another name and then moved, so that other
+        # processes never read part of a cache
+        temp_file = '%s.%s.tmp' % (cache_file, os.getpid())
+        try:
+            if self.cache is not True:
+                os.makedirs(self.cache, exist_ok=True)
+            with open(temp_file, 'wb') as h:
+                h.write(marshal.dumps((key, data)))
+            os.replace(temp_file, cache_file)
+        except (OSError, ValueError):
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+
+
+    def _cache_tree(self, section):
+        """
+        The members and comments of ``section``, as data for marshal.
+        
+        The comments are kept in the order of the members, so that the keys
+        are only stored once.
+        """
+        scalar_comments = [section._get_comments(key)
+                           for key in section.scalars]
+        sections = []
+        for name in section.sections:
+            (comment_list, comment) = section._get_comments(name)
+            sections.append((name, list(comment_list), comment,
+                             self._cache_tree(dict.__getitem__(section, name))))
+        return (list(section.scalars),
+                [dict.__getitem__(section, key) for key in section.scalars],
+                [list(comments[0]) for comments in scalar_comments],
+                [comments[1] for comments in scalar_comments],
+                sections)
+
+
+    def _load_cache_tree(self, section, tree):
+        """Fill in ``section`` from the data made by ``_cache_tree``."""
+        (scalars, values, comments, inline_comments, sections) = tree
+        dict.update(section, zip(scalars, values))
+        section.scalars = KeyList(scalars)
+        # only the comments that aren't empty are stored
+        comments = dict(
+            entry for entry in zip(scalars, comments) if entry[1])
+        if comments:
+            section._comments = CommentDict(section, False, comments)
+        inline_comments = dict(
+            entry for entry in zip(scalars, inline_comments)
+            if entry[1] is not None)
+        if inline_comments:
+            section._inline_comments = CommentDict(section, True,
+                                                   inline_comments)
+        for (name, comment_list, comment, subtree) in sections:
+            child = Section(section, section.depth + 1, self, name=name)
+            dict.__setitem__(section, name, child)
+            section.sections.append(name)
+            section._set_comments(name, comment_list, comment)
+            self._load_cache_tree(child, subtree)
+
+
+    def _raise_errors(self):
+        """Raise the errors found while parsing, if there were any."""
         # if we had any errors, now is the time to raise them
         if self._errors:
             info = "at line %s." % self._errors[0].line_number
@@ -1313,11 +2658,6 @@ class ConfigObj(Section):
             raise error
         # delete private attributes
         del self._errors
-        
-        if configspec is None:
-            self.configspec = None
-        else:
-            self._handle_configspec(configspec)
     
     
     def _initialise(self, options=None):
@@ -1338,8 +2678,26 @@ class ConfigObj(Section):
         self.default_encoding = options['default_encoding']
         self.BOM = False
         self.newlines = None
+        # the cached interpolations that looked up each key, by key
+        self._interpolation_dependents = {}
+        # line hashes for ``reload(incremental=True)``
+        self._signatures = {}
         self.write_empty_values = options['write_empty_values']
         self.unrepr = options['unrepr']
+        self.lazy = options['lazy']
+        self.cache = options['cache']
+        self.read_only = options['read_only']
+        self.keep_formatting = options['keep_formatting']
+        self.parser = options['parser']
+        if self.parser is not None and self.parser not in PARSERS:
+            raise ValueError('Unknown parser "%s".' % self.parser)
+        # the implementation actually used for parsing
+        if self.parser == 'regex' or (self.parser is None and _speedups is None):
+            self.parser_backend = 'regex'
+        elif _speedups is not None:
+            self.parser_backend = 'speedups'
+        else:
+            self.parser_backend = 'lexer'
         
         self.initial_comment = []
         self.final_comment = []
@@ -1537,12 +2895,18 @@ class ConfigObj(Section):
         if self.unrepr:
             self.list_values = False
             
+        match_line, handle_value = self._parse_methods()
+        keep_comments = not self.read_only
+            
         comment_list = []
         done_start = False
         this_section = self
         maxline = len(infile) - 1
         cur_index = -1
         reset_comment = False
+        # the section tree, as ``_scan_sections`` finds it
+        root = node = [None, None, 0, maxline, None, []]
+        nodes = [root]
         
         while cur_index < maxline:
             if reset_comment:
@@ -1558,20 +2922,26 @@ class ConfigObj(Section):
             
             if not done_start:
                 # preserve initial comment
-                self.initial_comment = comment_list
+                if keep_comments:
+                    self.initial_comment = comment_list
                 comment_list = []
                 done_start = True
+                root[3] = cur_index - 1
                 
             reset_comment = True
+            token = match_line(line)
+            if token is None:
+                self._handle_error(
+                    'Invalid line ({0!r}) (matched as neither section nor keyword)'.format(line),
+                    ParseError, infile, cur_index)
+                continue
             # first we check if it's a section marker
-            mat = self._sectionmarker.match(line)
-            if mat is not None:
+            if token[0] == 'section':
                 # is a section line
-                (indent, sect_open, sect_name, sect_close, comment) = mat.groups()
+                (indent, cur_depth, close_depth, sect_name, comment) = token[1:]
                 if indent and (self.indent_type is None):
                     self.indent_type = indent
-                cur_depth = sect_open.count('[')
-                if cur_depth != sect_close.count(']'):
+                if cur_depth != close_depth:
                     self._handle_error("Cannot compute the section depth",
                                        NestingError, infile, cur_index)
                     continue
@@ -1608,82 +2978,25 @@ class ConfigObj(Section):
                     cur_depth,
                     self,
                     name=sect_name)
-                parent[sect_name] = this_section
-                parent.inline_comments[sect_name] = comment
-                parent.comments[sect_name] = comment_list
+                parent._set_member(sect_name, this_section)
+                if keep_comments:
+                    parent._set_comments(sect_name, comment_list, comment)
+                    if self.keep_formatting:
+                        self._keep_source(parent, sect_name, infile,
+                                          cur_index - len(comment_list),
+                                          cur_index, cur_index + 1)
+                del nodes[cur_depth:]
+                node[4] = cur_index - len(comment_list)
+                node = [sect_name, comment, node[4], cur_index, None, []]
+                nodes[-1][5].append(node)
+                nodes.append(node)
                 continue
-            #
-            # it's not a section marker,
-            # so it should be a valid ``key = value`` line
-            mat = self._keyword.match(line)
-            if mat is None:
-                self._handle_error(
-                    'Invalid line ({0!r}) (matched as neither section nor keyword)'.format(line),
-                    ParseError, infile, cur_index)
             else:
-                # is a keyword value
-                # value will include any inline comment
-                (indent, key, value) = mat.groups()
-                if indent and (self.indent_type is None):
-                    self.indent_type = indent
-                # check for a multiline value
-                if value[:3] in ['"""', "'''"]:
-                    try:
-                        value, comment, cur_index = self._multiline(
-                            value, infile, cur_index, maxline)
-                    except SyntaxError:
-                        self._handle_error(
-                            'Parse error in multiline value',
-                            ParseError, infile, cur_index)
-                        continue
-                    else:
-                        if self.unrepr:
-                            comment = ''
-                            try:
-                                value = unrepr(value)
-                            except Exception as e:
-                                if type(e) == UnknownType:
-                                    msg = 'Unknown name or type in value'
-                                else:
-                                    msg = 'Parse error from unrepr-ing multiline value'
-                                self._handle_error(msg, UnreprError, infile,
-                                    cur_index)
-                                continue
-                else:
-                    if self.unrepr:
-                        comment = ''
-                        try:
-                            value = unrepr(value)
-                        except Exception as e:
-                            if isinstance(e, UnknownType):
-                                msg = 'Unknown name or type in value'
-                            else:
-                                msg = 'Parse error from unrepr-ing value'
-                            self._handle_error(msg, UnreprError, infile,
-                                cur_index)
-                            continue
-                    else:
-                        # extract comment and lists
-                        try:
-                            (value, comment) = self._handle_value(value)
-                        except SyntaxError:
-                            self._handle_error(
-                                'Parse error in value',
-                                ParseError, infile, cur_index)
-                            continue
-                #
-                key = self._unquote(key)
-                if key in this_section:
-                    self._handle_error(
-                        'Duplicate keyword name',
-                        DuplicateError, infile, cur_index)
-                    continue
-                # add the key.
-                # we set unrepr because if we have got this far we will never
-                # be creating a new section
-                this_section.__setitem__(key, value, unrepr=True)
-                this_section.inline_comments[key] = comment
-                this_section.comments[key] = comment_list
+                # it's not a section marker,
+                # so it is a ``key = value`` line
+                cur_index = self._parse_keyword(
+                    this_section, token, comment_list, handle_value, infile,
+                    cur_index, maxline)
                 continue
         #
         if self.indent_type is None:
@@ -1691,64 +3004,610 @@ class ConfigObj(Section):
             self.indent_type = ''
 
         # preserve the final comment
-        if not self and not self.initial_comment:
-            self.initial_comment = comment_list
-        elif not reset_comment:
-            self.final_comment = comment_list
+        if keep_comments:
+            if not self and not self.initial_comment:
+                self.initial_comment = comment_list
+            elif not reset_comment:
+                self.final_comment = comment_list
         self.list_values = temp_list_values
+        
+        if reset_comment:
+            node[4] = maxline + 1
+        else:
+            node[4] = maxline + 1 - len(comment_list)
+        if not self._errors:
+            self._signatures = self._section_signatures(infile, root)
 
 
-    def _match_depth(self, sect, depth):
-        """
-        Given a section and a depth level, walk back through the sections
-        parents to see if the depth level matches a previous section.
-        
-        Return a reference to the right section,
-        or raise a SyntaxError.
+    def _parse_keyword(self, this_section, token, comment_list, handle_value,
+                       infile, cur_index, maxline):
         """
-        while depth < sect.depth:
-            if sect is sect.parent:
-                # we've reached the top level already
-                raise SyntaxError()
-            sect = sect.parent
-        if sect.depth == depth:
-            return sect
-        # shouldn't get here
-        raise SyntaxError()
-
+        Add the member from a ``key = value`` token to ``this_section``.
 
-    def _handle_error(self, text, ErrorClass, infile, cur_index):
+        Returns the index of the last line of the member, which is after
+        ``cur_index`` for a multiline value.
         """
-        Handle an error according to the error settings.
-        
-        Either raise the error or store it.
-        The error will have occured at ``cur_index``
+        # value will include any inline comment
+        (indent, key, value) = token[1:]
+        if indent and (self.indent_type is None):
+            self.indent_type = indent
+        line_index = cur_index
+        # check for a multiline value
+        if value[:3] in ['"""', "'''"]:
+            try:
+                value, comment, cur_index = self._multiline(
+                    value, infile, cur_index, maxline)
+            except SyntaxError:
+                self._handle_error(
+                    'Parse error in multiline value',
+                    ParseError, infile, cur_index)
+                return cur_index
+            else:
+                if self.unrepr:
+                    comment = ''
+                    try:
+                        value = unrepr(value)
+                    except Exception as e:
+                        if type(e) == UnknownType:
+                            msg = 'Unknown name or type in value'
+                        else:
+                            msg = 'Parse error from unrepr-ing multiline value'
+                        self._handle_error(msg, UnreprError, infile,
+                            cur_index)
+                        return cur_index
+        else:
+            if self.unrepr:
+                comment = ''
+                try:
+                    value = unrepr(value)
+                except Exception as e:
+                    if isinstance(e, UnknownType):
+                        msg = 'Unknown name or type in value'
+                    else:
+                        msg = 'Parse error from unrepr-ing value'
+                    self._handle_error(msg, UnreprError, infile,
+                        cur_index)
+                    return cur_index
+            else:
+                # extract comment and lists
+                try:
+                    (value, comment) = handle_value(value)
+                except SyntaxError:
+                    self._handle_error(
+                        'Parse error in value',
+                        ParseError, infile, cur_index)
+                    return cur_index
+        #
+        key = self._unquote(key)
+        if key in this_section:
+            self._handle_error(
+                'Duplicate keyword name',
+                DuplicateError, infile, cur_index)
+            return cur_index
+        # add the key.
+        # we set unrepr because if we have got this far we will never
+        # be creating a new section
+        this_section._set_member(key, value, unrepr=True)
+        if (comment_list or comment is not None) and not self.read_only:
+            this_section._set_comments(key, comment_list, comment)
+        if self.keep_formatting and not self.read_only:
+            self._keep_source(this_section, key, infile,
+                              line_index - len(comment_list), line_index,
+                              cur_index + 1)
+        return cur_index
+
+
+    def _keep_source(self, section, key, lines, start, line, stop):
         """
-        line = infile[cur_index]
-        cur_index += 1
-        message = '{0} at line {1}.'.format(text, cur_index)
-        error = ErrorClass(message, cur_index, line)
-        if self.raise_errors:
-            # raise the error - parsing stops here
-            raise error
-        # store the error
-        # reraise when parsing has finished
-        self._errors.append(error)
+        Remember that ``key`` was parsed from ``lines[line:stop]``, after its
+        comment lines from ``start``, so that ``write`` can copy the lines
+        while it is unchanged.
+        """
+        source = section._source
+        if source is None:
+            source = section._source = {}
+        value = dict.__getitem__(section, key)
+        if isinstance(value, (str, Section)):
+            # these are only changed by setting them again
+            value = None
+        else:
+            # a copy, to notice changes made in place
+            value = deepcopy(value) if self.unrepr else list(value)
+        source[key] = (lines, start, line, stop, value)
 
 
-    def _unquote(self, value):
-        """Return an unquoted version of a value"""
-        if not value:
-            # should only happen during parsing of lists
-            raise SyntaxError
-        if (value[0] == value[-1]) and (value[0] in ('"', "'")):
-            value = value[1:-1]
-        return value
+    def _parse_lazy(self, infile):
+        """
+        Parse the top level of the config file for ``lazy=True``.
+
+        The sections are indexed by line, and are only parsed the first time
+        they are used.
+        """
+        scan = self._scan_sections(infile)
+        if scan is None or not scan[2][5]:
+            # nothing to defer, or the section markers need the errors
+            # reported by ``_parse``
+            self._parse(infile)
+            return
+        (first, last, root, indent_type) = scan
+        if self.indent_type is None:
+            self.indent_type = indent_type or ''
+        if not self.read_only:
+            self.initial_comment = infile[:first]
+            self.final_comment = infile[last + 1:]
+        self._parse_members(self, infile, first, root[4])
+        self._add_lazy_sections(self, infile, root[5])
+        if not self._errors:
+            self._signatures = self._section_signatures(infile, root)
 
 
-    def _quote(self, value, multiline=True):
+    def _scan_sections(self, infile):
         """
-        Return a safely quoted version of a value.
+        Find the section markers in ``infile``, without parsing the members.
+
+        Returns ``(first, last, root, indent_type)``, where ``first`` and
+        ``last`` are the indexes of the first and last lines that aren't
+        comments. Each section is a list
+        ``[name, inline_comment, comment_start, marker, end, children]``:
+        its comments are the lines from ``comment_start`` up to the
+        ``marker``, and its members are the lines after the marker up to
+        ``end``. The root of the tree has the comments at the start of the
+        file, and the members before the first section.
+
+        Returns ``None`` if the markers have errors.
+        """
+        match_line = self._parse_methods()[0]
+        indent_type = self.indent_type
+        root = [None, None, 0, -1, None, []]
+        # the open sections, by depth, and the names of their subsections
+        stack = [root]
+        names = [set()]
+        # the section whose members we are in
+        current = root
+        first = None
+        last = -1
+        maxline = len(infile)
+        cur_index = 0
+        while cur_index < maxline:
+            line = infile[cur_index]
+            sline = line.strip()
+            if not sline or sline.startswith('#'):
+                cur_index += 1
+                continue
+            if first is None:
+                first = cur_index
+                last = cur_index - 1
+
+            # only lines that could be section markers, multiline values or
+            # the first indented line need matching
+            token = None
+            if sline[0] == '[' or '"""' in line or "'''" in line:
+                token = match_line(line)
+            elif indent_type is None and line[0].isspace():
+                token = match_line(line)
+            if token is not None and token[1] and indent_type is None:
+                indent_type = token[1]
+
+            if token is not None and token[0] == 'section':
+                (indent, cur_depth, close_depth, sect_name, comment) = token[1:]
+                if cur_depth != close_depth or cur_depth > len(stack):
+                    return None
+                del stack[cur_depth:]
+                del names[cur_depth:]
+                sect_name = self._unquote(sect_name)
+                if sect_name in names[-1]:
+                    return None
+                names[-1].add(sect_name)
+                current[4] = last + 1
+                current = [sect_name, comment, last + 1, cur_index, None, []]
+                stack[-1][5].append(current)
+                stack.append(current)
+                names.append(set())
+            elif token is not None and token[3][:3] in ('"""', "'''"):
+                # skip to the end of a multiline value, as ``_multiline``
+                # would - a badly formed value is a single line
+                value = token[3]
+                quot = value[:3]
+                if value.find(quot, 3) == -1:
+                    end = cur_index + 1
+                    while end < maxline and infile[end].find(quot) == -1:
+                        end += 1
+                    if (end < maxline and
+                            self._triple_quote[quot][1].match(infile[end])):
+                        cur_index = end
+            last = cur_index
+            cur_index += 1
+
+        if first is None:
+            # nothing but comments
+            first = maxline
+            last = maxline - 1
+        root[3] = first - 1
+        current[4] = last + 1
+        return (first, last, root, indent_type)
+
+
+    def _section_signatures(self, infile, root):
+        """
+        Hash the lines of each section in a tree from ``_scan_sections``, for
+        ``reload(incremental=True)``.
+
+        Returns a dictionary mapping the path of each section to a hash of its
+        member lines, and a hash of all its lines including its subsections.
+        """
+        signatures = {}
+        def visit(node, path):
+            members = hash(tuple(infile[node[3] + 1:node[4]]))
+            children = tuple([visit(child, path + (child[0],))
+                              for child in node[5]])
+            lines = hash((tuple(infile[node[2]:node[3] + 1]), members,
+                          children))
+            signatures[path] = (members, lines)
+            return lines
+        visit(root, ())
+        return signatures
+
+
+    def _parse_members(self, section, infile, start, end):
+        """
+        Parse the members of ``section`` from the lines ``start`` to ``end``,
+        which hold no section markers.
+        """
+        temp_list_values = self.list_values
+        if self.unrepr:
+            self.list_values = False
+
+        match_line, handle_value = self._parse_methods()
+        comment_list = []
+        maxline = end - 1
+        cur_index = start - 1
+        reset_comment = False
+        while cur_index < maxline:
+            if reset_comment:
+                comment_list = []
+            cur_index += 1
+            line = infile[cur_index]
+            sline = line.strip()
+            if not sline or sline.startswith('#'):
+                reset_comment = False
+                comment_list.append(line)
+                continue
+
+            reset_comment = True
+            token = match_line(line)
+            if token is None:
+                self._handle_error(
+                    'Invalid line ({0!r}) (matched as neither section nor keyword)'.format(line),
+                    ParseError, infile, cur_index)
+                continue
+            cur_index = self._parse_keyword(
+                section, token, comment_list, handle_value, infile,
+                cur_index, maxline)
+        self.list_values = temp_list_values
+
+
+    def _add_lazy_sections(self, section, infile, children):
+        """Add the sections found by ``_scan_sections`` to ``section``."""
+        for child in children:
+            (sect_name, comment, comment_start, marker) = child[:4]
+            if sect_name in section:
+                # clashes with a member
+                self._handle_error('Duplicate section name',
+                                   DuplicateError, infile, marker)
+                continue
+            section._set_member(sect_name,
+                                LazySection(section, section.depth + 1, self,
+                                            infile, child))
+            if not self.read_only:
+                section._set_comments(sect_name, infile[comment_start:marker],
+                                      comment)
+                if self.keep_formatting:
+                    self._keep_source(section, sect_name, infile,
+                                      comment_start, marker, marker + 1)
+
+
+    def _parse_section(self, section, infile, node):
+        """Parse the members of a ``LazySection``."""
+        self._errors = []
+        self._parse_members(section, infile, node[3] + 1, node[4])
+        self._add_lazy_sections(section, infile, node[5])
+        self._raise_errors()
+
+
+    def _iter_lines(self, infile):
+        """
+        Yield ``(index, line)`` for each line of ``infile``, decoding the lines
+        one at a time.
+
+        ``infile`` is handled like the ``infile`` argument of ``ConfigObj``,
+        except that dictionaries aren't accepted.
+        """
+        if isinstance(infile, str):
+            if not os.path.isfile(infile):
+                if self.file_error:
+                    raise IOError('Config file not found: "%s".' % infile)
+                return
+            with open(infile, 'rb') as h:
+                for entry in enumerate(self._decode_lines(h, False)):
+                    yield entry
+        elif isinstance(infile, (list, tuple)):
+            for entry in enumerate(self._decode_lines(infile, False)):
+                yield entry
+        elif getattr(infile, 'read', MISSING) is not MISSING:
+            # the lines of a file like object are split again after decoding,
+            # as ``_load`` does with the content it reads
+            for entry in enumerate(self._decode_lines(infile, True)):
+                yield entry
+        else:
+            raise TypeError('infile must be a filename, file like object, or list of lines.')
+
+
+    def _decode_lines(self, chunks, split):
+        """
+        Decode an iterable of lines, handling any BOM on the first one.
+
+        If ``split`` is set then each chunk may hold several lines.
+        """
+        decoded = None
+        for chunk in chunks:
+            if decoded is None:
+                decoded = self._handle_bom([chunk])
+            else:
+                decoded = self._decode([chunk], self.encoding or 'utf-8')
+            if split:
+                decoded = decoded[0].splitlines(True)
+            for line in decoded:
+                yield line.rstrip('\r\n')
+
+
+    def _iterparse(self, infile):
+        """Generate the events for ``iterparse``."""
+        if self.unrepr:
+            self.list_values = False
+        match_line, handle_value = self._parse_methods()
+        lines = self._iter_lines(infile)
+        # lines to parse again, after a bad multiline value
+        replay = []
+        path = ()
+        cur_index = -1
+
+        def next_line():
+            if replay:
+                return replay.pop()
+            return next(lines, None)
+
+        while True:
+            entry = next_line()
+            if entry is None:
+                break
+            cur_index, line = entry
+            sline = line.strip()
+            if not sline or sline.startswith('#'):
+                yield ('comment', cur_index + 1, path, line)
+                continue
+
+            error = None
+            token = match_line(line)
+            if token is None:
+                error = self._make_error(
+                    'Invalid line ({0!r}) (matched as neither section nor keyword)'.format(line),
+                    ParseError, line, cur_index)
+            elif token[0] == 'section':
+                (indent, cur_depth, close_depth, sect_name, comment) = token[1:]
+                if cur_depth != close_depth:
+                    error = self._make_error("Cannot compute the section depth",
+                                             NestingError, line, cur_index)
+                elif cur_depth > len(path) + 1:
+                    error = self._make_error("Section too nested",
+                                             NestingError, line, cur_index)
+                else:
+                    # close the sections we are dropping back from
+                    while len(path) >= cur_depth:
+                        yield ('end_section', cur_index + 1, path, None)
+                        path = path[:-1]
+                    path += (self._unquote(sect_name),)
+                    yield ('start_section', cur_index + 1, path, comment)
+            else:
+                (indent, key, value) = token[1:]
+                start_index = cur_index
+                if value[:3] in ['"""', "'''"]:
+                    quot = value[:3]
+                    block = [(cur_index, line)]
+                    if value.find(quot, 3) == -1:
+                        # collect the lines up to the closing quotes
+                        entry = next_line()
+                        while entry is not None:
+                            block.append(entry)
+                            if entry[1].find(quot) != -1:
+                                break
+                            entry = next_line()
+                    try:
+                        value, comment, end = self._multiline(
+                            value, [entry[1] for entry in block], 0,
+                            len(block) - 1)
+                    except SyntaxError:
+                        error = self._make_error(
+                            'Parse error in multiline value',
+                            ParseError, line, cur_index)
+                        # parsing carries on from the next line
+                        replay.extend(reversed(block[1:]))
+                    else:
+                        cur_index, line = block[end]
+                        if self.unrepr:
+                            comment = ''
+                            try:
+                                value = unrepr(value)
+                            except Exception as e:
+                                if type(e) == UnknownType:
+                                    msg = 'Unknown name or type in value'
+                                else:
+                                    msg = 'Parse error from unrepr-ing multiline value'
+                                error = self._make_error(msg, UnreprError,
+                                                         line, cur_index)
+                elif self.unrepr:
+                    comment = ''
+                    try:
+                        value = unrepr(value)
+                    except Exception as e:
+                        if isinstance(e, UnknownType):
+                            msg = 'Unknown name or type in value'
+                        else:
+                            msg = 'Parse error from unrepr-ing value'
+                        error = self._make_error(msg, UnreprError, line,
+                                                 cur_index)
+                else:
+                    # extract comment and lists
+                    try:
+                        (value, comment) = handle_value(value)
+                    except SyntaxError:
+                        error = self._make_error('Parse error in value',
+                                                 ParseError, line, cur_index)
+                if error is None:
+                    yield ('keyvalue', start_index + 1, path,
+                           (self._unquote(key), value, comment))
+            if error is not None:
+                if self.raise_errors:
+                    raise error
+                yield ('error', error.line_number, path, error)
+
+        # close any sections still open at the end of the file
+        while path:
+            yield ('end_section', cur_index + 1, path, None)
+            path = path[:-1]
+
+
+    def _parse_methods(self):
+        """
+        Return the functions used by ``_parse`` to split lines and values,
+        for the ``parser_backend`` in use.
+        """
+        if self.parser_backend == 'regex':
+            return self._match_line, self._handle_value
+        if self.parser_backend == 'lexer' or _speedups is None:
+            return self._lex_line, self._lex_value
+        lex_line = _speedups.lex_line
+        lex_value = _speedups.lex_value
+        match_line = self._match_line
+        handle_value = self._handle_value
+        list_values = self.list_values
+        
+        def speedups_line(line):
+            return lex_line(line, match_line)
+        
+        def speedups_value(value):
+            return lex_value(value, list_values, handle_value)
+        
+        if self._inspec:
+            return speedups_line, handle_value
+        return speedups_line, speedups_value
+
+
+    def _match_line(self, line):
+        """
+        Match a line as a section marker or a ``key = value`` line.
+        
+        Returns a token as described in ``_lex_line``, or ``None`` if the line
+        is neither.
+        """
+        mat = self._sectionmarker.match(line)
+        if mat is not None:
+            (indent, sect_open, sect_name, sect_close, comment) = mat.groups()
+            return ('section', indent, sect_open.count('['),
+                    sect_close.count(']'), sect_name, comment)
+        mat = self._keyword.match(line)
+        if mat is not None:
+            return ('keyword',) + mat.groups()
+        return None
+
+
+    def _match_depth(self, sect, depth):
+        """
+        Given a section and a depth level, walk back through the sections
+        parents to see if the depth level matches a previous section.
+        
+        Return a reference to the right section,
+        or raise a SyntaxError.
+        """
+        while depth < sect.depth:
+            if sect is sect.parent:
+                # we've reached the top level already
+                raise SyntaxError()
+            sect = sect.parent
+        if sect.depth == depth:
+            return sect
+        # shouldn't get here
+        raise SyntaxError()
+
+
+    def _handle_error(self, text, ErrorClass, infile, cur_index):
+        """
+        Handle an error according to the error settings.
+        
+        Either raise the error or store it.
+        The error will have occured at ``cur_index``
+        """
+        error = self._make_error(text, ErrorClass, infile[cur_index], cur_index)
+        if self.raise_errors:
+            # raise the error - parsing stops here
+            raise error
+        # store the error
+        # reraise when parsing has finished
+        self._errors.append(error)
+
+
+    def _make_error(self, text, ErrorClass, line, cur_index):
+        """Create the error for ``line``, found at ``cur_index``."""
+        cur_index += 1
+        message = '{0} at line {1}.'.format(text, cur_index)
+        return ErrorClass(message, cur_index, line)
+
+
+    def _unquote(self, value):
+        """Return an unquoted version of a value"""
+        if not value:
+            # should only happen during parsing of lists
+            raise SyntaxError
+        if (value[0] == value[-1]) and (value[0] in ('"', "'")):
+            value = value[1:-1]
+        return value
+
+
+    def _quote(self, value, multiline=True, memo=None):
+        """
+        Return a safely quoted version of a value, as ``_quote_value`` does.
+        
+        Strings that can be written as they are are found with one regex
+        match. While writing, ``memo`` holds a dictionary of the results
+        for strings for each value of ``multiline``, so repeated values are
+        only looked at once.
+        """
+        if value.__class__ is str and value:
+            quoted_strings = None
+            if memo is not None:
+                quoted_strings = memo[multiline]
+                quoted = quoted_strings.get(value)
+                if quoted is not None:
+                    return quoted
+            if self.list_values:
+                if (_unquoted.match(value) is not None and
+                        not (multiline and "'" in value and '"' in value)):
+                    quoted = value
+                else:
+                    quoted = self._quote_value(value, multiline, memo)
+            elif '\n' not in value and '#' not in value:
+                quoted = value
+            else:
+                quoted = self._quote_value(value, multiline, memo)
+            if (quoted_strings is not None and
+                    len(quoted_strings) < _QUOTE_MEMO_SIZE):
+                quoted_strings[value] = quoted
+            return quoted
+        return self._quote_value(value, multiline, memo)
+
+
+    def _quote_value(self, value, multiline=True, memo=None):
+        """
+        Return a safely quoted version of a value.
         
         Raise a ConfigObjError if the value cannot be safely quoted.
         If multiline is ``True`` (default) then use triple quotes
@@ -1774,8 +3633,8 @@ class ConfigObj(Section):
             if not value:
                 return ','
             elif len(value) == 1:
-                return self._quote(value[0], multiline=False) + ','
-            return ', '.join([self._quote(val, multiline=False)
+                return self._quote(value[0], False, memo) + ','
+            return ', '.join([self._quote(val, False, memo)
                 for val in value])
         if not isinstance(value, str):
             if self.stringify:
@@ -1886,6 +3745,262 @@ class ConfigObj(Section):
         return (the_list, comment)
 
 
+    def _lex_line(self, line):
+        """
+        Split a line into a token, scanning it once from left to right.
+        
+        This is the ``parser='lexer'`` equivalent of ``_match_line``, and
+        gives exactly the same results as the regexes - including the odd
+        corners where they backtrack. It returns one of :
+        
+        * ``('section', indent, open_depth, close_depth, name, comment)``
+        * ``('keyword', indent, key, value)``
+        * ``None`` if the line is neither
+        
+        ``line`` must not be blank or a comment.
+        """
+        if '\n' in line:
+            # only possible in a list of lines passed in by the user,
+            # the regexes treat the newline specially so leave it to them
+            return self._match_line(line)
+        stripped = line.lstrip()
+        start = len(line) - len(stripped)
+        if stripped[0] == '[':
+            token = self._lex_section(line, start)
+            if token is not None:
+                return token
+        return self._lex_keyword(line, start)
+
+
+    def _lex_section(self, line, start):
+        """Lex a section marker, where ``line[start]`` is the first ``[``."""
+        n = len(line)
+        name_starts = []
+        pos = start
+        while pos < n and line[pos] == '[':
+            pos += 1
+            while pos < n and line[pos].isspace():
+                pos += 1
+            name_starts.append(pos)
+        # like the regex try the deepest opening marker first, if that fails
+        # the remaining brackets become part of the section name
+        for depth in range(len(name_starts), 0, -1):
+            name_start = name_starts[depth - 1]
+            if name_start == n:
+                continue
+            quote = line[name_start]
+            if quote in ('"', "'"):
+                # the quotes must hold at least one non-space character
+                pos = name_start + 1
+                while pos < n and line[pos].isspace():
+                    pos += 1
+                name_end = line.find(quote, pos + 1)
+                while name_end != -1:
+                    name_end += 1
+                    close_depth, end = self._lex_section_close(line, name_end)
+                    if close_depth and (end == n or line[end] == '#'):
+                        return ('section', line[:start], depth, close_depth,
+                                line[name_start:name_end], line[end:] or None)
+                    name_end = line.find(quote, name_end)
+            else:
+                # unquoted names stop at the first ``]`` that only has
+                # brackets, whitespace and a comment after it
+                close = line.find(']', name_start + 1)
+                while close != -1:
+                    close_depth, end = self._lex_section_close(line, close)
+                    if end == n or line[end] == '#':
+                        name_end = close
+                        while (name_end > name_start + 1 and
+                                line[name_end - 1].isspace()):
+                            name_end -= 1
+                        return ('section', line[:start], depth, close_depth,
+                                line[name_start:name_end], line[end:] or None)
+                    close = line.find(']', end)
+        return None
+
+
+    def _lex_section_close(self, line, pos):
+        """
+        Scan the closing brackets of a section marker from ``pos``.
+        
+        Returns the number of ``]`` found and the index of the first character
+        that is neither a bracket nor whitespace.
+        """
+        n = len(line)
+        depth = 0
+        while pos < n:
+            char = line[pos]
+            if char == ']':
+                depth += 1
+            elif not char.isspace():
+                break
+            pos += 1
+        return depth, pos
+
+
+    def _lex_keyword(self, line, start):
+        """Lex a ``key = value`` line, where ``line[start]`` starts the key."""
+        n = len(line)
+        quote = line[start]
+        if quote in ('"', "'"):
+            key_end = line.find(quote, start + 1)
+            while key_end != -1:
+                key_end += 1
+                pos = key_end
+                while pos < n and line[pos].isspace():
+                    pos += 1
+                if pos < n and line[pos] == '=':
+                    return ('keyword', line[:start], line[start:key_end],
+                            line[pos + 1:].lstrip())
+                key_end = line.find(quote, key_end)
+        elif quote != '=':
+            equals = line.find('=', start + 1)
+            if equals == -1:
+                return None
+            return ('keyword', line[:start], line[start:equals].rstrip(),
+                    line[equals + 1:].lstrip())
+        if not start:
+            return None
+        # the regex gives back one character of indentation, which then
+        # starts an unquoted key
+        equals = line.find('=', start)
+        if equals == -1:
+            return None
+        return ('keyword', line[:start - 1],
+                line[start - 1] + line[start:equals].rstrip(),
+                line[equals + 1:].lstrip())
+
+
+    def _lex_value(self, value):
+        """
+        The ``parser='lexer'`` equivalent of ``_handle_value``.
+        
+        Values are split in a single scan. Badly formed values, where the
+        regexes would have to backtrack, are handed over to ``_handle_value``
+        so both always return the same result or raise the same error.
+        """
+        if self._inspec:
+            # Parsing a configspec so don't handle comments
+            return (value, '')
+        if '\n' in value:
+            return self._handle_value(value)
+        if not value or value[0] == '#':
+            # an empty value
+            return ('', value or None)
+        if value[0] not in ('"', "'", ',') and ',' not in value:
+            # the common case, an unquoted single value
+            comment_start = value.find('#')
+            if comment_start == -1:
+                return (value.rstrip(), None)
+            return (value[:comment_start].rstrip(), value[comment_start:])
+        if not self.list_values:
+            # NOTE: we don't unquote here
+            if value[0] in ('"', "'"):
+                found = self._lex_quoted(value, 0)
+                if found is None:
+                    return self._handle_value(value)
+                return (value[:found[0]], found[1])
+            comment_start = value.find('#', 1)
+            if comment_start == -1:
+                return (value.rstrip(), None)
+            return (value[:comment_start].rstrip(), value[comment_start:])
+        if value[0] == ',':
+            # the single comma - meaning an empty list
+            comment = value[1:].lstrip()
+            if comment and comment[0] != '#':
+                return self._handle_value(value)
+            return ([], comment or None)
+        #
+        n = len(value)
+        the_list = []
+        pos = 0
+        while True:
+            if pos == n:
+                # a trailing comma with no whitespace after it doesn't
+                # leave an empty last member
+                single = None if value[pos - 1] == ',' else ''
+                comment = None
+                break
+            char = value[pos]
+            if char in ('"', "'"):
+                # a list member if a comma follows the closing quote
+                end = value.find(char, pos + 1)
+                while end != -1:
+                    end += 1
+                    comma = end
+                    while comma < n and value[comma].isspace():
+                        comma += 1
+                    if comma < n and value[comma] == ',':
+                        break
+                    end = value.find(char, end)
+                if end != -1:
+                    the_list.append(value[pos:end])
+                    pos = comma + 1
+                    while pos < n and value[pos].isspace():
+                        pos += 1
+                    continue
+                # otherwise the last value
+                found = self._lex_quoted(value, pos)
+                if found is None:
+                    return self._handle_value(value)
+                single = value[pos:found[0]]
+                comment = found[1]
+                break
+            if char == '#':
+                single = None if value[pos - 1] == ',' else ''
+                comment = value[pos:]
+                break
+            if char == ',':
+                # an empty list member
+                return self._handle_value(value)
+            comma = value.find(',', pos + 1)
+            if comma != -1 and value.find('#', pos + 1, comma) == -1:
+                the_list.append(value[pos:comma].rstrip())
+                pos = comma + 1
+                while pos < n and value[pos].isspace():
+                    pos += 1
+                continue
+            comment_start = value.find('#', pos + 1)
+            if comment_start == -1:
+                single = value[pos:].rstrip()
+                comment = None
+            else:
+                single = value[pos:comment_start].rstrip()
+                comment = value[comment_start:]
+            break
+        if single is not None:
+            if the_list and not single:
+                single = None
+            else:
+                single = self._unquote(single or '""')
+        if not the_list:
+            # not a list value
+            return (single, comment)
+        the_list = [self._unquote(val) for val in the_list]
+        if single is not None:
+            the_list.append(single)
+        return (the_list, comment)
+
+
+    def _lex_quoted(self, value, pos):
+        """
+        Find the end of a quoted value starting at ``value[pos]``, that may
+        only be followed by a comment.
+        
+        Returns a tuple of the index after the closing quote and the comment,
+        or ``None``.
+        """
+        quote = value[pos]
+        end = value.find(quote, pos + 1)
+        while end != -1:
+            end += 1
+            comment = value[end:].lstrip()
+            if not comment or comment[0] == '#':
+                return end, comment or None
+            end = value.find(quote, end)
+        return None
+
+
     def _multiline(self, value, infile, cur_index, maxline):
         """Extract the value, where we are in a multiline situation."""
         quot = value[:3]
@@ -1923,22 +4038,7 @@ class ConfigObj(Section):
 
     def _handle_configspec(self, configspec):
         """Parse the configspec."""
-        # FIXME: Should we check that the configspec was created with the 
-        #        correct settings ? (i.e. ``list_values=False``)
-        if not isinstance(configspec, ConfigObj):
-            try:
-                configspec = ConfigObj(configspec,
-                                       raise_errors=True,
-                                       file_error=True,
-                                       _inspec=True)
-            except ConfigObjError as e:
-                # FIXME: Should these errors have a reference
-                #        to the already parsed ConfigObj ?
-                raise ConfigspecError('Parsing configspec failed: %s' % e)
-            except IOError as e:
-                raise IOError('Reading configspec failed: %s' % e)
-        
-        self.configspec = configspec
+        self.configspec = _parse_configspec(configspec)
             
 
         
@@ -1962,33 +4062,34 @@ class ConfigObj(Section):
                 section[entry]._created = True
                 if copy:
                     # copy comments
-                    section.comments[entry] = configspec.comments.get(entry, [])
-                    section.inline_comments[entry] = configspec.inline_comments.get(entry, '')
+                    section._set_comments(entry,
+                                          *configspec._get_comments(entry))
                 
             # Could be a scalar when we expect a section
             if isinstance(section[entry], Section):
                 section[entry].configspec = configspec[entry]
                         
 
-    def _write_line(self, indent_string, entry, this_entry, comment):
+    def _write_line(self, indent_string, entry, this_entry, comment,
+                    memo=None):
         """Write an individual line, for the write method"""
         # NOTE: the calls to self._quote here handles non-StringType values.
         if not self.unrepr:
-            val = self._decode_element(self._quote(this_entry))
+            val = self._decode_element(self._quote(this_entry, memo=memo))
         else:
             val = repr(this_entry)
         return '%s%s%s%s%s' % (indent_string,
-                               self._decode_element(self._quote(entry, multiline=False)),
+                               self._decode_element(self._quote(entry, False, memo)),
                                self._a_to_u(' = '),
                                val,
                                self._decode_element(comment))
 
 
-    def _write_marker(self, indent_string, depth, entry, comment):
+    def _write_marker(self, indent_string, depth, entry, comment, memo=None):
         """Write a section marker line"""
         return '%s%s%s%s%s' % (indent_string,
                                self._a_to_u('[' * depth),
-                               self._quote(self._decode_element(entry), multiline=False),
+                               self._quote(self._decode_element(entry), False, memo),
                                self._a_to_u(']' * depth),
                                self._decode_element(comment))
 
@@ -2005,10 +4106,21 @@ class ConfigObj(Section):
 
     # Public methods
 
-    def write(self, outfile=None, section=None):
+    def write(self, outfile=None, section=None, stream=False, atomic=False,
+              fsync=False):
         """
         Write the current ConfigObj as a file
         
+        With ``stream`` the output is written a chunk at a time, as
+        ``write_iter`` produces it, rather than all at once.
+        
+        With ``atomic`` the file is written under a temporary name in the
+        same directory and then moved over ``filename``, so that readers
+        see either the old file or the new one, never part of it. With
+        ``fsync`` too the data is flushed to disk before the move. Both
+        only apply to writing ``filename``, so ``ValueError`` is raised if
+        there isn't one, or if ``outfile`` or ``section`` is given.
+        
         tekNico: FIXME: use StringIO instead of real files
         
         >>> filename = a.filename
@@ -2020,104 +4132,278 @@ class ConfigObj(Section):
         >>> import os
         >>> os.remove('test.ini')
         """
+        if self.read_only:
+            raise ReadOnlyError()
+        if atomic or fsync:
+            if outfile is not None:
+                raise ValueError('An atomic or fsynced write needs a '
+                                 'filename, not a file object.')
+            if (self.filename is None or
+                    (section is not None and section is not self)):
+                raise ValueError('An atomic or fsynced write needs a '
+                                 'filename.')
         if self.indent_type is None:
             # this can be true if initialised from a dictionary
             self.indent_type = DEFAULT_INDENT_TYPE
             
-        out = []
+        if section is not None and section is not self:
+            return list(self._write_lines(section))
+        
+        if (self.filename is None) and (outfile is None):
+            # output a list of lines
+            # might need to encode
+            # NOTE: This will *screw* UTF16, each line will start with the BOM
+            out = list(self._write_lines(self))
+            if self.encoding:
+                out = [l.encode(self.encoding) for l in out]
+            if (self.BOM and ((self.encoding is None) or
+                (BOM_LIST.get(self.encoding.lower()) == 'utf_8'))):
+                # Add the UTF8 BOM
+                if not out:
+                    out.append('')
+                out[0] = BOM_UTF8 + out[0]
+            return out
+        
+        newline = self.newlines or os.linesep
+        if (getattr(outfile, 'mode', None) is not None and outfile.mode == 'w'
+            and sys.platform == 'win32' and newline == '\r\n'):
+            # Windows specific hack to avoid writing '\r\r\n'
+            newline = '\n'
+        chunks = self._write_chunks(newline)
+        if not stream:
+            chunks = [b''.join(chunks)]
+
+        if outfile is not None:
+            for chunk in chunks:
+                outfile.write(chunk)
+        elif atomic:
+            self._write_atomic(chunks, fsync)
+        else:
+            with open(self.filename, 'wb') as h:
+                for chunk in chunks:
+                    h.write(chunk)
+                if fsync:
+                    h.flush()
+                    os.fsync(h.fileno())
+
+
+    def _write_atomic(self, chunks, fsync):
+        """
+        Write ``chunks`` to a new file next to ``filename``, with the same
+        permissions, and move it over ``filename``.
+        """
+        # write through a symlink rather than replacing it
+        filename = os.path.realpath(self.filename)
+        try:
+            target = os.stat(filename)
+        except FileNotFoundError:
+            target = None
+        while True:
+            temp_file = '%s.%s.tmp' % (filename, os.urandom(4).hex())
+            try:
+                # a new file gets the same permissions as ``open`` gives it
+                fd = os.open(temp_file,
+                             os.O_WRONLY | os.O_CREAT | os.O_EXCL |
+                             getattr(os, 'O_BINARY', 0), 0o666)
+            except FileExistsError:
+                continue
+            break
+        try:
+            with os.fdopen(fd, 'wb') as h:
+                for chunk in chunks:
+                    h.write(chunk)
+                if fsync:
+                    h.flush()
+                    os.fsync(h.fileno())
+            if target is not None:
+                os.chmod(temp_file, S_IMODE(target.st_mode))
+                if hasattr(os, 'chown'):
+                    try:
+                        os.chown(temp_file, target.st_uid, target.st_gid)
+                    except OSError:
+                        # only allowed to give it our own owner
+                        pass
+            os.replace(temp_file, filename)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+        if fsync:
+            _fsync_directory(os.path.dirname(filename))
+
+
+    def write_iter(self, newline=None):
+        """
+        Return an iterator over the encoded output of ``write``, in chunks
+        of about ``WRITE_CHUNK_SIZE`` characters (a longer line is a chunk
+        of its own), so a large config can be written without holding all
+        of it in memory.
+        
+        ``newline`` defaults to the ``newlines`` attribute, or ``os.linesep``.
+        """
+        if self.read_only:
+            raise ReadOnlyError()
+        if self.indent_type is None:
+            self.indent_type = DEFAULT_INDENT_TYPE
+        return self._write_chunks(newline or self.newlines or os.linesep)
+
+
+    def _write_chunks(self, newline):
+        """Encode the lines from ``_write_lines``, and join them into chunks."""
+        encoding = self.encoding or self.default_encoding or 'ascii'
+        # an incremental encoder only writes a UTF16 BOM at the start
+        encode = getincrementalencoder(encoding)().encode
+        newline = self._a_to_u(newline)
+        chunk = []
+        size = 0
+        if self.BOM and ((self.encoding is None) or match_utf8(self.encoding)):
+            # Add the UTF8 BOM
+            chunk.append(BOM_UTF8)
+        # the end of the output so far
+        tail = ''
+        for index, line in enumerate(self._write_lines(self)):
+            if index:
+                chunk.append(encode(newline))
+                tail += newline
+            chunk.append(encode(line))
+            tail = (tail + line)[-len(newline):]
+            size += len(line)
+            if size >= WRITE_CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        if not tail.endswith(newline):
+            # the output always ends with a newline
+            chunk.append(encode(newline))
+        chunk.append(encode('', True))
+        yield b''.join(chunk)
+
+
+    def _write_lines(self, section):
+        """
+        Yield the lines of ``section``, and of the comments around it if it
+        is the ConfigObj.
+        """
         cs = self._a_to_u('#')
         csp = self._a_to_u('# ')
-        if section is None:
-            int_val = self.interpolation
-            self.interpolation = False
-            section = self
+        if section is self:
+            # the strings quoted in this write, by ``multiline``
+            memo = ({}, {})
             for line in self.initial_comment:
                 line = self._decode_element(line)
                 stripped_line = line.strip()
                 if stripped_line and not stripped_line.startswith(cs):
                     line = csp + line
-                out.append(line)
-                
+                yield line
+            # the values are written without interpolation
+            for line in self._write_members(section, cs, csp, memo, True):
+                yield line
+            for line in self.final_comment:
+                line = self._decode_element(line)
+                stripped_line = line.strip()
+                if stripped_line and not stripped_line.startswith(cs):
+                    line = csp + line
+                yield line
+        else:
+            for line in self._write_members(section, cs, csp):
+                yield line
+
+
+    def _raw_item(self, section, key):
+        """
+        Return ``section[key]`` without interpolation.
+
+        Interpolation is only turned off for the lookup, so it isn't left
+        off while a ``write_iter`` is suspended.
+        """
+        interpolation = self.interpolation
+        self.interpolation = False
+        try:
+            return section[key]
+        finally:
+            self.interpolation = interpolation
+
+
+    def _write_members(self, section, cs, csp, memo=None, raw=False):
+        """
+        Yield the lines of the members of ``section``, and its subsections.
+
+        ``memo`` is passed on to ``_quote``. If ``raw`` is set the values
+        aren't interpolated.
+        """
+        if self.keep_formatting and type(section) is LazySection:
+            # never parsed, so nothing in it has changed
+            (infile, node) = section._lazy
+            for line in infile[node[3] + 1:_section_end(node)]:
+                yield line
+            return
         indent_string = self.indent_type * section.depth
+        defaults = section._defaults or ()
+        source = section._source
         for entry in (section.scalars + section.sections):
-            if entry in section.defaults:
+            if entry in defaults:
                 # don't write out default values
                 continue
-            for comment_line in section.comments[entry]:
+            if source is not None:
+                lines = self._source_lines(section, entry, source.get(entry))
+                if lines is not None:
+                    for line in lines:
+                        yield line
+                    this_entry = dict.__getitem__(section, entry)
+                    if isinstance(this_entry, Section):
+                        for line in self._write_members(this_entry, cs, csp,
+                                                        memo, raw):
+                            yield line
+                    continue
+            (comment_list, comment) = section._get_comments(entry)
+            for comment_line in comment_list:
                 comment_line = self._decode_element(comment_line.lstrip())
                 if comment_line and not comment_line.startswith(cs):
                     comment_line = csp + comment_line
-                out.append(indent_string + comment_line)
-            this_entry = section[entry]
-            comment = self._handle_comment(section.inline_comments[entry])
+                yield indent_string + comment_line
+            if raw:
+                this_entry = self._raw_item(section, entry)
+            else:
+                this_entry = section[entry]
+            comment = self._handle_comment(comment)
             
             if isinstance(this_entry, Section):
                 # a section
-                out.append(self._write_marker(
+                yield self._write_marker(
                     indent_string,
                     this_entry.depth,
                     entry,
-                    comment))
-                out.extend(self.write(section=this_entry))
+                    comment,
+                    memo)
+                for line in self._write_members(this_entry, cs, csp, memo,
+                                                raw):
+                    yield line
             else:
-                out.append(self._write_line(
+                yield self._write_line(
                     indent_string,
                     entry,
                     this_entry,
-                    comment))
-                
-        if section is self:
-            for line in self.final_comment:
-                line = self._decode_element(line)
-                stripped_line = line.strip()
-                if stripped_line and not stripped_line.startswith(cs):
-                    line = csp + line
-                out.append(line)
-            self.interpolation = int_val
-            
-        if section is not self:
-            return out
-        
-        if (self.filename is None) and (outfile is None):
-            # output a list of lines
-            # might need to encode
-            # NOTE: This will *screw* UTF16, each line will start with the BOM
-            if self.encoding:
-                out = [l.encode(self.encoding) for l in out]
-            if (self.BOM and ((self.encoding is None) or
-                (BOM_LIST.get(self.encoding.lower()) == 'utf_8'))):
-                # Add the UTF8 BOM
-                if not out:
-                    out.append('')
-                out[0] = BOM_UTF8 + out[0]
-            return out
-        
-        # Turn the list to a string, joined with correct newlines
-        newline = self.newlines or os.linesep
-        if (getattr(outfile, 'mode', None) is not None and outfile.mode == 'w'
-            and sys.platform == 'win32' and newline == '\r\n'):
-            # Windows specific hack to avoid writing '\r\r\n'
-            newline = '\n'
-        output = self._a_to_u(newline).join(out)
-        if not output.endswith(newline):
-            output += newline
+                    comment,
+                    memo)
 
-        if isinstance(output, bytes):
-            output_bytes = output
-        else:
-            output_bytes = output.encode(self.encoding or
-                                         self.default_encoding or
-                                         'ascii')
 
-        if self.BOM and ((self.encoding is None) or match_utf8(self.encoding)):
-            # Add the UTF8 BOM
-            output_bytes = BOM_UTF8 + output_bytes
+    def _source_lines(self, section, key, span):
+        """
+        The lines ``key`` was parsed from, as ``_keep_source`` recorded them
+        in ``span``, or ``None`` if it has changed since.
+        """
+        if span is None:
+            return None
+        (lines, start, line, stop, value) = span
+        if value is not None and dict.__getitem__(section, key) != value:
+            return None
+        comment_list = section._get_comments(key)[0]
+        if (comment_list or start != line) and comment_list != lines[start:line]:
+            return None
+        return lines[start:stop]
 
-        if outfile is not None:
-            outfile.write(output_bytes)
-        else:
-            with open(self.filename, 'wb') as h:
-                h.write(output_bytes)
 
     def validate(self, validator, preserve_errors=False, copy=False,
                  section=None):
@@ -2244,10 +4530,8 @@ class ConfigObj(Section):
                 val = None
                 if copy and entry not in section.scalars:
                     # copy comments
-                    section.comments[entry] = (
-                        configspec.comments.get(entry, []))
-                    section.inline_comments[entry] = (
-                        configspec.inline_comments.get(entry, ''))
+                    section._set_comments(entry,
+                                          *configspec._get_comments(entry))
                 #
             else:
                 missing = False
@@ -2296,8 +4580,7 @@ class ConfigObj(Section):
                 unvalidated.append(entry)
                 continue
             if copy:
-                section.comments[entry] = configspec.comments.get(entry, [])
-                section.inline_comments[entry] = configspec.inline_comments.get(entry, '')
+                section._set_comments(entry, *configspec._get_comments(entry))
             check = self.validate(validator, preserve_errors=preserve_errors, copy=copy, section=section[entry])
             out[entry] = check
             if check == False:
@@ -2326,6 +4609,36 @@ class ConfigObj(Section):
         return out
 
 
+    def derive(self):
+        """
+        Return a copy-on-write copy of the ConfigObj, with the same options,
+        to change without changing this one.
+        
+        The sections are copied by ``OverlaySection`` when they are first
+        changed, so overriding a few values only copies the sections that
+        hold them. The copy has no ``filename``, so that writing it doesn't
+        overwrite this config's file.
+        """
+        options = {}
+        for entry in OPTION_DEFAULTS:
+            if entry != 'configspec':
+                options[entry] = getattr(self, entry)
+        derived = ConfigObj.__new__(type(self))
+        ConfigObj.__init__(derived, _inspec=self._inspec, **options)
+        derived._original_configspec = self._original_configspec
+        derived.BOM = self.BOM
+        derived.newlines = self.newlines
+        derived.initial_comment = list(self.initial_comment)
+        derived.final_comment = list(self.final_comment)
+        derived._copy_members(self)
+        return derived
+
+
+    def overlay(self):
+        """Return a copy-on-write copy of the ConfigObj, see ``derive``."""
+        return self.derive()
+
+
     def reset(self):
         """Clear ConfigObj instance and restore to 'freshly created' state."""
         self.clear()
@@ -2337,12 +4650,23 @@ class ConfigObj(Section):
         self._original_configspec = None
         
         
-    def reload(self):
+    def reload(self, incremental=False):
         """
         Reload a ConfigObj from file.
         
         This method raises a ``ReloadError`` if the ConfigObj doesn't have
         a filename attribute pointing to a file.
+        
+        With ``incremental=True`` only the sections whose lines have changed
+        are parsed again, and they are updated in place, so references to
+        sections stay valid. Values filled in from defaults by ``validate``
+        are kept, and the sections that haven't changed in the file are left
+        as they are. If the file has errors the ConfigObj isn't changed.
+        
+        Returns a set of ``(path, key)`` for each value or section that was
+        added, removed or changed, where ``path`` is the tuple of section
+        names leading to the key. The values in an added or removed section
+        are included.
         """
         if not isinstance(self.filename, str):
             raise ReloadError()
@@ -2353,6 +4677,9 @@ class ConfigObj(Section):
             if entry == 'configspec':
                 continue
             current_options[entry] = getattr(self, entry)
+        
+        if incremental:
+            return self._reload_incremental(filename, current_options)
             
         configspec = self._original_configspec
         current_options['configspec'] = configspec
@@ -2360,7 +4687,566 @@ class ConfigObj(Section):
         self.clear()
         self._initialise(current_options)
         self._load(filename, configspec)
+
+
+    def _reload_incremental(self, filename, options):
+        """Update the sections that have changed in the file, for ``reload``."""
+        state = (self.BOM, self.newlines, self.encoding)
+        self.BOM = False
+        self.newlines = None
+        self._errors = []
+        try:
+            if os.path.isfile(filename):
+                content = self._read_file(filename)
+            elif self.file_error:
+                raise IOError('Config file not found: "%s".' % filename)
+            else:
+                content = []
+            scan = self._scan_sections(content)
+            if scan is None:
+                # the section markers have errors, which ``_parse`` reports
+                options.update(lazy=False, cache=False)
+                new = ConfigObj(content, **options)
+                # ``_parse`` accepts them, so update everything from the
+                # copy it parsed
+                changed = set()
+                self._merge_reload(self, new, (), changed)
+                if not self.read_only:
+                    self.initial_comment = new.initial_comment
+                    self.final_comment = new.final_comment
+                # the next reload compares every section
+                self._signatures = {}
+                return changed
+            (first, last, root, indent_type) = scan
+            signatures = self._section_signatures(content, root)
+            # the members parsed again, by path
+            parsed = {}
+            # the paths of the sections to leave alone
+            unchanged = set()
+            self._check_reload(self, content, root, (), signatures, parsed,
+                               unchanged)
+            self._raise_errors()
+        except Exception:
+            (self.BOM, self.newlines, self.encoding) = state
+            raise
+        
+        changed = set()
+        self._apply_reload(self, content, root, (), parsed, unchanged,
+                           changed)
+        if not self.read_only:
+            self.initial_comment = content[:first]
+            self.final_comment = content[last + 1:]
+        self._signatures = signatures
+        return changed
+
+
+    def _check_reload(self, section, content, node, path, signatures,
+                      parsed, unchanged):
+        """
+        Parse the members of the sections that have changed for
+        ``_reload_incremental``, checking them for errors.
+        
+        ``section`` is the existing section at ``path``, or ``None``.
+        """
+        old = self._signatures.get(path)
+        new = signatures[path]
+        if section is not None:
+            if old is not None and old[1] == new[1]:
+                unchanged.add(path)
+                return
+            self._materialise_old(section)
+        
+        names = [child[0] for child in node[5]]
+        if (section is None or old is None or old[0] != new[0] or
+                not set(names).issubset(section.sections)):
+            members = Section(self, len(path), self, name=node[0])
+            self._parse_members(members, content, node[3] + 1, node[4])
+            parsed[path] = members
+        
+        for child in node[5]:
+            name = child[0]
+            if path in parsed and name in parsed[path]:
+                # clashes with a member
+                self._handle_error('Duplicate section name',
+                                   DuplicateError, content, child[3])
+                continue
+            child_section = None
+            if section is not None and name in section.sections:
+                child_section = dict.__getitem__(section, name)
+            self._check_reload(child_section, content, child,
+                               path + (name,), signatures, parsed, unchanged)
+
+
+    def _apply_reload(self, section, content, node, path, parsed, unchanged,
+                      changed):
+        """
+        Update ``section`` in place from the lines of the config file, for
+        ``_reload_incremental``.
+        """
+        if path in unchanged:
+            return
+        names = [child[0] for child in node[5]]
+        for name in list(section.sections):
+            if name not in names:
+                changed.add((path, name))
+                self._report_section(dict.__getitem__(section, name),
+                                     path + (name,), changed)
+                del section[name]
+        
+        if path in parsed:
+            members = parsed[path]
+            defaults = section._defaults or ()
+            for key in list(section.scalars):
+                if key not in members and key not in defaults:
+                    changed.add((path, key))
+                    del section[key]
+            for key in members.scalars:
+                value = dict.__getitem__(members, key)
+                if key not in section or dict.__getitem__(section, key) != value:
+                    changed.add((path, key))
+                    section._set_member(key, value, unrepr=True)
+                elif key in defaults:
+                    # now set in the file
+                    defaults.remove(key)
+                if not self.read_only:
+                    section._set_comments(key, *members._get_comments(key))
+            if members._source:
+                # the lines of every member are in the new file now
+                if section._source is None:
+                    section._source = {}
+                section._source.update(members._source)
+            # defaults that are kept go after the members from the file
+            section.scalars[:] = members.scalars + [
+                key for key in section.scalars if key not in members]
+        
+        for child in node[5]:
+            name = child[0]
+            if name not in section.sections:
+                if name in section:
+                    # a value that isn't in the file
+                    del section[name]
+                section._set_member(name, {})
+                changed.add((path, name))
+            if not self.read_only:
+                section._set_comments(name, content[child[2]:child[3]],
+                                      child[1])
+                if self.keep_formatting:
+                    self._keep_source(section, name, content, child[2],
+                                      child[3], child[3] + 1)
+            self._apply_reload(dict.__getitem__(section, name), content, child,
+                               path + (name,), parsed, unchanged, changed)
+        section.sections[:] = names
+
+
+    def _merge_reload(self, section, new, path, changed):
+        """
+        Update ``section`` in place to match ``new``, the same section parsed
+        from the whole file, for ``_reload_incremental``.
+        """
+        self._materialise_old(section)
+        for name in list(section.sections):
+            if name not in new.sections:
+                changed.add((path, name))
+                self._report_section(dict.__getitem__(section, name),
+                                     path + (name,), changed)
+                del section[name]
+        
+        defaults = section._defaults or ()
+        for key in list(section.scalars):
+            if key not in new.scalars and key not in defaults:
+                changed.add((path, key))
+                del section[key]
+        for key in new.scalars:
+            value = dict.__getitem__(new, key)
+            if key not in section or dict.__getitem__(section, key) != value:
+                changed.add((path, key))
+                section._set_member(key, value, unrepr=True)
+            elif key in defaults:
+                # now set in the file
+                defaults.remove(key)
+            if not self.read_only:
+                section._set_comments(key, *new._get_comments(key))
+        # the lines of every member are in the new file now
+        section._source = new._source
+        # defaults that are kept go after the members from the file
+        section.scalars[:] = new.scalars + [
+            key for key in section.scalars if key not in new]
+        
+        for name in new.sections:
+            if name not in section.sections:
+                if name in section:
+                    # a value that isn't in the file
+                    del section[name]
+                section._set_member(name, {})
+                changed.add((path, name))
+            if not self.read_only:
+                section._set_comments(name, *new._get_comments(name))
+            self._merge_reload(dict.__getitem__(section, name),
+                               dict.__getitem__(new, name), path + (name,),
+                               changed)
+        section.sections[:] = new.sections
+
+
+    def _materialise_old(self, section):
+        """Parse a ``LazySection`` from the lines it was loaded from."""
+        if isinstance(section, LazySection):
+            errors = self.__dict__.get('_errors')
+            try:
+                section._materialise()
+            except ConfigObjError:
+                # the old lines had errors, so there are no values to lose
+                pass
+            if errors is None:
+                self.__dict__.pop('_errors', None)
+            else:
+                self._errors = errors
+
+
+    def _report_section(self, section, path, changed):
+        """Add the path of every value and section in ``section`` to ``changed``."""
+        self._materialise_old(section)
+        for key in section.scalars:
+            changed.add((path, key))
+        for name in section.sections:
+            changed.add((path, name))
+            self._report_section(dict.__getitem__(section, name),
+                                 path + (name,), changed)
+        
+
+
+def _parse_configspec(configspec):
+    """Return ``configspec`` as a ``ConfigObj``, parsing it if need be."""
+    # FIXME: Should we check that the configspec was created with the 
+    #        correct settings ? (i.e. ``list_values=False``)
+    if isinstance(configspec, ConfigObj):
+        return configspec
+    try:
+        return ConfigObj(configspec,
+                         raise_errors=True,
+                         file_error=True,
+                         _inspec=True)
+    except ConfigObjError as e:
+        # FIXME: Should these errors have a reference
+        #        to the already parsed ConfigObj ?
+        raise ConfigspecError('Parsing configspec failed: %s' % e)
+    except IOError as e:
+        raise IOError('Reading configspec failed: %s' % e)
+
+
+# a check without a default value
+_NO_DEFAULT = object()
+
+
+class _PlanCheck(object):
+    """
+    A check from a configspec, with its function, arguments and default
+    value worked out. Without a ``function`` it is left to the validator.
+    """
+
+    __slots__ = ('spec', 'function', 'args', 'kwargs', 'default')
+
+    def __init__(self, spec, function=None, args=(), kwargs=None,
+                 default=_NO_DEFAULT):
+        self.spec = spec
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.default = default
+
+
+class _PlanSection(object):
+    """The compiled checks for one section of a configspec."""
+
+    __slots__ = ('spec', 'names', 'scalars', 'many', 'sections',
+                 'many_section')
+
+    def __init__(self, plan, spec):
+        self.spec = spec
+        # every name in the configspec, including ``__many__``
+        self.names = frozenset(spec)
+        self.scalars = [(entry, plan._compile(spec[entry]))
+                        for entry in spec.scalars
+                        if entry not in ('__many__', '___many___')]
+        many = None
+        if '__many__' in spec.scalars:
+            many = spec['__many__']
+        elif '___many___' in spec.scalars:
+            many = spec['___many___']
+        self.many = None if many is None else plan._compile(many)
+        self.sections = dict((entry, _PlanSection(plan, spec[entry]))
+                             for entry in spec.sections
+                             if entry != '__many__')
+        many = spec.get('__many__')
+        self.many_section = (_PlanSection(plan, many)
+                             if isinstance(many, dict) else None)
+
+
+class ValidationPlan(object):
+    """
+    A configspec compiled with a validator, for validating many ConfigObjs
+    against the same configspec.
+    
+    The configspec is parsed and walked once, and each check has its
+    function, arguments and default value worked out up front. ``validate``
+    gives the same results as ``ConfigObj.validate``, and makes the same
+    changes to the ConfigObj. ::
+    
+        plan = ValidationPlan('spec.ini', Validator())
+        for config in configs:
+            result = plan.validate(config)
+    
+    Later changes to the configspec, or to the functions of the validator,
+    aren't seen by the plan.
+    """
+
+    def __init__(self, configspec, validator):
+        # we do this here to remove a top level dependency on the validate
+        # module, which makes importing configobj faster
+        from configobj.validate import Validator, VdtMissingValue
+        self._vdtMissingValue = VdtMissingValue
+        self.validator = validator
+        # a subclass may check values differently, so it is left to check them
+        self._compiled = (isinstance(validator, Validator) and
+                          type(validator).check is Validator.check and
+                          type(validator).get_default_value is
+                          Validator.get_default_value)
+        self.configspec = _parse_configspec(configspec)
+        self._root = _PlanSection(self, self.configspec)
+
+
+    def _compile(self, spec):
+        """Work out the function, arguments and default value of a check."""
+        validator = self.validator
+        if not self._compiled:
+            return _PlanCheck(spec)
+        try:
+            fun_name, fun_args, fun_kwargs, default = validator._parse_check(spec)
+        except validator.baseErrorClass:
+            # bad syntax, raised by the validator when the check is used
+            return _PlanCheck(spec)
+        function = validator.functions.get(fun_name)
+        if function is None or getattr(function, 'mutates_args', False):
+            # an unknown check, likewise, or one that needs copies of its
+            # arguments
+            return _PlanCheck(spec)
+        fun_args = tuple(fun_args)
+        fun_kwargs = dict([(str(key), value) for (key, value) in fun_kwargs.items()])
+        if default is not None:
+            default = validator._handle_none(default)
+            if default is not None:
+                try:
+                    default = function(default, *fun_args, **fun_kwargs)
+                except Exception:
+                    # a bad default is left to the validator, so that it
+                    # raises the error each time the default is used
+                    return _PlanCheck(spec)
+        else:
+            default = _NO_DEFAULT
+        return _PlanCheck(spec, function, fun_args, fun_kwargs, default)
+
+
+    def _check(self, check, value, missing):
+        """Check a value, like ``Validator.check``."""
+        function = check.function
+        if function is None:
+            return self.validator.check(check.spec, value, missing=missing)
+        if missing:
+            default = check.default
+            if default is _NO_DEFAULT:
+                raise self._vdtMissingValue()
+            if isinstance(default, list):
+                default = list(default)
+            return default
+        if value is None:
+            return None
+        return function(value, *check.args, **check.kwargs)
+
+
+    def _set_default_value(self, default_values, entry, check):
+        """Set the default value of ``entry``, if it has one."""
+        default_values.pop(entry, None)
+        if check.function is not None:
+            default = check.default
+            if default is not _NO_DEFAULT:
+                if isinstance(default, list):
+                    default = list(default)
+                default_values[entry] = default
+            return
+        try:
+            default_values[entry] = self.validator.get_default_value(check.spec)
+        except (KeyError, AttributeError, self.validator.baseErrorClass):
+            # No default, bad default or validator has no 'get_default_value'
+            # (e.g. SimpleVal)
+            pass
+
+
+    def validate(self, config, preserve_errors=False, copy=False):
+        """
+        Validate ``config``, like ``config.validate(validator,
+        preserve_errors, copy)``. The configspec of ``config`` is set to the
+        one of the plan.
+        """
+        configspec = self.configspec
+        config.configspec = configspec
+        if copy:
+            config.initial_comment = configspec.initial_comment
+            config.final_comment = configspec.final_comment
+            config.encoding = configspec.encoding
+            config.BOM = configspec.BOM
+            config.newlines = configspec.newlines
+            config.indent_type = configspec.indent_type
+        return self._validate_section(config, config, self._root,
+                                      preserve_errors, copy)
+
+
+    def _validate_section(self, config, section, plan, preserve_errors, copy):
+        configspec = plan.spec
+        names = plan.names
+        # set the configspecs of the subsections, like ``_set_configspec``
+        many = plan.many_section
+        if many is not None:
+            for entry in section.sections:
+                if entry not in names:
+                    section[entry].configspec = many.spec
+        for entry, subplan in plan.sections.items():
+            if entry not in section:
+                section[entry] = {}
+                section[entry]._created = True
+                if copy:
+                    # copy comments
+                    section._set_comments(entry,
+                                          *configspec._get_comments(entry))
+            # Could be a scalar when we expect a section
+            if isinstance(section[entry], Section):
+                section[entry].configspec = subplan.spec
+        
+        validator = self.validator
+        
+        def validate_entry(entry, check, val, missing, ret_true, ret_false):
+            try:
+                check = self._check(check, val, missing)
+            except validator.baseErrorClass as e:
+                if not preserve_errors or isinstance(e, self._vdtMissingValue):
+                    out[entry] = False
+                else:
+                    # preserve the error
+                    out[entry] = e
+                    ret_false = False
+                ret_true = False
+            else:
+                ret_false = False
+                out[entry] = True
+                if config.stringify or missing:
+                    # if we are doing type conversion
+                    # or the value is a supplied default
+                    if not config.stringify:
+                        if isinstance(check, (list, tuple)):
+                            # preserve lists
+                            check = [config._str(item) for item in check]
+                        elif missing and check is None:
+                            # convert the None from a default to a ''
+                            check = ''
+                        else:
+                            check = config._str(check)
+                    if (check != val) or missing:
+                        section[entry] = check
+                if not copy and missing and entry not in defaults:
+                    defaults.append(entry)
+            return ret_true, ret_false
+        
+        out = {}
+        ret_true = True
+        ret_false = True
+        
+        scalars = section.scalars
+        defaults = section.defaults
+        default_values = section.default_values
+        unvalidated = [k for k in scalars if k not in names]
+        incorrect_sections = [k for k in configspec.sections if k in scalars]
+        incorrect_scalars = [k for k in configspec.scalars
+                             if k in section.sections]
+        
+        for entry, check in plan.scalars:
+            self._set_default_value(default_values, entry, check)
+            if (entry not in scalars) or (entry in defaults):
+                # missing entries
+                # or entries from defaults
+                missing = True
+                val = None
+                if copy and entry not in scalars:
+                    # copy comments
+                    section._set_comments(entry,
+                                          *configspec._get_comments(entry))
+            else:
+                missing = False
+                val = section[entry]
+            ret_true, ret_false = validate_entry(entry, check, val, missing,
+                                                 ret_true, ret_false)
+        
+        if plan.many is not None:
+            for entry in unvalidated:
+                default_values.pop(entry, None)
+                ret_true, ret_false = validate_entry(entry, plan.many,
+                                                     section[entry], False,
+                                                     ret_true, ret_false)
+            unvalidated = []
         
+        for entry in incorrect_scalars:
+            ret_true = False
+            if not preserve_errors:
+                out[entry] = False
+            else:
+                ret_false = False
+                msg = 'Value %r was provided as a section' % entry
+                out[entry] = validator.baseErrorClass(msg)
+        for entry in incorrect_sections:
+            ret_true = False
+            if not preserve_errors:
+                out[entry] = False
+            else:
+                ret_false = False
+                msg = 'Section %r was provided as a single value' % entry
+                out[entry] = validator.baseErrorClass(msg)
+        
+        for entry in section.sections:
+            # FIXME: this means DEFAULT is not copied in copy mode
+            if section is config and entry == 'DEFAULT':
+                continue
+            subplan = plan.sections.get(entry)
+            if subplan is None and entry not in names:
+                subplan = plan.many_section
+            if subplan is None:
+                unvalidated.append(entry)
+                continue
+            if copy:
+                section._set_comments(entry, *configspec._get_comments(entry))
+            check = self._validate_section(config, section[entry], subplan,
+                                           preserve_errors, copy)
+            out[entry] = check
+            if check == False:
+                ret_true = False
+            elif check == True:
+                ret_false = False
+            else:
+                ret_true = False
+        
+        section.extra_values = unvalidated
+        if preserve_errors and not section._created:
+            # If the section wasn't created (i.e. it wasn't missing)
+            # then we can't return False, we need to preserve errors
+            ret_false = False
+        if ret_false and preserve_errors and out:
+            # If we are preserving errors, but all
+            # the failures are from missing sections / values
+            # then we can return False. Otherwise there is a
+            # real failure that we need to preserve.
+            ret_false = not any(out.values())
+        if ret_true:
+            return True
+        elif ret_false:
+            return False
+        return out
+
 
 
 class SimpleVal(object):
@@ -2471,4 +5357,109 @@ def get_extra_values(conf, _prepend=()):
     return out
 
 
+def iterparse(infile, **options):
+    """
+    Parse a config file as a stream of events, without building a ConfigObj.
+    
+    ``infile`` can be a filename, a file like object or a list of lines, and
+    ``options`` are any of the ``ConfigObj`` keyword arguments that apply to
+    parsing (``configspec`` and ``interpolation`` have no effect). Lines are
+    read and decoded one at a time, so memory use doesn't grow with the size
+    of the file.
+    
+    Each event is a tuple ``(event, line_number, path, value)``, where
+    ``line_number`` starts from 1 and ``path`` is a tuple of the names of the
+    enclosing sections. The events are :
+    
+    * ``'comment'`` - a blank line or a comment. ``value`` is the line.
+    * ``'start_section'`` - a section marker. ``path`` includes the new
+      section and ``value`` is the inline comment.
+    * ``'end_section'`` - the end of a section, given the line of the
+      section marker that closes it (or the last line of the file).
+      ``value`` is ``None``.
+    * ``'keyvalue'`` - a member. ``value`` is ``(key, value, inline_comment)``,
+      with the line number of the start of any multiline value.
+    * ``'error'`` - a line that can't be parsed. ``value`` is the
+      ``ConfigObjError``. If ``raise_errors`` is set the error is raised
+      instead.
+    
+    As nothing is kept for the sections already parsed, duplicate keys and
+    sections are not reported.
+    
+    >>> for event in iterparse(['a = 1', '[s]', 'b = 2, 3 # c']):
+    ...     print(event)
+    ('keyvalue', 1, (), ('a', '1', None))
+    ('start_section', 2, ('s',), None)
+    ('keyvalue', 3, ('s',), ('b', ['2', '3'], '# c'))
+    ('end_section', 3, ('s',), None)
+    """
+    parser = ConfigObj(**options)
+    return parser._iterparse(infile)
+
+
+def validate_many(configs, configspec, validator, workers=None,
+                  preserve_errors=False, **options):
+    """
+    Parse and validate many configs against one configspec, in a pool of
+    ``workers`` processes (by default one per CPU).
+    
+    ``configs`` are filenames, lists of lines or ``ConfigObj`` instances.
+    Filenames and lines are parsed in the workers, with any ``ConfigObj``
+    keyword arguments in ``options`` (``read_only=True`` unless it is
+    given). The configspec is compiled into a ``ValidationPlan`` once, and
+    sent to each worker once.
+    
+    Returns an iterator of ``(config, errors)`` for each config, in order,
+    as the results come in. ``errors`` is the list from ``flatten_errors``,
+    empty if the config is valid. A config that fails to load, including a
+    file that doesn't exist (``file_error=True`` unless it is given), has
+    the single error ``([], None, error)``, and the other configs are still
+    validated. A ``ConfigObj`` is validated in a worker, so isn't changed
+    itself.
+    
+    The configspec is compiled straight away, so an error in it is raised
+    by ``validate_many`` itself.
+    """
+    configs = list(configs)
+    options.setdefault('read_only', True)
+    options.setdefault('file_error', True)
+    plan = ValidationPlan(configspec, validator)
+    return _validate_in_pool(configs, plan, workers, preserve_errors, options)
+
+
+def _validate_in_pool(configs, plan, workers, preserve_errors, options):
+    """The results of ``validate_many``, as they come in."""
+    # we do this here so that importing configobj doesn't import the pool
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                             initargs=(plan, preserve_errors, options)) as pool:
+        for config, errors in zip(configs, pool.map(_validate_in_worker,
+                                                    configs)):
+            yield config, errors
+
+
+# the plan, ``preserve_errors`` and options of a ``validate_many`` worker
+_worker = None
+
+
+def _start_worker(plan, preserve_errors, options):
+    global _worker
+    _worker = (plan, preserve_errors, options)
+
+
+def _validate_in_worker(config):
+    """Validate one config for ``validate_many``, returning its errors."""
+    (plan, preserve_errors, options) = _worker
+    try:
+        if not isinstance(config, ConfigObj):
+            config = ConfigObj(config, **options)
+        result = plan.validate(config, preserve_errors=preserve_errors)
+        return flatten_errors(config, result)
+    except Exception as e:
+        if getattr(e, 'config', None) is not None:
+            # don't send the partly parsed config back
+            e.config = None
+        return [([], None, e)]
+
+
 """*A programming language is a medium of expression.* - Paul Graham"""
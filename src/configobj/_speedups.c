@@ -0,0 +1,540 @@
+/*
+ * _speedups.c
+ * Optional C implementation of the ConfigObj line lexer.
+ *
+ * This software is licensed under the terms of the BSD license.
+ * http://opensource.org/licenses/BSD-3-Clause
+ *
+ * The functions here mirror ``ConfigObj._lex_line`` and
+ * ``ConfigObj._lex_value`` exactly. Wherever the pure Python versions hand
+ * over to the regular expressions, these call the ``fallback`` function they
+ * are passed instead, so all the parser engines give the same results.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+static PyObject *str_section;
+static PyObject *str_keyword;
+
+typedef struct {
+    PyObject *str;
+    int kind;
+    const void *data;
+    Py_ssize_t len;
+} text_t;
+
+static int
+text_init(text_t *text, PyObject *str)
+{
+    if (!PyUnicode_Check(str)) {
+        PyErr_SetString(PyExc_TypeError, "expected a str");
+        return -1;
+    }
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(str) == -1)
+        return -1;
+#endif
+    text->str = str;
+    text->kind = PyUnicode_KIND(str);
+    text->data = PyUnicode_DATA(str);
+    text->len = PyUnicode_GET_LENGTH(str);
+    return 0;
+}
+
+#define CHAR(text, i) PyUnicode_READ((text)->kind, (text)->data, (i))
+
+static Py_ssize_t
+skip_space(text_t *text, Py_ssize_t pos)
+{
+    while (pos < text->len && Py_UNICODE_ISSPACE(CHAR(text, pos)))
+        pos++;
+    return pos;
+}
+
+/* The end of text[start:end].rstrip() */
+static Py_ssize_t
+strip_end(text_t *text, Py_ssize_t start, Py_ssize_t end)
+{
+    while (end > start && Py_UNICODE_ISSPACE(CHAR(text, end - 1)))
+        end--;
+    return end;
+}
+
+/* Returns -1 if not found and -2 on error */
+static Py_ssize_t
+find(text_t *text, Py_UCS4 ch, Py_ssize_t start, Py_ssize_t end)
+{
+    if (start >= end)
+        return -1;
+    return PyUnicode_FindChar(text->str, ch, start, end, 1);
+}
+
+static PyObject *
+substring(text_t *text, Py_ssize_t start, Py_ssize_t end)
+{
+    return PyUnicode_Substring(text->str, start, end);
+}
+
+/* text[start:] or None if that is empty */
+static PyObject *
+comment(text_t *text, Py_ssize_t start)
+{
+    if (start < 0 || start >= text->len)
+        Py_RETURN_NONE;
+    return substring(text, start, text->len);
+}
+
+/* ConfigObj._unquote(text[start:end]), for a non-empty slice */
+static PyObject *
+unquote(text_t *text, Py_ssize_t start, Py_ssize_t end)
+{
+    Py_UCS4 first = CHAR(text, start);
+    if ((first == '"' || first == '\'') && CHAR(text, end - 1) == first) {
+        if (end - start < 2)
+            return PyUnicode_New(0, 0);
+        return substring(text, start + 1, end - 1);
+    }
+    return substring(text, start, end);
+}
+
+/* Build a tuple from new references, releasing them all on failure */
+static PyObject *
+pack(Py_ssize_t size, PyObject **items)
+{
+    Py_ssize_t i;
+    PyObject *result = NULL;
+
+    for (i = 0; i < size; i++) {
+        if (items[i] == NULL)
+            goto error;
+    }
+    result = PyTuple_New(size);
+    if (result == NULL)
+        goto error;
+    for (i = 0; i < size; i++)
+        PyTuple_SET_ITEM(result, i, items[i]);
+    return result;
+
+error:
+    for (i = 0; i < size; i++)
+        Py_XDECREF(items[i]);
+    return NULL;
+}
+
+static PyObject *
+call_fallback(PyObject *fallback, PyObject *arg)
+{
+    return PyObject_CallFunctionObjArgs(fallback, arg, NULL);
+}
+
+/* Scan the closing brackets of a section marker from pos */
+static Py_ssize_t
+section_close(text_t *text, Py_ssize_t pos, Py_ssize_t *depth)
+{
+    Py_UCS4 ch;
+
+    *depth = 0;
+    while (pos < text->len) {
+        ch = CHAR(text, pos);
+        if (ch == ']')
+            (*depth)++;
+        else if (!Py_UNICODE_ISSPACE(ch))
+            break;
+        pos++;
+    }
+    return pos;
+}
+
+static PyObject *
+section_token(text_t *text, Py_ssize_t start, Py_ssize_t depth,
+              Py_ssize_t close_depth, Py_ssize_t name_start,
+              Py_ssize_t name_end, Py_ssize_t end)
+{
+    PyObject *items[6];
+
+    Py_INCREF(str_section);
+    items[0] = str_section;
+    items[1] = substring(text, 0, start);
+    items[2] = PyLong_FromSsize_t(depth);
+    items[3] = PyLong_FromSsize_t(close_depth);
+    items[4] = substring(text, name_start, name_end);
+    items[5] = comment(text, end);
+    return pack(6, items);
+}
+
+/* Returns a new reference to a token, to None, or NULL on error */
+static PyObject *
+lex_section(text_t *text, Py_ssize_t start)
+{
+    Py_ssize_t n = text->len;
+    Py_ssize_t *name_starts;
+    Py_ssize_t count = 0, depth, pos, name_start, name_end, close;
+    Py_ssize_t close_depth, end;
+    Py_UCS4 quote;
+    PyObject *result = NULL;
+
+    name_starts = PyMem_New(Py_ssize_t, n);
+    if (name_starts == NULL)
+        return PyErr_NoMemory();
+    pos = start;
+    while (pos < n && CHAR(text, pos) == '[') {
+        pos = skip_space(text, pos + 1);
+        name_starts[count++] = pos;
+    }
+    /* like the regex try the deepest opening marker first */
+    for (depth = count; depth > 0; depth--) {
+        name_end = close = -1;
+        name_start = name_starts[depth - 1];
+        if (name_start == n)
+            continue;
+        quote = CHAR(text, name_start);
+        if (quote == '"' || quote == '\'') {
+            /* the quotes must hold at least one non-space character */
+            pos = skip_space(text, name_start + 1);
+            name_end = find(text, quote, pos + 1, n);
+            while (name_end >= 0) {
+                name_end++;
+                end = section_close(text, name_end, &close_depth);
+                if (close_depth && (end == n || CHAR(text, end) == '#')) {
+                    result = section_token(text, start, depth, close_depth,
+                                           name_start, name_end, end);
+                    goto done;
+                }
+                name_end = find(text, quote, name_end, n);
+            }
+        }
+        else {
+            close = find(text, ']', name_start + 1, n);
+            while (close >= 0) {
+                end = section_close(text, close, &close_depth);
+                if (end == n || CHAR(text, end) == '#') {
+                    name_end = strip_end(text, name_start + 1, close);
+                    result = section_token(text, start, depth, close_depth,
+                                           name_start, name_end, end);
+                    goto done;
+                }
+                close = find(text, ']', end, n);
+            }
+        }
+        if (name_end == -2 || close == -2)
+            goto done;
+    }
+    Py_INCREF(Py_None);
+    result = Py_None;
+
+done:
+    PyMem_Free(name_starts);
+    return result;
+}
+
+static PyObject *
+keyword_token(text_t *text, Py_ssize_t indent_end, Py_ssize_t key_start,
+              Py_ssize_t key_end, Py_ssize_t value_start)
+{
+    PyObject *items[4];
+
+    Py_INCREF(str_keyword);
+    items[0] = str_keyword;
+    items[1] = substring(text, 0, indent_end);
+    items[2] = substring(text, key_start, key_end);
+    items[3] = substring(text, skip_space(text, value_start), text->len);
+    return pack(4, items);
+}
+
+static PyObject *
+lex_keyword(text_t *text, Py_ssize_t start)
+{
+    Py_ssize_t n = text->len;
+    Py_ssize_t key_end, pos, equals;
+    Py_UCS4 quote = CHAR(text, start);
+
+    if (quote == '"' || quote == '\'') {
+        key_end = find(text, quote, start + 1, n);
+        while (key_end >= 0) {
+            key_end++;
+            pos = skip_space(text, key_end);
+            if (pos < n && CHAR(text, pos) == '=')
+                return keyword_token(text, start, start, key_end, pos + 1);
+            key_end = find(text, quote, key_end, n);
+        }
+        if (key_end == -2)
+            return NULL;
+    }
+    else if (quote != '=') {
+        equals = find(text, '=', start + 1, n);
+        if (equals == -2)
+            return NULL;
+        if (equals == -1)
+            Py_RETURN_NONE;
+        return keyword_token(text, start, start,
+                             strip_end(text, start, equals), equals + 1);
+    }
+    if (!start)
+        Py_RETURN_NONE;
+    /* the regex gives back one character of indentation, which then
+       starts an unquoted key */
+    equals = find(text, '=', start, n);
+    if (equals == -2)
+        return NULL;
+    if (equals == -1)
+        Py_RETURN_NONE;
+    return keyword_token(text, start - 1, start - 1,
+                         strip_end(text, start, equals), equals + 1);
+}
+
+PyDoc_STRVAR(lex_line_doc,
+"lex_line(line, fallback)\n\
+\n\
+Split a line into a token, like ``ConfigObj._lex_line``.\n\
+``fallback`` is called with the line when the regexes must be used.");
+
+static PyObject *
+lex_line(PyObject *self, PyObject *args)
+{
+    PyObject *line, *fallback, *result;
+    text_t text;
+    Py_ssize_t start;
+
+    if (!PyArg_ParseTuple(args, "OO:lex_line", &line, &fallback))
+        return NULL;
+    if (text_init(&text, line) == -1)
+        return NULL;
+    if (find(&text, '\n', 0, text.len) != -1)
+        return call_fallback(fallback, line);
+    start = skip_space(&text, 0);
+    if (start == text.len)
+        return call_fallback(fallback, line);
+    if (CHAR(&text, start) == '[') {
+        result = lex_section(&text, start);
+        if (result != Py_None)
+            return result;
+        Py_DECREF(result);
+    }
+    return lex_keyword(&text, start);
+}
+
+static PyObject *
+value_result(PyObject *value, PyObject *comment_value)
+{
+    PyObject *items[2];
+
+    items[0] = value;
+    items[1] = comment_value;
+    return pack(2, items);
+}
+
+/* The end of the quoted value starting at pos, or -1 */
+static Py_ssize_t
+lex_quoted(text_t *text, Py_ssize_t pos, Py_ssize_t *comment_start)
+{
+    Py_ssize_t n = text->len, end;
+    Py_UCS4 quote = CHAR(text, pos);
+
+    end = find(text, quote, pos + 1, n);
+    while (end >= 0) {
+        end++;
+        *comment_start = skip_space(text, end);
+        if (*comment_start == n || CHAR(text, *comment_start) == '#')
+            return end;
+        end = find(text, quote, end, n);
+    }
+    return end;
+}
+
+static int
+append_unquoted(PyObject *the_list, text_t *text, Py_ssize_t start,
+                Py_ssize_t end)
+{
+    PyObject *item = unquote(text, start, end);
+    int result;
+
+    if (item == NULL)
+        return -1;
+    result = PyList_Append(the_list, item);
+    Py_DECREF(item);
+    return result;
+}
+
+PyDoc_STRVAR(lex_value_doc,
+"lex_value(value, list_values, fallback)\n\
+\n\
+Split a value and its comment, like ``ConfigObj._lex_value``.\n\
+``fallback`` is called with the value when the regexes must be used.");
+
+static PyObject *
+lex_value(PyObject *self, PyObject *args)
+{
+    PyObject *value, *fallback, *the_list, *single;
+    int list_values, has_single = 0;
+    text_t text;
+    Py_ssize_t n, pos, end, comma, comment_start = -1, hash;
+    Py_ssize_t single_start = 0, single_end = 0;
+    Py_UCS4 first, ch;
+
+    if (!PyArg_ParseTuple(args, "OpO:lex_value",
+                          &value, &list_values, &fallback))
+        return NULL;
+    if (text_init(&text, value) == -1)
+        return NULL;
+    n = text.len;
+    if (find(&text, '\n', 0, n) != -1)
+        return call_fallback(fallback, value);
+    if (!n || CHAR(&text, 0) == '#') {
+        /* an empty value */
+        return value_result(PyUnicode_New(0, 0), comment(&text, 0));
+    }
+    first = CHAR(&text, 0);
+    if (first != '"' && first != '\'' && first != ',' &&
+            find(&text, ',', 0, n) == -1) {
+        /* the common case, an unquoted single value */
+        hash = find(&text, '#', 0, n);
+        if (hash == -1)
+            hash = n;
+        return value_result(substring(&text, 0, strip_end(&text, 0, hash)),
+                            comment(&text, hash));
+    }
+    if (!list_values) {
+        if (first == '"' || first == '\'') {
+            end = lex_quoted(&text, 0, &comment_start);
+            if (end == -2)
+                return NULL;
+            if (end == -1)
+                return call_fallback(fallback, value);
+            return value_result(substring(&text, 0, end),
+                                comment(&text, comment_start));
+        }
+        hash = find(&text, '#', 1, n);
+        if (hash == -1)
+            hash = n;
+        return value_result(substring(&text, 0, strip_end(&text, 0, hash)),
+                            comment(&text, hash));
+    }
+    if (first == ',') {
+        /* the single comma - meaning an empty list */
+        comment_start = skip_space(&text, 1);
+        if (comment_start < n && CHAR(&text, comment_start) != '#')
+            return call_fallback(fallback, value);
+        return value_result(PyList_New(0), comment(&text, comment_start));
+    }
+
+    the_list = PyList_New(0);
+    if (the_list == NULL)
+        return NULL;
+    pos = 0;
+    while (1) {
+        if (pos == n) {
+            /* a trailing comma with no whitespace after it doesn't
+               leave an empty last member */
+            has_single = CHAR(&text, pos - 1) != ',';
+            single_start = single_end = pos;
+            break;
+        }
+        ch = CHAR(&text, pos);
+        if (ch == '"' || ch == '\'') {
+            /* a list member if a comma follows the closing quote */
+            comma = -1;
+            end = find(&text, ch, pos + 1, n);
+            while (end >= 0) {
+                end++;
+                comma = skip_space(&text, end);
+                if (comma < n && CHAR(&text, comma) == ',')
+                    break;
+                end = find(&text, ch, end, n);
+            }
+            if (end == -2)
+                goto error;
+            if (end >= 0) {
+                if (append_unquoted(the_list, &text, pos, end) == -1)
+                    goto error;
+                pos = skip_space(&text, comma + 1);
+                continue;
+            }
+            /* otherwise the last value */
+            end = lex_quoted(&text, pos, &comment_start);
+            if (end == -2)
+                goto error;
+            if (end == -1) {
+                Py_DECREF(the_list);
+                return call_fallback(fallback, value);
+            }
+            has_single = 1;
+            single_start = pos;
+            single_end = end;
+            break;
+        }
+        if (ch == '#') {
+            has_single = CHAR(&text, pos - 1) != ',';
+            single_start = single_end = comment_start = pos;
+            break;
+        }
+        if (ch == ',') {
+            /* an empty list member */
+            Py_DECREF(the_list);
+            return call_fallback(fallback, value);
+        }
+        comma = find(&text, ',', pos + 1, n);
+        if (comma >= 0 && find(&text, '#', pos + 1, comma) == -1) {
+            if (append_unquoted(the_list, &text, pos,
+                                strip_end(&text, pos, comma)) == -1)
+                goto error;
+            pos = skip_space(&text, comma + 1);
+            continue;
+        }
+        hash = find(&text, '#', pos + 1, n);
+        if (hash == -1)
+            hash = n;
+        has_single = 1;
+        single_start = pos;
+        single_end = strip_end(&text, pos, hash);
+        comment_start = hash;
+        break;
+    }
+    if (PyList_GET_SIZE(the_list) == 0) {
+        /* not a list value */
+        Py_DECREF(the_list);
+        if (!has_single) {
+            Py_INCREF(Py_None);
+            single = Py_None;
+        }
+        else if (single_start == single_end)
+            single = PyUnicode_New(0, 0);
+        else
+            single = unquote(&text, single_start, single_end);
+        return value_result(single, comment(&text, comment_start));
+    }
+    if (has_single && single_start != single_end &&
+            append_unquoted(the_list, &text, single_start, single_end) == -1)
+        goto error;
+    return value_result(the_list, comment(&text, comment_start));
+
+error:
+    Py_DECREF(the_list);
+    return NULL;
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"lex_line", lex_line, METH_VARARGS, lex_line_doc},
+    {"lex_value", lex_value, METH_VARARGS, lex_value_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "configobj._speedups",
+    "C implementation of the ConfigObj line lexer.",
+    -1,
+    speedups_methods
+};
+
+PyMODINIT_FUNC
+PyInit__speedups(void)
+{
+    str_section = PyUnicode_InternFromString("section");
+    if (str_section == NULL)
+        return NULL;
+    str_keyword = PyUnicode_InternFromString("keyword");
+    if (str_keyword == NULL)
+        return NULL;
+    return PyModule_Create(&speedups_module);
+}
@@ -0,0 +1,250 @@
+# stack.py
+# A read only view of several config files layered on top of each other.
+
+# This software is licensed under the terms of the BSD license.
+# http://opensource.org/licenses/BSD-3-Clause
+
+# ConfigObj 5 - main repository for documentation and issue tracking:
+# https://github.com/DiffSK/configobj
+
+"""
+    A ``ConfigStack`` is a read only view of several ``ConfigObj`` layers,
+    where each layer overrides the ones below it - like merging them in turn
+    with ``Section.merge``, but without copying anything.
+
+    A key is looked up in the layers from the top down when it is first
+    read, and the layer that provides it is remembered, so reading it again
+    is a dictionary lookup. When a layer changes only the keys that changed
+    are looked up again. ::
+
+        stack = ConfigStack([defaults, site, host, user])
+        stack['server']['port']
+        stack.reload(user)
+"""
+
+from collections.abc import Mapping
+
+
+__all__ = ('ConfigStack', 'StackSection')
+
+
+class StackSection(Mapping):
+    """
+    A section of a ``ConfigStack``: the sections with the same path in each
+    layer, with the upper layers overriding the lower ones.
+
+    It only holds its path, so it stays valid when the layers change.
+    """
+
+    def __init__(self, stack, path):
+        self.stack = stack
+        # the names of the sections leading to this one
+        self.path = path
+
+
+    @property
+    def name(self):
+        return self.path[-1] if self.path else None
+
+
+    def __getitem__(self, key):
+        stack = self.stack
+        lookups = stack._lookups.get(self.path)
+        if lookups is None:
+            lookups = stack._lookups[self.path] = {}
+        try:
+            provider = lookups[key]
+        except KeyError:
+            provider = lookups[key] = stack._find(self.path, key)
+        if provider is None:
+            raise KeyError(key)
+        if isinstance(provider, StackSection):
+            return provider
+        # the section of the layer that provides the value
+        return provider[key]
+
+
+    def __iter__(self):
+        return iter(self.stack._keys_of(self.path))
+
+
+    def __len__(self):
+        return len(self.stack._keys_of(self.path))
+
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+
+    def layer_sections(self):
+        """The sections of the layers that make up this one, from the top down."""
+        return list(self.stack._sections_of(self.path))
+
+
+    def dict(self):
+        """
+        Return the section as an ordinary dictionary, with subsections as
+        dictionaries and copies of list values.
+        """
+        newdict = {}
+        for key in self:
+            value = self[key]
+            if isinstance(value, StackSection):
+                value = value.dict()
+            elif isinstance(value, list):
+                value = list(value)
+            newdict[key] = value
+        return newdict
+
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.dict())
+
+
+class ConfigStack(StackSection):
+    """
+    A read only view of several ``ConfigObj`` layers, given lowest first.
+    Each layer overrides the values of the layers before it.
+
+    A section in a layer is combined with the sections of the same name in
+    the layers below it, down to a layer where the name is a value. A value
+    overrides a whole section below it. Values are interpolated in the layer
+    that provides them.
+
+    The layer that provides each key is remembered. ``reload`` a layer (or
+    pass the changes from ``ConfigObj.reload(incremental=True)`` or a
+    ``ConfigWatcher`` to ``invalidate``) so that only the keys that changed
+    are looked up again. Call ``invalidate()`` after changing a layer, or
+    ``layers``, by hand.
+    """
+
+    def __init__(self, layers=()):
+        StackSection.__init__(self, self, ())
+        self.layers = list(layers)
+        # the provider of each key, by path - a layer section for a value, a
+        # ``StackSection`` for a section, ``None`` for a missing key
+        self._lookups = {}
+        # the keys, by path
+        self._keys = {}
+        # the layer sections making up each section, top down, by path
+        self._sections = {}
+
+
+    def push(self, layer):
+        """Add ``layer`` on top of the others."""
+        self.layers.append(layer)
+        self._sections.pop((), None)
+        self.invalidate(_keys_provided(layer, ()))
+
+
+    def reload(self, layer=None):
+        """
+        Reload ``layer``, or every layer with a filename, with
+        ``reload(incremental=True)``, and forget the keys that changed.
+        Return the set of ``(path, key)`` that changed.
+        """
+        if layer is None:
+            layers = [entry for entry in self.layers
+                      if isinstance(entry.filename, str)]
+        else:
+            layers = [layer]
+        changed = set()
+        for entry in layers:
+            changed.update(entry.reload(incremental=True))
+        self.invalidate(changed)
+        return changed
+
+
+    def invalidate(self, changed=None):
+        """
+        Forget the layers that provide each ``(path, key)`` in ``changed``,
+        and everything in the sections under them. Without ``changed``
+        everything is forgotten.
+        """
+        if changed is None:
+            self._lookups.clear()
+            self._keys.clear()
+            self._sections.clear()
+            return
+        dropped = set()
+        for (path, key) in changed:
+            path = tuple(path)
+            lookups = self._lookups.get(path)
+            if lookups is not None:
+                lookups.pop(key, None)
+            self._keys.pop(path, None)
+            dropped.add(path + (key,))
+        if not dropped:
+            return
+        # the key may have been a section in some layer
+        for cache in (self._lookups, self._keys, self._sections):
+            for path in [path for path in cache
+                         if _under(path, dropped)]:
+                del cache[path]
+
+
+    def _sections_of(self, path):
+        """The layer sections making up the section at ``path``, top down."""
+        try:
+            return self._sections[path]
+        except KeyError:
+            pass
+        if not path:
+            sections = self.layers[::-1]
+        else:
+            name = path[-1]
+            sections = []
+            for section in self._sections_of(path[:-1]):
+                if name in section.sections:
+                    sections.append(section[name])
+                elif name in section:
+                    # a value hides the sections below it
+                    break
+        self._sections[path] = sections
+        return sections
+
+
+    def _find(self, path, key):
+        """Find the provider of ``key`` in the section at ``path``."""
+        for section in self._sections_of(path):
+            if key in section.sections:
+                return StackSection(self, path + (key,))
+            if key in section:
+                return section
+        return None
+
+
+    def _keys_of(self, path):
+        """The keys of the section at ``path``, lowest layer first."""
+        try:
+            return self._keys[path]
+        except KeyError:
+            pass
+        keys = {}
+        for section in reversed(self._sections_of(path)):
+            for key in section:
+                keys[key] = None
+        keys = self._keys[path] = list(keys)
+        return keys
+
+
+def _under(path, dropped):
+    """Whether ``path``, or a section above it, is in ``dropped``."""
+    for index in range(len(path), 0, -1):
+        if path[:index] in dropped:
+            return True
+    return False
+
+
+def _keys_provided(section, path):
+    """Every ``(path, key)`` in ``section`` and its subsections."""
+    keys = set()
+    for key in section:
+        keys.add((path, key))
+    for name in section.sections:
+        keys.update(_keys_provided(section[name], path + (name,)))
+    return keys
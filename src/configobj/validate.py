@@ -163,9 +163,18 @@ __all__ = (
 
 import re
 import sys
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
 from pprint import pprint
 
 
+# the number of parsed checks a ``Validator`` keeps
+DEFAULT_CACHE_SIZE = 1024
+
+# the statistics from ``Validator.cache_info``
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+
+
 _list_arg = re.compile(r'''
     (?:
         ([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*list\(
@@ -339,6 +348,18 @@ class ValidateError(Exception):
     ValidateError
     """
 
+    def __reduce__(self):
+        # rebuilt from the message, as subclasses take other arguments
+        return (_unpickle_error, (self.__class__, self.args, self.__dict__))
+
+
+def _unpickle_error(cls, args, state):
+    """Rebuild a ``ValidateError`` without calling the ``__init__`` of ``cls``."""
+    error = cls.__new__(cls)
+    Exception.__init__(error, *args)
+    error.__dict__.update(state)
+    return error
+
 
 class VdtMissingValue(ValidateError):
     """No value was supplied to a check that needed one."""
@@ -520,6 +541,9 @@ class Validator(object):
     # this regex takes apart keyword arguments
     _key_arg = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*(.*)$',  re.DOTALL)
 
+    # this regex finds the default value argument
+    _default_arg = re.compile(r'default\s*=')
+
 
     # this regex finds keyword=list(....) type values
     _list_arg = _list_arg
@@ -533,8 +557,11 @@ class Validator(object):
     _matchfinder = re.compile(_matchstring, re.VERBOSE | re.DOTALL)
 
 
-    def __init__(self, functions=None):
+    def __init__(self, functions=None, cache_size=DEFAULT_CACHE_SIZE):
         """
+        ``cache_size`` is the number of parsed checks that are kept, or
+        ``None`` to keep them all.
+        
         >>> vtri = Validator()
         """
         self.functions = {
@@ -560,7 +587,14 @@ class Validator(object):
             self.functions.update(functions)
         # tekNico: for use by ConfigObj
         self.baseErrorClass = ValidateError
-        self._cache = {}
+        # the parsed checks, least recently used first, each with the key of
+        # the arguments it shares
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # the parsed function and arguments shared by the cached checks that
+        # only differ in their default, with the number of checks sharing them
+        self._shared = {}
+        self._hits = self._misses = self._evictions = 0
 
 
     def check(self, check, value, missing=False):
@@ -608,17 +642,111 @@ class Validator(object):
 
 
     def _parse_with_caching(self, check):
-        if check in self._cache:
-            fun_name, fun_args, fun_kwargs, default = self._cache[check]
-            # We call list and dict below to work with *copies* of the data
-            # rather than the original (which are mutable of course)
-            fun_args = list(fun_args)
-            fun_kwargs = dict(fun_kwargs)
-        else:
-            fun_name, fun_args, fun_kwargs, default = self._parse_check(check)
+        """
+        Return ``(fun_name, fun_args, fun_kwargs, default)`` for a check,
+        parsing it the first time. The arguments are shared by every use of
+        the check, so they must not be changed: ``fun_args`` is a tuple.
+        """
+        cache = self._cache
+        try:
+            parsed = cache[check][0]
+        except KeyError:
+            parsed, key = self._parse_uncached(check)
+            self._cache_store(check, parsed, key)
+            return parsed
+        self._hits += 1
+        try:
+            cache.move_to_end(check)
+        except KeyError:
+            # evicted by another thread
+            pass
+        return parsed
+
+
+    def _parse_uncached(self, check):
+        """
+        Parse a check that isn't in the cache. Checks that only differ in
+        their default value share the parsed function and arguments, so only
+        the default is parsed if a cached check has them.
+        
+        Returns the parsed check, and the key of its shared arguments (or
+        ``None``).
+        """
+        fun_name, args = self._split_check(check)
+        if args is None:
+            self._misses += 1
+            return (check, (), {}, None), None
+        default_args = []
+        other_args = []
+        for arg in args:
+            if self._default_arg.match(arg):
+                default_args.append(arg)
+            else:
+                other_args.append(arg)
+        key = (fun_name, tuple(other_args))
+        try:
+            shared = self._shared[key][0]
+        except KeyError:
+            self._misses += 1
+            fun_args, fun_kwargs = self._parse_args(other_args)
             fun_kwargs = dict([(str(key), value) for (key, value) in list(fun_kwargs.items())])
-            self._cache[check] = fun_name, list(fun_args), dict(fun_kwargs), default
-        return fun_name, fun_args, fun_kwargs, default
+            shared = (fun_name, tuple(fun_args), fun_kwargs)
+        else:
+            self._hits += 1
+        default = None
+        if default_args:
+            default = self._parse_args(default_args)[1]['default']
+        return shared + (default,), key
+
+
+    def _cache_store(self, check, parsed, key):
+        cache = self._cache
+        if key is not None:
+            try:
+                self._shared[key][1] += 1
+            except KeyError:
+                self._shared[key] = [parsed[:3], 1]
+        old = cache.get(check)
+        if old is not None and old[1] is not None:
+            # stored by another thread as well
+            self._release(old[1])
+        cache[check] = (parsed, key)
+        if self.cache_size is not None:
+            while len(cache) > self.cache_size:
+                try:
+                    (_, (_, key)) = cache.popitem(last=False)
+                except KeyError:
+                    break
+                self._evictions += 1
+                if key is not None:
+                    self._release(key)
+
+
+    def _release(self, key):
+        """A check sharing the arguments ``key`` has left the cache."""
+        entry = self._shared.get(key)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._shared[key]
+
+
+    def cache_info(self):
+        """
+        Return the statistics of the cache of parsed checks, as a
+        ``CacheInfo`` of ``(hits, misses, evictions, maxsize, currsize)``.
+        A check that shares its parsed arguments with a cached check that
+        only has a different default counts as a hit.
+        """
+        return CacheInfo(self._hits, self._misses, self._evictions,
+                         self.cache_size, len(self._cache))
+
+
+    def cache_clear(self):
+        """Empty the cache of parsed checks, and reset its statistics."""
+        self._cache.clear()
+        self._shared.clear()
+        self._hits = self._misses = self._evictions = 0
         
         
     def _check_value(self, value, fun_name, fun_args, fun_kwargs):
@@ -626,50 +754,67 @@ class Validator(object):
             fun = self.functions[fun_name]
         except KeyError:
             raise VdtUnknownCheckError(fun_name)
-        else:
-            return fun(value, *fun_args, **fun_kwargs)
+        # the function gets its own tuple and dict of the arguments, but a
+        # function that changes list arguments in place needs copies of them
+        if getattr(fun, 'mutates_args', False):
+            fun_args = deepcopy(fun_args)
+            fun_kwargs = deepcopy(fun_kwargs)
+        return fun(value, *fun_args, **fun_kwargs)
 
 
     def _parse_check(self, check):
-        fun_match = self._func_re.match(check)
-        if fun_match:
-            fun_name = fun_match.group(1)
-            arg_string = fun_match.group(2)
-            arg_match = self._matchfinder.match(arg_string)
-            if arg_match is None:
-                # Bad syntax
-                raise VdtParamError('Bad syntax in check "%s".' % check)
-            fun_args = []
-            fun_kwargs = {}
-            # pull out args of group 2
-            for arg in self._paramfinder.findall(arg_string):
-                # args may need whitespace removing (before removing quotes)
-                arg = arg.strip()
-                listmatch = self._list_arg.match(arg)
-                if listmatch:
-                    key, val = self._list_handle(listmatch)
-                    fun_kwargs[key] = val
-                    continue
-                keymatch = self._key_arg.match(arg)
-                if keymatch:
-                    val = keymatch.group(2)
-                    if not val in ("'None'", '"None"'):
-                        # Special case a quoted None
-                        val = self._unquote(val)
-                    fun_kwargs[keymatch.group(1)] = val
-                    continue
-                
-                fun_args.append(self._unquote(arg))
-        else:
+        fun_name, args = self._split_check(check)
+        if args is None:
             # allows for function names without (args)
             return check, (), {}, None
-
+        fun_args, fun_kwargs = self._parse_args(args)
         # Default must be deleted if the value is specified too,
         # otherwise the check function will get a spurious "default" keyword arg
         default = fun_kwargs.pop('default', None)
         return fun_name, fun_args, fun_kwargs, default
 
 
+    def _split_check(self, check):
+        """
+        Return the function name of a check and a list of its arguments, or
+        ``None`` for the arguments if it has no parentheses.
+        """
+        fun_match = self._func_re.match(check)
+        if not fun_match:
+            return check, None
+        fun_name = fun_match.group(1)
+        arg_string = fun_match.group(2)
+        arg_match = self._matchfinder.match(arg_string)
+        if arg_match is None:
+            # Bad syntax
+            raise VdtParamError('Bad syntax in check "%s".' % check)
+        # args may need whitespace removing (before removing quotes)
+        return fun_name, [arg.strip() for arg in self._paramfinder.findall(arg_string)]
+
+
+    def _parse_args(self, args):
+        """Turn the arguments from ``_split_check`` into a list and a dict."""
+        fun_args = []
+        fun_kwargs = {}
+        for arg in args:
+            listmatch = self._list_arg.match(arg)
+            if listmatch:
+                key, val = self._list_handle(listmatch)
+                fun_kwargs[key] = val
+                continue
+            keymatch = self._key_arg.match(arg)
+            if keymatch:
+                val = keymatch.group(2)
+                if not val in ("'None'", '"None"'):
+                    # Special case a quoted None
+                    val = self._unquote(val)
+                fun_kwargs[keymatch.group(1)] = val
+                continue
+            
+            fun_args.append(self._unquote(arg))
+        return fun_args, fun_kwargs
+
+
     def _unquote(self, val):
         """Unquote a value if necessary."""
         if (len(val) >= 2) and (val[0] in ("'", '"')) and (val[0] == val[-1]):
@@ -0,0 +1,313 @@
+# watch.py
+# Reload config files in the background when they change.
+
+# This software is licensed under the terms of the BSD license.
+# http://opensource.org/licenses/BSD-3-Clause
+
+# ConfigObj 5 - main repository for documentation and issue tracking:
+# https://github.com/DiffSK/configobj
+
+"""
+    A ``ConfigWatcher`` reloads a ``ConfigObj`` in a background thread when
+    its file changes, and calls back with the values that changed.
+
+    The file is watched with inotify where it is available (Linux), and by
+    polling its ``os.stat`` otherwise. A burst of changes, like an editor
+    saving a file, is reloaded once after the file has been quiet for
+    ``debounce`` seconds.
+
+    The config is reloaded with ``reload(incremental=True)``, so only the
+    sections that changed are parsed again, and references to sections stay
+    valid. The callbacks are called with the set of ``(path, key)`` that
+    changed. If the file has errors the config is left as it was, and the
+    error is passed to ``errback``. ::
+
+        watcher = ConfigWatcher(config, callback=print)
+        watcher.start()
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+
+
+__all__ = ('ConfigWatcher',)
+
+
+# inotify flags, from <sys/inotify.h>
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# the events that can change the file, in the directory holding it -
+# editors often replace the file rather than writing to it
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+              IN_MOVED_TO | IN_CREATE | IN_DELETE)
+
+# struct inotify_event, without the name that follows it
+EVENT = struct.Struct('iIII')
+
+_libc = None
+
+
+def _inotify_functions():
+    """
+    Return ``(inotify_init1, inotify_add_watch)`` from the C library, or
+    ``None`` if inotify isn't available.
+    """
+    global _libc
+    if not sys.platform.startswith('linux'):
+        return None
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                                use_errno=True)
+        except OSError:
+            return None
+    try:
+        return (_libc.inotify_init1, _libc.inotify_add_watch)
+    except AttributeError:
+        return None
+
+
+class ConfigWatcher(object):
+    """
+    Reload a ``ConfigObj`` in a background thread when its file changes.
+
+    * ``callback`` is called with the set of ``(path, key)`` that changed
+      after each reload that changed something. More can be added with
+      ``add_callback``.
+    * ``interval`` is how often, in seconds, the file is checked when it has
+      to be polled.
+    * ``debounce`` is how long, in seconds, the file must be left alone
+      before it is reloaded.
+    * ``errback`` is called with the exception when reloading fails, or a
+      callback raises one. By default the traceback is printed.
+    * ``inotify=False`` polls the file even if inotify is available.
+
+    Hold ``lock`` to read the config without it being reloaded part way.
+    """
+
+    def __init__(self, config, callback=None, interval=1.0, debounce=0.1,
+                 errback=None, inotify=True):
+        if not isinstance(config.filename, str):
+            raise ValueError('The config has no filename to watch.')
+        self.config = config
+        self.filename = os.path.abspath(config.filename)
+        self.interval = interval
+        self.debounce = debounce
+        self.errback = errback
+        self.inotify = inotify
+        self.lock = threading.RLock()
+        # ``'inotify'`` or ``'poll'``, once started
+        self.method = None
+        # the exception from the last reload, if it failed
+        self.error = None
+        self._callbacks = []
+        if callback is not None:
+            self._callbacks.append(callback)
+        self._thread = None
+        self._stopping = threading.Event()
+        # the end of the pipe written to wake the inotify thread
+        self._wake = None
+        self._last = None
+
+
+    def add_callback(self, callback):
+        """Call ``callback`` with the changes after each reload."""
+        self._callbacks.append(callback)
+
+
+    def remove_callback(self, callback):
+        """Stop calling ``callback``."""
+        self._callbacks.remove(callback)
+
+
+    def start(self):
+        """Start watching the file, in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError('The watcher has already been started.')
+        self._last = self._stat()
+        # each thread gets its own event and file descriptors, which it
+        # closes itself, so one stopped from a callback can still be
+        # finishing when the next is started
+        self._stopping = threading.Event()
+        fds = self._start_inotify() if self.inotify else None
+        if fds is None:
+            self.method = 'poll'
+        else:
+            self.method = 'inotify'
+            self._wake = fds[2]
+        self._thread = threading.Thread(target=self._run,
+                                        args=(self._stopping, fds),
+                                        daemon=True,
+                                        name='ConfigWatcher %s' % self.filename)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        """
+        Stop watching the file, waiting for the thread to finish.
+
+        Called from a callback, the thread finishes once the callbacks
+        return.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        if self._wake is not None:
+            os.write(self._wake, b'x')
+            os.close(self._wake)
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = self._wake = None
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+    def _stat(self):
+        """Return what changes when the file is written, or ``None`` if it's missing."""
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+    def _start_inotify(self):
+        """
+        Watch the directory of the file with inotify, if possible.
+
+        Returns ``(inotify_fd, wake_read, wake_write)``, or ``None``.
+        """
+        functions = _inotify_functions()
+        if functions is None:
+            return None
+        (inotify_init1, inotify_add_watch) = functions
+        fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            # most likely out of watches
+            return None
+        directory = os.path.dirname(self.filename)
+        if inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return (fd,) + os.pipe()
+
+
+    def _run(self, stopping, fds):
+        if fds is None:
+            self._poll(stopping)
+            return
+        (inotify_fd, wake) = fds[:2]
+        try:
+            self._watch(inotify_fd, wake)
+        finally:
+            os.close(inotify_fd)
+            os.close(wake)
+
+
+    def _poll(self, stopping):
+        """Check the file every ``interval`` seconds."""
+        while not stopping.wait(self.interval):
+            if self._stat() == self._last:
+                continue
+            # wait for the file to stop changing
+            latest = self._stat()
+            while not stopping.wait(self.debounce):
+                current = self._stat()
+                if current == latest:
+                    break
+                latest = current
+            else:
+                return
+            self._reload()
+
+
+    def _watch(self, inotify_fd, wake):
+        """Wait for inotify events for the file, until ``wake`` is readable."""
+        fds = [inotify_fd, wake]
+        while True:
+            ready = select.select(fds, [], [])[0]
+            if wake in ready:
+                return
+            if not self._read_events(inotify_fd):
+                continue
+            # wait for the file to stop changing
+            deadline = time.monotonic() + self.debounce
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                ready = select.select(fds, [], [], timeout)[0]
+                if wake in ready:
+                    return
+                if ready and self._read_events(inotify_fd):
+                    deadline = time.monotonic() + self.debounce
+            if self._stat() != self._last:
+                self._reload()
+
+
+    def _read_events(self, inotify_fd):
+        """Read the waiting inotify events, returning whether any were for the file."""
+        name = os.fsencode(os.path.basename(self.filename))
+        try:
+            data = os.read(inotify_fd, 65536)
+        except BlockingIOError:
+            return False
+        found = False
+        offset = 0
+        while offset < len(data):
+            length = EVENT.unpack_from(data, offset)[3]
+            offset += EVENT.size
+            if data[offset:offset + length].rstrip(b'\0') == name:
+                found = True
+            offset += length
+        return found
+
+
+    def _reload(self):
+        """Reload the config, and call the callbacks with the changes."""
+        # changes made while reloading are picked up next time
+        self._last = self._stat()
+        try:
+            with self.lock:
+                changed = self.config.reload(incremental=True)
+        except Exception as e:
+            self.error = e
+            self._handle_error(e)
+            return
+        self.error = None
+        if not changed:
+            return
+        for callback in list(self._callbacks):
+            try:
+                callback(changed)
+            except Exception as e:
+                self._handle_error(e)
+
+
+    def _handle_error(self, error):
+        if self.errback is not None:
+            self.errback(error)
+        else:
+            traceback.print_exception(type(error), error, error.__traceback__)
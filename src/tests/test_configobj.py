@@ -1,6 +1,8 @@
 # coding=utf-8
 from __future__ import unicode_literals
+import json
 import os
+import pickle
 import re
 
 from codecs import BOM_UTF8
@@ -11,7 +13,7 @@ import pytest
 import io
 
 import configobj as co
-from configobj import ConfigObj, flatten_errors, ReloadError, DuplicateError, MissingInterpolationOption, InterpolationLoopError, ConfigObjError
+from configobj import ConfigObj, FrozenSection, KeyList, flatten_errors, ReloadError, ReadOnlyError, DuplicateError, MissingInterpolationOption, InterpolationLoopError, ConfigObjError
 from configobj.validate import Validator, VdtValueTooSmallError
 
 
@@ -646,6 +648,85 @@ class TestValueErrors(object):
         assert empty_cfg.as_float('b') == 3.2
 
 
+class TestTypedValues(object):
+    def test_conversions_are_remembered(self):
+        c = ConfigObj(['flag = on', 'port = 80', 'ratio = 0.5', 'host = a'])
+        assert c.as_bool('flag') is True
+        assert c.as_int('port') == 80
+        assert c.as_float('ratio') == 0.5
+        assert c.as_list('host') == ['a']
+        assert c._typed == {('bool', 'flag'): True, ('int', 'port'): 80,
+                            ('float', 'ratio'): 0.5, ('list', 'host'): ('a',)}
+        # the same result, without converting again
+        c._typed['bool', 'flag'] = 'remembered'
+        assert c.as_bool('flag') == 'remembered'
+        # as_list returns a new list every time
+        first = c.as_list('host')
+        first.append('b')
+        assert c.as_list('host') == ['a']
+
+    def test_changes_are_noticed(self):
+        c = ConfigObj(['a = 1', 'b = 0'], configspec=['a = integer(default=2)'])
+        assert c.as_int('a') == 1
+        c['a'] = '3'
+        assert c.as_int('a') == 3
+        c.rename('a', 'c')
+        assert c.as_int('c') == 3
+        with pytest.raises(KeyError):
+            c.as_int('a')
+        c.rename('b', 'a')
+        assert c.as_bool('a') is False
+        del c['a']
+        with pytest.raises(KeyError):
+            c.as_bool('a')
+        c['a'] = 'yes'
+        assert c.as_bool('a') is True
+        c.default_values['a'] = '0'
+        c.restore_default('a')
+        assert c.as_bool('a') is False
+        c.clear()
+        c['a'] = '5'
+        assert c.as_int('a') == 5
+
+    def test_reload(self, tmpdir):
+        path = tmpdir.join('typed.ini')
+        path.write('port = 80\n[server]\n    debug = off\n')
+        c = ConfigObj(str(path))
+        server = c['server']
+        assert c.as_int('port') == 80
+        assert server.as_bool('debug') is False
+        path.write('port = 81\n[server]\n    debug = on\n')
+        c.reload(incremental=True)
+        assert server.as_bool('debug') is True
+        assert c.as_int('port') == 81
+        path.write('port = 82\n')
+        c.reload()
+        assert c.as_int('port') == 82
+
+    def test_values_that_can_change_are_converted_again(self):
+        c = ConfigObj(['home = /usr', 'path = %(home)s/bin', 'hosts = a, b'])
+        assert c.as_list('path') == ['/usr/bin']
+        # the value interpolated from changes without ``path`` being set
+        c['home'] = '/opt'
+        assert c.as_list('path') == ['/opt/bin']
+        assert c.as_list('hosts') == ['a', 'b']
+        c['hosts'].append('c')
+        assert c.as_list('hosts') == ['a', 'b', 'c']
+        c.interpolation = False
+        assert c.as_list('path') == ['%(home)s/bin']
+        c.interpolation = True
+        assert c.as_list('path') == ['/opt/bin']
+        assert c._typed is None
+
+    def test_lazy_and_overlay(self):
+        c = ConfigObj(['[section]', '    flag = yes'], lazy=True)
+        assert c['section'].as_bool('flag') is True
+        overlay = c.overlay()
+        assert overlay['section'].as_bool('flag') is True
+        overlay['section']['flag'] = 'no'
+        assert overlay['section'].as_bool('flag') is False
+        assert c['section'].as_bool('flag') is True
+
 
 def test_error_types():
     # errors that don't have interesting messages
@@ -722,6 +803,66 @@ class TestSectionBehavior(object):
                 'CLIENT1section': {'CLIENT1key': 'CLIENT1value'}
             }
 
+    def test_key_lists(self):
+        cfg = ConfigObj(['a = 1', 'b = 2', 'c = 3', '[s]', '[t]'])
+        assert isinstance(cfg.scalars, KeyList)
+        assert cfg.scalars == ['a', 'b', 'c']
+        assert cfg.sections == ['s', 't']
+        assert 'b' in cfg.scalars and 'x' not in cfg.scalars
+        assert cfg.scalars + cfg.sections == ['a', 'b', 'c', 's', 't']
+        assert repr(cfg.scalars) == "['a', 'b', 'c']"
+
+        del cfg['b']
+        cfg['d'] = '4'
+        assert cfg.scalars == ['a', 'c', 'd']
+        assert cfg.scalars[-1] == 'd'
+        assert cfg.scalars.index('c') == 1
+        cfg.scalars.append('a')
+        assert cfg.scalars == ['c', 'd', 'a']
+        cfg.scalars.insert(0, 'a')
+        assert cfg.scalars == ['a', 'c', 'd']
+        cfg.scalars.sort(reverse=True)
+        assert list(cfg) == ['d', 'c', 'a', 's', 't']
+        with pytest.raises(ValueError):
+            cfg.scalars.remove('x')
+        assert pickle.loads(pickle.dumps(cfg.scalars)) == ['d', 'c', 'a']
+
+        # duplicates are dropped
+        assert KeyList(['a', 'b', 'a']) == ['a', 'b']
+
+    def test_key_lists_are_lists(self):
+        cfg = ConfigObj(['a = 1', 'b = 2', 'c = 3', '[s]'])
+        assert isinstance(cfg.scalars, list)
+        assert json.dumps(cfg.scalars) == '["a", "b", "c"]'
+        assert cfg.scalars * 2 == ['a', 'b', 'c', 'a', 'b', 'c']
+        assert cfg.scalars == ('a', 'b', 'c')
+        assert cfg.scalars != ('a', 'b')
+        assert sorted(cfg.scalars, reverse=True) == ['c', 'b', 'a']
+        assert list(reversed(cfg.scalars)) == ['c', 'b', 'a']
+        # the keys can be deleted while looping over them
+        for key in cfg.scalars:
+            del cfg[key]
+        assert cfg.scalars == []
+        assert list(cfg) == ['s']
+        for key in cfg.sections:
+            cfg.rename(key, 't')
+        assert cfg.sections == ['t']
+
+    def test_rename_keeps_order(self):
+        cfg = ConfigObj(['a = 1', 'b = 2', 'c = 3', '[s]', '[t]'])
+        cfg.rename('b', 'x')
+        cfg.rename('s', 'y')
+        assert list(cfg.items()) == [
+            ('a', '1'), ('x', '2'), ('c', '3'), ('y', {}), ('t', {})]
+        cfg.rename('x', 'z')
+        cfg['e'] = '5'
+        assert cfg.scalars == ['a', 'z', 'c', 'e']
+
+        # lists set by the caller still work
+        cfg.scalars = ['e', 'z', 'c', 'a']
+        cfg.rename('c', 'w')
+        assert cfg.scalars == ['e', 'z', 'w', 'a']
+
 
 def test_reset_a_configobj():
 
@@ -973,6 +1114,94 @@ class TestInterpolation(object):
         assert (test_sec['sub-section']['sub-sub-section']['convoluted'] ==
                 '$foo + 123 + 123 + $foo + 123 + $foo')
 
+    def test_cached_interpolation(self, config_parser_cfg):
+        test_section = config_parser_cfg['section']
+        assert test_section['b'] == r'c:\\home\\some path\\file.py'
+        engine = test_section._interpolation_engine
+        assert list(engine._plans.values()) == [test_section['b']]
+        # changing a key that wasn't looked up keeps the result
+        config_parser_cfg['unrelated'] = 'x'
+        assert len(engine._plans) == 1
+
+    @pytest.mark.parametrize('change, expected', [
+        # the value itself
+        (lambda cfg: cfg['section'].__setitem__('b', '%(datadir)s!'),
+         r'c:\\silly_test!'),
+        # the value it refers to
+        (lambda cfg: cfg['DEFAULT'].__setitem__('userdir', 'd:'),
+         r'd:\\some path\\file.py'),
+        # a nearer value hiding it
+        (lambda cfg: cfg['section'].__setitem__('userdir', 'e:'),
+         r'e:\\some path\\file.py'),
+        (lambda cfg: cfg['section']['DEFAULT'].__setitem__('userdir', 'f:'),
+         r'f:\\some path\\file.py'),
+        (lambda cfg: cfg['section']['DEFAULT'].rename('datadir', 'userdir'),
+         r'c:\\silly_test\\some path\\file.py'),
+        # a DEFAULT section added or removed
+        (lambda cfg: cfg['section'].__setitem__('DEFAULT', {'userdir': 'g:'}),
+         r'g:\\some path\\file.py'),
+        (lambda cfg: cfg.__delitem__('DEFAULT'), None),
+        (lambda cfg: cfg['DEFAULT'].clear(), None),
+    ])
+    def test_cache_invalidation(self, config_parser_cfg, change, expected):
+        test_section = config_parser_cfg['section']
+        assert test_section['b'] == r'c:\\home\\some path\\file.py'
+        change(config_parser_cfg)
+        if expected is None:
+            with pytest.raises(MissingInterpolationOption):
+                test_section['b']
+        else:
+            assert test_section['b'] == expected
+
+    def test_interpolated(self, config_parser_cfg, template_cfg):
+        del config_parser_cfg['section']['d']
+        del config_parser_cfg['section']['e']
+        del config_parser_cfg['DEFAULT']['c']
+        del config_parser_cfg['DEFAULT']['d']
+        for cfg in (config_parser_cfg, template_cfg):
+            expected = cfg.dict()
+            for section in (cfg, cfg['section']):
+                if hasattr(section, '_interpolation_engine'):
+                    del section._interpolation_engine
+            assert cfg.interpolated() == expected
+            # and the values are cached
+            assert cfg['section']._interpolation_engine._plans
+        template_cfg.interpolation = False
+        assert template_cfg.interpolated() == template_cfg.dict()
+
+    def test_resolve_all_errors(self, config_parser_cfg):
+        with pytest.raises(InterpolationLoopError) as excinfo:
+            config_parser_cfg.resolve_all()
+        assert excinfo.value.cycle == [
+            (('DEFAULT',), 'c'), (('DEFAULT',), 'd'), (('DEFAULT',), 'c')]
+        assert (str(excinfo.value) == 'interpolation loop detected in value '
+                '"c": DEFAULT/c -> DEFAULT/d -> DEFAULT/c.')
+        del config_parser_cfg['DEFAULT']['c']
+        with pytest.raises(MissingInterpolationOption) as excinfo:
+            config_parser_cfg.resolve_all()
+        assert (str(excinfo.value) ==
+                'missing option "c" in interpolation.')
+        with pytest.raises(InterpolationLoopError) as excinfo:
+            config_parser_cfg['section']['e']
+        assert excinfo.value.cycle is None
+
+    def test_cache_invalidation_on_reload(self, cfg_contents):
+        path = cfg_contents('''
+            base = /opt
+            [s]
+            path = %(base)s/lib
+            ''')
+        cfg = ConfigObj(path)
+        assert cfg['s']['path'] == '/opt/lib'
+        with open(path, 'w') as h:
+            h.write('base = /usr\n[s]\npath = %(base)s/lib\n')
+        cfg.reload(incremental=True)
+        assert cfg['s']['path'] == '/usr/lib'
+        with open(path, 'w') as h:
+            h.write('base = /srv\n[s]\npath = %(base)s/lib\n')
+        cfg.reload()
+        assert cfg['s']['path'] == '/srv/lib'
+
 
 class TestQuotes(object):
     """
@@ -995,7 +1224,43 @@ class TestQuotes(object):
     def test_handle_unallowed_open_quote(self, i):
         open_quote = ' "\' '
         self.assert_bad_quote_message(i, open_quote, multiline=False)
-        
+
+    @pytest.mark.parametrize('list_values', [True, False])
+    def test_quick_quoting_agrees(self, list_values):
+        c = ConfigObj(list_values=list_values)
+        values = ['', 'plain', 'True', '/usr/local/bin', ' padded', 'a,b',
+                  'hash # here', "it's", 'say "hi"', '\'both" kinds',
+                  'two\nlines', "both ''' and \"\"\"\nkinds", '[x]', '\t']
+        for multiline in (True, False):
+            for value in values:
+                try:
+                    expected = c._quote_value(value, multiline)
+                except ConfigObjError:
+                    with pytest.raises(ConfigObjError):
+                        c._quote(value, multiline)
+                    continue
+                assert c._quote(value, multiline) == expected
+
+    def test_quoting_memo_is_per_write(self):
+        c = ConfigObj(['a = "x y"', 'b = "x y"', 'c = True'])
+        assert c.write() == ['a = x y', 'b = x y', 'c = True']
+        c.list_values = False
+        c['a'] = 'x, y'
+        assert c.write() == ['a = x, y', 'b = x y', 'c = True']
+
+    def test_nested_writes(self, monkeypatch):
+        monkeypatch.setattr(co, 'WRITE_CHUNK_SIZE', 10)
+        c = ConfigObj(['a%d = "x, y"' % i for i in range(20)])
+        c.newlines = '\n'
+        expected = ''.join(line + '\n' for line in c.write()).encode('ascii')
+        chunks = c.write_iter()
+        written = [next(chunks)]
+        # a write while another is suspended doesn't disturb it
+        assert c.write() == expected.decode('ascii').splitlines()
+        assert b''.join(c.write_iter()) == expected
+        written.extend(chunks)
+        assert b''.join(written) == expected
+
     def test_handle_multiple_bad_quote_values(self):
         testconfig5 = '''
         config = "hello   # comment
@@ -1190,6 +1455,63 @@ class TestComments(object):
         assert c['section'].comments == { 'key': ['# key comment']}
         assert c.final_comment == ['', '# final comment', '# with two lines']
 
+    def test_only_comments_are_stored(self, comment_filled_cfg):
+        c = ConfigObj(comment_filled_cfg)
+        # a key without comments isn't stored, but still looks up as empty
+        assert dict(dict.items(c.comments)) == {
+            'section': ['# section comment']}
+        assert 'key' in c.comments
+        assert len(c.comments) == 2
+        assert c.comments.get('missing') is None
+        with pytest.raises(KeyError):
+            c.comments['missing']
+        assert c['section'].inline_comments == {'key': None}
+
+        # the empty list is kept, so it can be changed in place
+        c.comments['key'].append('# added')
+        c.filename = None
+        c['new'] = 'value'
+        c.inline_comments['new'] = 'a new value'
+        assert c.comments['new'] == []
+        assert c.write()[3:5] == ['# added', 'key = value']
+        assert 'new = value # a new value' in c.write()
+
+        c.rename('new', 'renamed')
+        assert c.inline_comments['renamed'] == 'a new value'
+        del c['renamed']
+        assert 'renamed' not in c.inline_comments
+        c['renamed'] = 'value'
+        # as a member set from code always had
+        assert c.inline_comments['renamed'] == ''
+
+    def test_new_members_have_empty_inline_comments(self):
+        c = ConfigObj(['a = 1', '[s]'], lazy=True)
+        c['b'] = '2'
+        c['t'] = {'c': '3'}
+        assert c.inline_comments == {'a': None, 's': None, 'b': '', 't': ''}
+        assert c['t'].inline_comments == {'c': ''}
+        assert c['s'].inline_comments == {}
+
+    def test_user_attributes(self):
+        c = ConfigObj(['[s]'])
+        section = c['s']
+        assert vars(section) == {}
+        section.tag = 'mine'
+        c.tag = 'root'
+        assert vars(section) == {'tag': 'mine'}
+        copied = pickle.loads(pickle.dumps(c))
+        assert copied.tag == 'root'
+        assert copied['s'].tag == 'mine'
+
+    def test_pickle_comments(self, comment_filled_cfg):
+        c = ConfigObj(comment_filled_cfg)
+        c.comments['key'].append('# added')
+        new = pickle.loads(pickle.dumps(c))
+        assert new.comments == c.comments
+        assert new['section'].inline_comments == c['section'].inline_comments
+        new.filename = c.filename = None
+        assert new.write() == c.write()
+
 
 
 def test_overwriting_filenames(a, b, i):
@@ -1284,3 +1606,1281 @@ class TestEdgeCasesWhenWritingOut(object):
         c = ConfigObj(cfg, unrepr=True)
         assert repr(c) == "ConfigObj({'thing': {'a': 1}})"
         assert c.write() == ["thing = {'a': 1}"]
+
+
+class TestStreamingWrite(object):
+    @pytest.fixture
+    def cfg(self):
+        cfg = ConfigObj(['# top', 'a = %(b)s', 'b = 1'])
+        for i in range(200):
+            cfg['section%d' % i] = {'key': 'value %d' % i, 'sub': {'x': 'y'}}
+        cfg.final_comment = ['# end']
+        cfg.newlines = '\n'
+        return cfg
+
+    def written(self, cfg, **kwargs):
+        out = io.BytesIO()
+        cfg.write(out, **kwargs)
+        return out.getvalue()
+
+    def test_chunks(self, cfg, monkeypatch):
+        monkeypatch.setattr(co, 'WRITE_CHUNK_SIZE', 100)
+        chunks = list(cfg.write_iter())
+        assert len(chunks) > 10
+        assert max(len(chunk) for chunk in chunks) < 200
+        assert b''.join(chunks) == self.written(cfg)
+        assert b''.join(chunks).decode('ascii').split('\n')[:-1] == cfg.write()
+        # interpolation is switched back on after writing
+        assert cfg['a'] == '1'
+
+    def test_stream(self, cfg, tmpdir):
+        assert self.written(cfg, stream=True) == self.written(cfg)
+        path = tmpdir.join('out.ini')
+        cfg.filename = str(path)
+        cfg.write(stream=True)
+        assert path.read_binary() == self.written(cfg)
+
+    def test_encoding(self):
+        cfg = ConfigObj(['a = é', 'b = c'], encoding='utf_16')
+        cfg.newlines = '\n'
+        output = b''.join(cfg.write_iter())
+        # only one BOM, at the start
+        assert output == 'a = é\nb = c\n'.encode('utf_16')
+        cfg = ConfigObj(['a = b'], encoding='utf-8')
+        cfg.BOM = True
+        assert b''.join(cfg.write_iter('\r\n')) == BOM_UTF8 + b'a = b\r\n'
+        assert b''.join(ConfigObj().write_iter('\n')) == b'\n'
+
+    def test_interpolation_restored(self, cfg):
+        chunks = cfg.write_iter()
+        next(chunks)
+        chunks.close()
+        assert cfg['a'] == '1'
+
+    def test_interpolation_while_suspended(self, cfg, monkeypatch):
+        monkeypatch.setattr(co, 'WRITE_CHUNK_SIZE', 100)
+        expected = self.written(cfg)
+        first = cfg.write_iter()
+        chunks = [next(first)]
+        assert cfg['a'] == '1'
+        second = cfg.write_iter()
+        other = [next(second)]
+        assert cfg['a'] == '1'
+        chunks.extend(first)
+        other.extend(second)
+        assert b''.join(chunks) == b''.join(other) == expected
+        assert cfg.interpolation is True
+        assert cfg['a'] == '1'
+
+    def test_read_only(self, cfg):
+        cfg = ConfigObj(cfg.write(), read_only=True)
+        with pytest.raises(ReadOnlyError):
+            cfg.write_iter()
+        with pytest.raises(ReadOnlyError):
+            cfg.write(io.BytesIO(), stream=True)
+
+
+class TestAtomicWrite(object):
+    @pytest.fixture
+    def cfg(self, tmpdir):
+        path = tmpdir.join('config.ini')
+        path.write('a = 1\n[s]\nb = 2\n')
+        return ConfigObj(str(path))
+
+    def test_write(self, cfg, tmpdir):
+        cfg['a'] = '3'
+        cfg.write(atomic=True)
+        assert ConfigObj(cfg.filename) == cfg
+        assert os.listdir(str(tmpdir)) == ['config.ini']
+        with pytest.raises(ValueError):
+            cfg.write(io.BytesIO(), atomic=True)
+
+    def test_needs_a_filename(self, cfg):
+        for options in ({'atomic': True}, {'fsync': True},
+                        {'atomic': True, 'fsync': True}):
+            with pytest.raises(ValueError):
+                cfg.write(section=cfg['s'], **options)
+            with pytest.raises(ValueError):
+                cfg.write(io.BytesIO(), **options)
+            with pytest.raises(ValueError):
+                ConfigObj(['a = 1']).write(**options)
+        # the file is left alone
+        assert ConfigObj(cfg.filename) == cfg
+
+    def test_new_file(self, cfg, tmpdir):
+        cfg.filename = str(tmpdir.join('new.ini'))
+        cfg.write(atomic=True, stream=True)
+        with open(str(tmpdir.join('plain.ini')), 'w'):
+            pass
+        assert (os.stat(cfg.filename).st_mode ==
+                os.stat(str(tmpdir.join('plain.ini'))).st_mode)
+        assert ConfigObj(cfg.filename) == cfg
+
+    @pytest.mark.skipif(os.name != 'posix', reason='posix permissions')
+    def test_keeps_permissions(self, cfg):
+        os.chmod(cfg.filename, 0o640)
+        cfg.write(atomic=True)
+        assert os.stat(cfg.filename).st_mode & 0o777 == 0o640
+
+    @pytest.mark.skipif(not hasattr(os, 'symlink'), reason='needs symlinks')
+    def test_symlink(self, cfg, tmpdir):
+        link = str(tmpdir.join('link.ini'))
+        os.symlink(cfg.filename, link)
+        cfg.filename = link
+        cfg['a'] = '4'
+        cfg.write(atomic=True)
+        assert os.path.islink(link)
+        assert ConfigObj(str(tmpdir.join('config.ini')))['a'] == '4'
+
+    def test_failure_keeps_file(self, cfg, tmpdir, monkeypatch):
+        def failing(newline):
+            yield b'a = 5\n'
+            raise RuntimeError('boom')
+        monkeypatch.setattr(cfg, '_write_chunks', failing)
+        with pytest.raises(RuntimeError):
+            cfg.write(atomic=True, stream=True)
+        assert tmpdir.join('config.ini').read() == 'a = 1\n[s]\nb = 2\n'
+        assert os.listdir(str(tmpdir)) == ['config.ini']
+
+    def test_fsync(self, cfg, monkeypatch):
+        synced = []
+        fsync = os.fsync
+        def recording_fsync(fd):
+            synced.append(fd)
+            fsync(fd)
+        monkeypatch.setattr(os, 'fsync', recording_fsync)
+        cfg.write(atomic=True)
+        assert synced == []
+        cfg.write(atomic=True, fsync=True)
+        # the file, and the directory on platforms that allow it
+        assert len(synced) >= 1
+
+
+class TestKeepFormatting(object):
+    lines = [
+        '# initial',
+        '',
+        'name=fred   # who',
+        'hosts = a,b',
+        '[server]',
+        '  # the port',
+        '  port  =  80',
+        '  text = """one',
+        'two"""',
+        '  [[ limits ]]   # inline',
+        '\tsize=1',
+        '',
+        '# final',
+    ]
+
+    def test_unchanged(self, tmpdir):
+        cfg = ConfigObj(self.lines, keep_formatting=True)
+        assert cfg.write() == self.lines
+        path = tmpdir.join('config.ini')
+        path.write_binary(('\r\n'.join(self.lines) + '\r\n').encode('ascii'))
+        cfg = ConfigObj(str(path), keep_formatting=True)
+        cfg.write()
+        assert path.read_binary() == ('\r\n'.join(self.lines) +
+                                      '\r\n').encode('ascii')
+        # without the option the config is written in the usual format
+        assert ConfigObj(self.lines).write()[2:4] == [
+            'name = fred  # who', 'hosts = a, b']
+
+    def test_changed(self):
+        cfg = ConfigObj(self.lines, keep_formatting=True)
+        cfg['name'] = 'jim'
+        cfg['hosts'].append('c')
+        cfg['server'].comments['port'].append('# http')
+        cfg['server']['limits'].rename('size', 'length')
+        lines = list(self.lines)
+        lines[10] = '    length = 1'
+        lines[2:4] = ['name = jim  # who', 'hosts = a, b, c']
+        lines[5:7] = ['  # the port', '  # http', '  port = 80']
+        assert cfg.write() == lines
+        del cfg['server']
+        cfg['new'] = {'a': 'b'}
+        cfg.inline_comments['hosts'] = None
+        assert cfg.write() == ['# initial', '', 'name = jim  # who',
+                               'hosts = a, b, c', '[new]', '  a = b',
+                               '', '# final']
+
+    def test_lazy(self):
+        cfg = ConfigObj(self.lines, keep_formatting=True, lazy=True)
+        assert cfg.write() == self.lines
+        # the sections were copied without being parsed
+        assert type(dict.__getitem__(cfg, 'server')) is co.LazySection
+        cfg['server']['limits']['size'] = '2'
+        assert cfg.write()[10] == '    size = 2'
+        assert cfg.write()[:10] == self.lines[:10]
+
+    def test_reload(self, tmpdir):
+        path = tmpdir.join('config.ini')
+        path.write('\n'.join(self.lines) + '\n')
+        cfg = ConfigObj(str(path), keep_formatting=True)
+        cfg['name'] = 'jim'
+        lines = list(self.lines)
+        lines[6] = '  port=8080'
+        path.write('\n'.join(lines) + '\n')
+        cfg.reload(incremental=True)
+        cfg.write()
+        lines[2] = 'name = jim  # who'
+        assert path.read() == '\n'.join(lines) + '\n'
+
+
+class TestLexer(object):
+    fixture_dir = os.path.dirname(os.path.abspath(__file__))
+
+    @pytest.fixture(autouse=True, params=['lexer', 'speedups'])
+    def backend(self, request, monkeypatch):
+        if request.param == 'lexer':
+            monkeypatch.setattr(co, '_speedups', None)
+        elif co._speedups is None:
+            pytest.skip('the _speedups extension is not built')
+        return request.param
+
+    def parse(self, infile, **kwargs):
+        """Parse with both engines, returning the trees or the errors."""
+        results = []
+        for parser in co.PARSERS:
+            try:
+                cfg = ConfigObj(infile, parser=parser, **kwargs)
+            except ConfigObjError as e:
+                results.append([(type(err), str(err), err.line_number, err.line)
+                                for err in getattr(e, 'errors', [e])])
+            else:
+                results.append(self.snapshot(cfg))
+        return results
+
+    def snapshot(self, section):
+        state = [dict.items(section), section.scalars, section.sections,
+                 section.comments, section.inline_comments]
+        if section is section.main:
+            state.extend([section.initial_comment, section.final_comment,
+                          section.indent_type, section.newlines])
+        state.extend(self.snapshot(dict.__getitem__(section, name))
+                     for name in section.sections)
+        return state
+
+    def assert_same(self, infile, **kwargs):
+        regex, lexer = self.parse(infile, **kwargs)
+        assert regex == lexer
+
+    @pytest.mark.parametrize('name', sorted(
+        name for name in os.listdir(os.path.dirname(os.path.abspath(__file__)))
+        if name.endswith(('.ini', '.spec'))))
+    @pytest.mark.parametrize('options', [{}, {'list_values': False},
+                                         {'_inspec': True}, {'unrepr': True}])
+    def test_fixture_files(self, name, options):
+        self.assert_same(os.path.join(self.fixture_dir, name), **options)
+
+    def test_fixture_configs(self, testconfig1, testconfig2, testconfig6):
+        for config in (testconfig1, testconfig2, testconfig6):
+            self.assert_same(cfg_lines(config))
+            self.assert_same(cfg_lines(config), list_values=False)
+
+    def test_errors(self):
+        self.assert_same([
+            'a = "unbalanced',
+            '[section',
+            '[[too deep]]',
+            'a = 1, , 2',
+            'b = ,x',
+            '"c" d = 1',
+            'neither',
+            'e = """never closed',
+        ])
+
+    def test_odd_corners(self):
+        self.assert_same([
+            '  = key is a space',
+            '  "open = quote',
+            'a = "x"y", z  # comment',
+            'b = "a",",c',
+            'c = x, y, ',
+            'd = #only a comment',
+            "[ 'quoted' ] # comment",
+            '[[a]] ]',
+            '    [[b]]',
+            '[]]',
+            "['x'y']",
+        ])
+
+    def test_unknown_parser(self):
+        with pytest.raises(ValueError):
+            ConfigObj(parser='fish')
+
+    def test_parser_backend(self, backend):
+        assert ConfigObj(parser='regex').parser_backend == 'regex'
+        assert ConfigObj(parser='lexer').parser_backend == backend
+        default = ConfigObj().parser_backend
+        assert default == ('regex' if backend == 'lexer' else 'speedups')
+
+    def test_all_short_lines(self):
+        # every combination of the syntactically interesting characters
+        import itertools
+        cfg = ConfigObj(parser='lexer')
+        nolist_cfg = ConfigObj(parser='lexer', list_values=False)
+
+        def split(method, value):
+            try:
+                return method(value)
+            except SyntaxError:
+                return SyntaxError
+
+        for c in (cfg, nolist_cfg):
+            lex_line, lex_value = c._parse_methods()
+            for length in range(5):
+                for chars in itertools.product(' a"\',#=[]', repeat=length):
+                    line = ''.join(chars)
+                    value = line.lstrip()
+                    assert (split(c._handle_value, value) ==
+                            split(lex_value, value)), value
+                    if value and value[0] != '#':
+                        assert c._match_line(line) == lex_line(line), line
+
+
+class TestIterparse(object):
+    fixture_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def rebuild(self, events):
+        """Build the nested dict described by a stream of events."""
+        root = {}
+        for event, line_number, path, value in events:
+            section = root
+            for name in path[:-1]:
+                section = section[name]
+            if event == 'start_section':
+                section[path[-1]] = {}
+            elif event == 'keyvalue':
+                if path:
+                    section = section[path[-1]]
+                section[value[0]] = value[1]
+        return root
+
+    def test_events(self):
+        lines = cfg_lines("""
+            # initial
+            a = 1
+            [s]
+                b = '''x
+                y'''  # c
+                [[t]]
+                c = 2, 3
+            [u] # inline
+            """)
+        assert list(co.iterparse(lines)) == [
+            ('comment', 1, (), ''),
+            ('comment', 2, (), '# initial'),
+            ('keyvalue', 3, (), ('a', '1', None)),
+            ('start_section', 4, ('s',), None),
+            ('keyvalue', 5, ('s',), ('b', 'x\n    y', '# c')),
+            ('start_section', 7, ('s', 't'), None),
+            ('keyvalue', 8, ('s', 't'), ('c', ['2', '3'], None)),
+            ('end_section', 9, ('s', 't'), None),
+            ('end_section', 9, ('s',), None),
+            ('start_section', 9, ('u',), '# inline'),
+            ('comment', 10, ('u',), ''),
+            ('end_section', 10, ('u',), None),
+        ]
+
+    @pytest.mark.parametrize('filename', ['conf.ini', 'conf.spec'])
+    def test_matches_configobj(self, filename):
+        path = os.path.join(self.fixture_dir, filename)
+        options = {'list_values': False} if filename.endswith('.spec') else {}
+        assert (self.rebuild(co.iterparse(path, **options)) ==
+                ConfigObj(path, **options).dict())
+
+    def test_sources(self):
+        content = '﻿a = \xe9\r\n[s]\r\nb = 2\r\n'.encode('utf-8')
+        expected = {'a': '\xe9', 's': {'b': '2'}}
+        with NamedTemporaryFile(delete=False) as h:
+            h.write(content)
+        try:
+            assert self.rebuild(co.iterparse(h.name)) == expected
+        finally:
+            os.remove(h.name)
+        assert self.rebuild(co.iterparse(io.BytesIO(content))) == expected
+        assert self.rebuild(co.iterparse(content.splitlines())) == expected
+        text = content.decode('utf-8-sig')
+        assert self.rebuild(co.iterparse(io.StringIO(text))) == expected
+        assert self.rebuild(co.iterparse(tuple(text.splitlines()))) == expected
+
+    def test_missing_file(self):
+        assert list(co.iterparse('does_not_exist.ini')) == []
+        with pytest.raises(IOError):
+            list(co.iterparse('does_not_exist.ini', file_error=True))
+        with pytest.raises(TypeError):
+            list(co.iterparse(42))
+
+    def test_errors(self):
+        lines = cfg_lines("""
+            a = 1
+            [s]]
+            bad line
+            b = '''never closed
+            c = 2
+            [[[t]]]
+            d = "x" y
+            """)
+        events = list(co.iterparse(lines))
+        errors = [value for event, _, _, value in events if event == 'error']
+        with pytest.raises(ConfigObjError) as excinfo:
+            ConfigObj(lines)
+        assert ([(type(e), str(e), e.line_number, e.line) for e in errors] ==
+                [(type(e), str(e), e.line_number, e.line)
+                 for e in excinfo.value.errors])
+        # parsing carries on after a bad multiline value
+        assert ('keyvalue', 6, (), ('c', '2', None)) in events
+
+        with pytest.raises(co.NestingError) as excinfo:
+            list(co.iterparse(lines, raise_errors=True))
+        assert excinfo.value.line_number == 3
+
+    def test_multiline_after_a_bad_one(self):
+        lines = ['a = """never', "b = '''x", "y'''", 'c = 1']
+        events = list(co.iterparse(lines))
+        errors = [value for event, _, _, value in events if event == 'error']
+        with pytest.raises(ConfigObjError) as excinfo:
+            ConfigObj(lines)
+        assert ([(str(e), e.line_number) for e in errors] ==
+                [(str(e), e.line_number) for e in excinfo.value.errors])
+        assert self.rebuild(events) == excinfo.value.config.dict()
+        assert self.rebuild(events) == {'b': 'x\ny', 'c': '1'}
+
+    def test_unrepr(self):
+        lines = ['a = [1, 2]', 'b = """[3,', '4]"""', 'c = nope']
+        events = list(co.iterparse(lines, unrepr=True))
+        assert events[0] == ('keyvalue', 1, (), ('a', [1, 2], ''))
+        assert events[1] == ('keyvalue', 2, (), ('b', [3, 4], ''))
+        assert events[2][0] == 'error'
+        assert isinstance(events[2][3], co.UnreprError)
+
+
+class TestLazy(object):
+    fixture_dir = os.path.dirname(os.path.abspath(__file__))
+
+    config = """
+            # initial
+            a = 1
+            [s]  # inline
+                b = '''x
+            [not a section]
+                y'''
+                # before t
+                [[t]]
+                c = 2, 3
+            # before u
+            [u]
+            d = 4
+            # final
+            """
+
+    @pytest.fixture
+    def lines(self):
+        return cfg_lines(self.config)
+
+    def is_parsed(self, section, name):
+        return type(dict.__getitem__(section, name)) is co.Section
+
+    def test_same_as_eager(self, lines):
+        for infile in [lines] + [os.path.join(self.fixture_dir, name)
+                                 for name in ('conf.ini', 'conf.spec')]:
+            eager = ConfigObj(infile)
+            lazy = ConfigObj(infile, lazy=True)
+            # don't write back to the fixture files
+            eager.filename = lazy.filename = None
+            assert lazy.write() == eager.write()
+            assert lazy.dict() == eager.dict()
+            assert lazy.indent_type == eager.indent_type
+            assert lazy.initial_comment == eager.initial_comment
+            assert lazy.final_comment == eager.final_comment
+
+    def test_parsed_when_used(self, lines):
+        cfg = ConfigObj(lines, lazy=True)
+        assert cfg['a'] == '1'
+        assert not self.is_parsed(cfg, 's')
+        assert not self.is_parsed(cfg, 'u')
+        assert cfg.comments['u'] == ['# before u']
+        assert cfg.inline_comments['s'] == '# inline'
+
+        assert cfg['s']['b'] == 'x\n[not a section]\n    y'
+        assert self.is_parsed(cfg, 's')
+        assert not self.is_parsed(cfg['s'], 't')
+        assert not self.is_parsed(cfg, 'u')
+        assert cfg['s'].comments['t'] == ['    # before t']
+
+        assert 'd' in cfg['u']
+        assert self.is_parsed(cfg, 'u')
+
+    @pytest.mark.parametrize('use', [
+        len, list, dict, repr, str,
+        lambda section: section.keys(),
+        lambda section: section.scalars,
+        lambda section: section == {'c': ['2', '3']},
+        lambda section: section.copy(),
+        lambda section: section.clear(),
+        lambda section: section.setdefault('e', '5'),
+        lambda section: section.__setitem__('e', '5'),
+    ])
+    def test_uses(self, lines, use):
+        cfg = ConfigObj(lines, lazy=True)
+        section = cfg['s']['t']
+        use(section)
+        assert type(section) is co.Section
+        assert section.depth == 2
+        assert section.parent is cfg['s']
+        assert section.main is cfg
+
+    def test_errors(self):
+        lines = ['a = 1', '[s]', 'bad line', 'b = 2', 'b = 3', '[t]', 'c = 4']
+        cfg = ConfigObj(lines, lazy=True)
+        assert cfg['t']['c'] == '4'
+        section = cfg['s']
+        with pytest.raises(ConfigObjError) as excinfo:
+            section.keys()
+        assert [(e.line_number, e.line) for e in excinfo.value.errors] == [
+            (3, 'bad line'), (5, 'b = 3')]
+        # the valid members are kept
+        assert cfg['s'] == {'b': '2'}
+
+        with pytest.raises(co.ParseError):
+            ConfigObj(['[s]', 'bad line'], lazy=True,
+                      raise_errors=True)['s'].keys()
+
+        # errors in the section markers are found when loading
+        with pytest.raises(co.NestingError):
+            ConfigObj(['[s]', 'a = 1', '[[[t]]]'], lazy=True)
+        with pytest.raises(DuplicateError):
+            ConfigObj(['[s]', '[s]'], lazy=True)
+        with pytest.raises(DuplicateError):
+            ConfigObj(['s = 1', '[s]'], lazy=True)
+
+    def test_reload(self, cfg_contents):
+        cfg = ConfigObj(cfg_contents(self.config), lazy=True)
+        cfg['s'].keys()
+        cfg.reload()
+        assert cfg.lazy
+        assert not self.is_parsed(cfg, 's')
+        assert cfg['s']['t']['c'] == ['2', '3']
+
+
+class TestMappedFiles(object):
+
+    def load(self, path, monkeypatch, use_mmap, **kwargs):
+        with monkeypatch.context() as m:
+            if not use_mmap:
+                m.setattr(co, 'mmap', None)
+            cfg = ConfigObj(path, **kwargs)
+        return (cfg.dict(), cfg.BOM, cfg.encoding, cfg.newlines,
+                cfg.initial_comment, cfg.final_comment, cfg.comments)
+
+    @pytest.mark.parametrize('content, encoding', [
+        (b'', None),
+        (BOM_UTF8, None),
+        (b'a = 1\nb = 2', None),
+        (b'# top\r\n[s]\r\n  a = """x\r\ny"""\r\n# end\r\n', None),
+        (b'a = 1\rb = 2\r', None),
+        (BOM_UTF8 + '\n[s]\na = \xe9\n'.encode('utf-8'), None),
+        (BOM_UTF8 + '[s]\na = \xe9\n'.encode('utf-8'), 'utf-8'),
+        ('a = \xe9\n'.encode('latin-1'), 'latin-1'),
+        ('a = \xe9'.encode('utf-16'), None),
+    ])
+    def test_same_as_readlines(self, tmpdir, monkeypatch, content, encoding):
+        path = str(tmpdir.join('test.ini'))
+        with open(path, 'wb') as h:
+            h.write(content)
+        assert (self.load(path, monkeypatch, True, encoding=encoding) ==
+                self.load(path, monkeypatch, False, encoding=encoding))
+
+    def test_decode_error(self, tmpdir):
+        path = str(tmpdir.join('test.ini'))
+        with open(path, 'wb') as h:
+            h.write('a = \xe9\n'.encode('latin-1'))
+        with pytest.raises(UnicodeDecodeError):
+            ConfigObj(path)
+
+
+class TestParseCache(object):
+    config = """
+        # initial
+        a = 1 # inline
+        [s]
+            b = '''x
+            y'''
+            c = 2, 3
+        # final
+        """
+
+    @pytest.fixture
+    def path(self, tmpdir):
+        path = str(tmpdir.join('test.ini'))
+        with open(path, 'wb') as h:
+            h.write(BOM_UTF8 + b'\r\n'.join(cfg_lines(self.config)))
+        return path
+
+    def state(self, cfg):
+        # write to a list, rather than back to the file
+        lines = ConfigObj(cfg).write()
+        return (cfg.dict(), cfg.comments, cfg.inline_comments,
+                cfg['s'].comments, cfg.initial_comment, cfg.final_comment,
+                cfg.indent_type, cfg.newlines, cfg.BOM, cfg.encoding, lines)
+
+    def no_parse(self, monkeypatch):
+        def fail(self, infile):
+            raise AssertionError('parsed')
+        monkeypatch.setattr(ConfigObj, '_parse', fail)
+
+    def test_warm_load(self, path, monkeypatch):
+        cold = ConfigObj(path, cache=True)
+        assert os.path.isfile(os.path.join(os.path.dirname(path),
+                                           '.test.ini.configobj-cache'))
+        self.no_parse(monkeypatch)
+        warm = ConfigObj(path, cache=True)
+        assert self.state(warm) == self.state(cold)
+        assert self.state(warm) == self.state(ConfigObj(path, lazy=True))
+        warm.reload()
+        assert self.state(warm) == self.state(cold)
+
+    def test_indent_type(self, path):
+        assert ConfigObj(path, cache=True, indent_type='\t').indent_type == '\t'
+        assert ConfigObj(path, cache=True).indent_type == '    '
+        assert ConfigObj(path, cache=True, indent_type='\t').indent_type == '\t'
+
+    def test_cache_dir(self, path, tmpdir, monkeypatch):
+        cache_dir = str(tmpdir.join('cache'))
+        cold = ConfigObj(path, cache=cache_dir)
+        assert len(os.listdir(cache_dir)) == 1
+        self.no_parse(monkeypatch)
+        assert self.state(ConfigObj(path, cache=cache_dir)) == self.state(cold)
+
+    def test_invalidation(self, path):
+        ConfigObj(path, cache=True)
+        # a different size and modification time
+        with open(path, 'ab') as h:
+            h.write(b'\r\nd = 4')
+        assert ConfigObj(path, cache=True)['s']['d'] == '4'
+        # the same size and modification time, but different content
+        stat = os.stat(path)
+        with open(path, 'r+b') as h:
+            h.seek(-1, 2)
+            h.write(b'5')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert ConfigObj(path, cache=True)['s']['d'] == '5'
+        # different options
+        assert ConfigObj(path, cache=True, list_values=False)['s']['c'] == '2, 3'
+
+    def test_errors_not_cached(self, tmpdir):
+        path = str(tmpdir.join('bad.ini'))
+        with open(path, 'w') as h:
+            h.write('a = 1\nbad line\n')
+        with pytest.raises(co.ParseError):
+            ConfigObj(path, cache=True)
+        assert os.listdir(str(tmpdir)) == ['bad.ini']
+
+    def test_cache_failures(self, path, tmpdir):
+        # an unusable cache directory is ignored
+        not_a_dir = str(tmpdir.join('file'))
+        open(not_a_dir, 'w').close()
+        assert ConfigObj(path, cache=not_a_dir)['a'] == '1'
+        # as is a damaged cache
+        ConfigObj(path, cache=True)
+        cache_file = os.path.join(os.path.dirname(path),
+                                  '.test.ini.configobj-cache')
+        with open(cache_file, 'r+b') as h:
+            h.truncate(h.seek(0, 2) // 2)
+        assert ConfigObj(path, cache=True)['s']['c'] == ['2', '3']
+
+
+class TestIncrementalReload(object):
+    config = """
+            # initial
+            a = 1
+            [s]
+                b = 2
+                [[t]]
+                c = 3
+            [u]
+                d = 4
+            """
+
+    def rewrite(self, path, config):
+        with open(path, 'wb') as h:
+            h.write(b'\n'.join(cfg_lines(config)))
+
+    @pytest.mark.parametrize('lazy', [False, True])
+    def test_changes(self, cfg_contents, lazy):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path, lazy=lazy)
+        s = cfg['s']
+        self.rewrite(path, """
+            # initial
+            a = 1
+            [s]
+                b = 5
+                e = 6
+            [u]
+                d = 4
+            [v]
+                f = 7
+            """)
+        changed = cfg.reload(incremental=True)
+        assert changed == set([
+            (('s',), 'b'), (('s',), 'e'), (('s',), 't'), (('s', 't'), 'c'),
+            ((), 'v'), (('v',), 'f')])
+        assert cfg['s'] is s
+        if lazy:
+            # unchanged sections aren't parsed
+            assert type(dict.__getitem__(cfg, 'u')) is co.LazySection
+        assert cfg == ConfigObj(path)
+        assert cfg.sections == ['s', 'u', 'v']
+
+    def test_markers_the_scan_rejects(self, cfg_contents, monkeypatch):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path)
+        sections = (cfg['s'], cfg['s']['t'], cfg['u'])
+        self.rewrite(path, self.config.replace('d = 4', 'd = 5')
+                     .replace('c = 3', '[[v]]'))
+        # the scan is stricter than ``_parse``: the whole file is parsed
+        # and applied in place
+        monkeypatch.setattr(cfg, '_scan_sections', lambda infile: None)
+        read = []
+        read_file = cfg._read_file
+        monkeypatch.setattr(cfg, '_read_file',
+                            lambda infile: read.append(infile) or
+                                           read_file(infile))
+        changed = cfg.reload(incremental=True)
+        assert len(read) == 1
+        assert changed == set([(('u',), 'd'), (('s', 't'), 'c'),
+                               (('s',), 'v')])
+        assert cfg == ConfigObj(path)
+        assert cfg['s'] is sections[0]
+        assert cfg['s']['t'] is sections[1]
+        assert cfg['u'] is sections[2]
+        assert cfg['u']['d'] == '5'
+        assert cfg.initial_comment == ['', '# initial']
+        # and the next reload compares every section
+        monkeypatch.undo()
+        self.rewrite(path, self.config)
+        assert cfg.reload(incremental=True) == set([
+            (('u',), 'd'), (('s', 't'), 'c'), (('s',), 'v')])
+        assert cfg == ConfigObj(path)
+
+    def test_comments(self, cfg_contents):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path)
+        self.rewrite(path, """
+            # new initial
+            a = 1  # inline
+            # before s
+            [s]
+                b = 2
+                [[t]]
+                c = 3
+            [u]
+                d = 4
+            # final
+            """)
+        assert cfg.reload(incremental=True) == set()
+        assert cfg.initial_comment == ['', '# new initial']
+        assert cfg.final_comment == ['# final']
+        assert cfg.inline_comments['a'] == '# inline'
+        assert cfg.comments['s'] == ['# before s']
+
+    def test_unchanged_sections_kept(self, cfg_contents):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path)
+        cfg['u']['d'] = 'changed in memory'
+        self.rewrite(path, self.config.replace('a = 1', 'a = 2'))
+        assert cfg.reload(incremental=True) == set([((), 'a')])
+        assert cfg['u']['d'] == 'changed in memory'
+
+    def test_defaults_kept(self, cfg_contents):
+        path = cfg_contents(self.config)
+        configspec = cfg_contents("""
+            a = integer
+            [s]
+                b = integer
+                x = integer(default=10)
+            """)
+        cfg = ConfigObj(path, configspec=configspec)
+        assert cfg.validate(Validator())
+        self.rewrite(path, self.config.replace('b = 2', 'b = 5'))
+        assert cfg.reload(incremental=True) == set([(('s',), 'b')])
+        assert cfg['s']['x'] == 10
+        assert cfg['s'].defaults == ['x']
+        assert cfg.validate(Validator())
+        assert cfg['s']['b'] == 5
+
+    def test_errors(self, cfg_contents):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path)
+        before = cfg.dict()
+        for config in ("""
+                a = 2
+                [s]
+                    b = 2
+                    b = 3
+                """, """
+                a = 2
+                [s]
+                [s]
+                """, """
+                a = 2
+                [s]
+                    t = 1
+                    [[t]]
+                """):
+            self.rewrite(path, config)
+            with pytest.raises(DuplicateError):
+                cfg.reload(incremental=True)
+            assert cfg.dict() == before
+
+
+class TestReadOnly(object):
+    config = """
+        # initial
+        a = 1 # inline
+        # before s
+        [s] # inline s
+            # before b
+            b = '''x
+            y''' # inline b
+            c = 2, 3
+            [[t]]
+                d = 4
+        # final
+        """
+
+    def check(self, cfg):
+        assert cfg.dict() == {
+            'a': '1', 's': {'b': 'x\n    y', 'c': ['2', '3'], 't': {'d': '4'}}}
+        assert cfg.initial_comment == []
+        assert cfg.final_comment == []
+        assert cfg.comments == {'a': [], 's': []}
+        assert cfg.inline_comments == {'a': None, 's': None}
+        assert cfg['s'].comments == {'b': [], 'c': [], 't': []}
+        assert cfg['s'].inline_comments == {'b': None, 'c': None, 't': None}
+        with pytest.raises(ReadOnlyError):
+            cfg.write()
+        with pytest.raises(ReadOnlyError):
+            cfg.write(io.BytesIO())
+
+    @pytest.mark.parametrize('parser', co.PARSERS)
+    def test_read_only(self, cfg_contents, parser):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path, read_only=True, parser=parser)
+        self.check(cfg)
+        assert ConfigObj(path, parser=parser).comments['s'] == ['# before s']
+
+    def test_lazy(self, cfg_contents):
+        self.check(ConfigObj(cfg_contents(self.config), read_only=True,
+                             lazy=True))
+
+    def test_cache(self, cfg_contents):
+        path = cfg_contents(self.config)
+        self.check(ConfigObj(path, read_only=True, cache=True))
+        self.check(ConfigObj(path, read_only=True, cache=True))
+        # the cache for read only loads isn't used for other loads
+        cfg = ConfigObj(path, cache=True)
+        assert cfg.initial_comment == ['', '# initial']
+        assert cfg['s'].inline_comments['b'] == '# inline b'
+
+    def test_reload(self, cfg_contents):
+        path = cfg_contents(self.config)
+        cfg = ConfigObj(path, read_only=True)
+        cfg.reload()
+        self.check(cfg)
+        with open(path, 'a') as h:
+            h.write('\n# more\n[u] # inline u\n')
+        assert cfg.reload(incremental=True) == set([((), 'u')])
+        assert cfg.inline_comments['u'] is None
+        assert cfg.final_comment == []
+
+    def test_error_message(self):
+        cfg = ConfigObj(['a = 1'], read_only=True)
+        with pytest.raises(ReadOnlyError) as excinfo:
+            cfg.write()
+        assert 'read_only=True' in str(excinfo.value)
+        assert isinstance(excinfo.value, IOError)
+
+
+class TestFreeze(object):
+    @pytest.fixture
+    def cfg(self):
+        cfg = ConfigObj([
+            'home = /home/fred',
+            'dirs = %(home)s/a, %(home)s/b',
+            'port = 8080',
+            '[server]',
+            '    data = %(home)s/data',
+            '    [[limits]]',
+            '        size = 10',
+            '        ratio = 0.5',
+        ], configspec=[
+            'port = integer',
+            '[server]',
+            '    [[limits]]',
+            '        size = integer',
+            '        ratio = float',
+            '        enabled = boolean(default=True)',
+        ])
+        assert cfg.validate(Validator())
+        return cfg
+
+    def test_freeze(self, cfg):
+        frozen = cfg.freeze()
+        assert isinstance(frozen, FrozenSection)
+        assert frozen == {
+            'home': '/home/fred',
+            'dirs': ('/home/fred/a', '/home/fred/b'),
+            'port': 8080,
+            'server': {
+                'data': '/home/fred/data',
+                'limits': {'size': 10, 'ratio': 0.5, 'enabled': True},
+            },
+        }
+        assert frozen.scalars == ('home', 'dirs', 'port')
+        assert frozen.sections == ('server',)
+        assert list(frozen['server']) == ['data', 'limits']
+        assert isinstance(frozen['server']['limits'], FrozenSection)
+        assert frozen['server']['limits'].name == 'limits'
+        assert frozen.dict() == cfg.interpolated()
+
+        # later changes don't affect the snapshot
+        cfg['home'] = '/home/jim'
+        cfg['server']['limits']['size'] = 20
+        assert frozen['dirs'] == ('/home/fred/a', '/home/fred/b')
+        assert frozen['server']['limits']['size'] == 10
+        assert cfg['server'].freeze()['data'] == '/home/jim/data'
+
+    def test_immutable(self, cfg):
+        frozen = cfg.freeze()
+        limits = frozen['server']['limits']
+        for change in (
+                lambda: limits.__setitem__('size', 1),
+                lambda: limits.__delitem__('size'),
+                lambda: limits.update({'size': 1}),
+                lambda: limits.setdefault('new', 1),
+                lambda: limits.pop('size'),
+                lambda: limits.popitem(),
+                lambda: limits.clear(),
+                lambda: setattr(limits, 'name', 'other')):
+            with pytest.raises(TypeError):
+                change()
+        assert limits == {'size': 10, 'ratio': 0.5, 'enabled': True}
+        assert limits.name == 'limits'
+
+    def test_hash_and_pickle(self, cfg):
+        frozen = cfg.freeze()
+        assert hash(frozen) == hash(cfg.freeze())
+        assert {frozen: 1}[cfg.freeze()] == 1
+        cfg['port'] = 8081
+        assert cfg.freeze() != frozen
+
+        new = pickle.loads(pickle.dumps(frozen))
+        assert isinstance(new['server']['limits'], FrozenSection)
+        assert new == frozen
+        assert hash(new) == hash(frozen)
+        assert new['server'].sections == ('limits',)
+
+    def test_unrepr(self):
+        cfg = ConfigObj(['a = [1, {"b": [2, 3]}]', 'c = {"d": {4}}'],
+                        unrepr=True)
+        frozen = cfg.freeze()
+        assert frozen == {'a': (1, {'b': (2, 3)}), 'c': {'d': frozenset([4])}}
+        assert isinstance(frozen['a'][1], FrozenSection)
+        hash(frozen)
+
+
+class TestDerive(object):
+    @pytest.fixture
+    def cfg(self):
+        return ConfigObj([
+            '# the base config',
+            'home = /home/fred',
+            '[server]',
+            '    # where the data goes',
+            '    data = %(home)s/data  # inline',
+            '    hosts = a, b',
+            '    [[limits]]',
+            '        size = 10',
+            '[client]',
+            '    retries = 3',
+        ])
+
+    def test_sections_are_copied_when_changed(self, cfg):
+        derived = cfg.derive()
+        for name in ('server', 'client'):
+            assert isinstance(dict.__getitem__(derived, name), co.OverlaySection)
+        derived['server']['limits']['size'] = '20'
+        assert type(dict.__getitem__(derived['server'], 'limits')) is co.Section
+        # the sections that were only read are still shared
+        server = dict.__getitem__(derived, 'server')
+        assert isinstance(server, co.OverlaySection)
+        assert dict.__len__(server) == 1
+        assert isinstance(dict.__getitem__(derived, 'client'), co.OverlaySection)
+        assert cfg['server']['limits']['size'] == '10'
+        assert derived['server']['limits']['size'] == '20'
+        derived['server']['limits']['size'] = '10'
+        assert derived == cfg
+
+    def test_reads_dont_copy(self, cfg):
+        derived = cfg.derive()
+        server = derived['server']
+        assert server['data'] == '/home/fred/data'
+        assert server.get('missing') is None
+        assert 'hosts' in server and 'missing' not in server
+        assert len(server) == 3
+        assert list(server) == ['data', 'hosts', 'limits']
+        assert server.as_list('hosts') == ['a', 'b']
+        assert server.dict() == cfg['server'].dict()
+        assert isinstance(server, co.OverlaySection)
+        # only the values that were read are kept, and lists are copies
+        hosts = server['hosts']
+        assert hosts is not cfg['server']['hosts']
+        cfg['server']['hosts'].append('c')
+        assert server['hosts'] == ['a', 'b']
+        # interpolation uses the values in the copy
+        derived['home'] = '/home/jim'
+        assert server['data'] == '/home/jim/data'
+        server.comments['data'].append('# more')
+        assert type(server) is co.Section
+        assert server['hosts'] is hosts
+        assert cfg['server'].comments['data'] == ['    # where the data goes']
+
+    def test_derived_from_derived(self, cfg):
+        derived = cfg.derive()
+        again = derived.derive()
+        assert again['server']['limits']['size'] == '10'
+        again['server']['limits']['size'] = '30'
+        assert isinstance(dict.__getitem__(derived, 'server'), co.OverlaySection)
+        assert derived['server']['limits']['size'] == '10'
+        assert cfg['server']['limits']['size'] == '10'
+        assert again['server']['limits']['size'] == '30'
+
+    def test_changes_stay_in_the_copy(self, cfg):
+        derived = cfg.derive()
+        derived['home'] = '/home/jim'
+        derived['server']['hosts'].append('c')
+        derived['server'].comments['data'].append('# more')
+        derived['server']['new'] = 'value'
+        del derived['client']['retries']
+        assert derived['server']['data'] == '/home/jim/data'
+        assert cfg['server']['data'] == '/home/fred/data'
+        assert cfg['server']['hosts'] == ['a', 'b']
+        assert cfg['server'].comments['data'] == ['    # where the data goes']
+        assert 'new' not in cfg['server']
+        assert cfg['client']['retries'] == '3'
+        assert derived.dict() == {
+            'home': '/home/jim',
+            'server': {
+                'data': '/home/jim/data',
+                'hosts': ['a', 'b', 'c'],
+                'limits': {'size': '10'},
+                'new': 'value',
+            },
+            'client': {},
+        }
+
+    def test_write(self, cfg):
+        derived = cfg.derive()
+        assert derived.filename is None
+        derived['client']['retries'] = '5'
+        cfg['client']['retries'] = '5'
+        assert derived.write() == cfg.write()
+
+    def test_overlay(self, cfg):
+        overlay = cfg['server'].overlay()
+        assert overlay.parent is cfg
+        assert overlay.depth == 1
+        assert overlay.name == 'server'
+        overlay['data'] = 'elsewhere'
+        overlay['limits']['size'] = '1'
+        assert overlay['hosts'] == ['a', 'b']
+        assert cfg['server']['data'] == '/home/fred/data'
+        assert cfg['server']['limits']['size'] == '10'
+
+    def test_validated_copy(self):
+        cfg = ConfigObj(['[section]', 'value = 1'],
+                        configspec=['[section]', 'value = integer',
+                                    'other = integer(default=2)'])
+        assert cfg.validate(Validator())
+        derived = cfg.derive()
+        assert derived['section'].defaults == ['other']
+        derived['section']['other'] = 3
+        assert derived['section'].defaults == []
+        assert cfg['section'].defaults == ['other']
+        assert cfg['section']['other'] == 2
+        derived.restore_defaults()
+        assert derived['section']['other'] == 2
+
+    def test_lazy_base(self):
+        cfg = ConfigObj(['[a]', 'x = 1', '[b]', 'y = 2'], lazy=True)
+        derived = cfg.derive()
+        assert derived.lazy
+        derived['b']['y'] = '3'
+        assert cfg['b']['y'] == '2'
+        assert derived.dict() == {'a': {'x': '1'}, 'b': {'y': '3'}}
+
+
+def _flat_errors(cfg, result):
+    return [(path, key, str(error))
+            for (path, key, error) in flatten_errors(cfg, result)]
+
+
+class TestValidationPlan(object):
+    spec = [
+        'name = string',
+        'port = integer(1, 65535, default=8080)',
+        'hosts = string_list(default=list(a, b))',
+        '[server]',
+        '    # the server',
+        '    workers = integer(min=1)',
+        '    mode = option(fast, slow, default=fast)',
+        '[users]',
+        '    [[__many__]]',
+        '        uid = integer',
+        '        shell = string(default=/bin/sh)',
+    ]
+    config = [
+        'name = fred',
+        'extra = value',
+        '[server]',
+        '    workers = 0',
+        '[users]',
+        '    [[jim]]',
+        '        uid = 1000',
+        '    [[joe]]',
+        '        uid = x',
+    ]
+
+    @pytest.mark.parametrize('preserve_errors', [False, True])
+    @pytest.mark.parametrize('copy', [False, True])
+    def test_same_as_validate(self, preserve_errors, copy):
+        expected_cfg = ConfigObj(self.config, configspec=self.spec)
+        expected = expected_cfg.validate(Validator(), copy=copy,
+                                         preserve_errors=preserve_errors)
+        plan = co.ValidationPlan(self.spec, Validator())
+        for _ in range(3):
+            cfg = ConfigObj(self.config)
+            result = plan.validate(cfg, preserve_errors=preserve_errors,
+                                   copy=copy)
+            assert cfg.configspec is plan.configspec
+            assert _flat_errors(cfg, result) == _flat_errors(expected_cfg, expected)
+            assert cfg == expected_cfg
+            assert cfg.write() == expected_cfg.write()
+            for path in ((), ('server',), ('users', 'jim')):
+                section, other = cfg, expected_cfg
+                for name in path:
+                    section, other = section[name], other[name]
+                assert section.defaults == other.defaults
+                assert section.default_values == other.default_values
+                assert section.extra_values == other.extra_values
+
+    def test_defaults_are_not_shared(self):
+        plan = co.ValidationPlan(self.spec, Validator())
+        first = ConfigObj(['name = a'])
+        second = ConfigObj(['name = b'])
+        assert plan.validate(first) == plan.validate(second)
+        first['hosts'].append('c')
+        assert second['hosts'] == ['a', 'b']
+        assert first.default_values['hosts'] == ['a', 'b']
+        first['port'] = 80
+        first.restore_defaults()
+        assert first['port'] == 8080
+
+    def test_checks_left_to_the_validator(self):
+        spec = ['a = yoda', 'b = integer(1, 2', 'c = integer(default=x)',
+                'd = integer']
+        config = ['a = 1', 'b = 2', 'd = 3']
+        expected_cfg = ConfigObj(config, configspec=spec)
+        expected = expected_cfg.validate(Validator(), preserve_errors=True)
+        plan = co.ValidationPlan(spec, Validator())
+        cfg = ConfigObj(config)
+        result = plan.validate(cfg, preserve_errors=True)
+        assert _flat_errors(cfg, result) == _flat_errors(expected_cfg, expected)
+        assert str(result['a']) == 'the check "yoda" is unknown.'
+        assert str(result['c']) == 'the value "x" is of the wrong type.'
+        assert result['d'] is True
+        assert cfg.default_values == expected_cfg.default_values == {}
+
+    def test_other_validators(self):
+        class Doubler(Validator):
+            def check(self, check, value, missing=False):
+                return Validator.check(self, check, value, missing) * 2
+        plan = co.ValidationPlan(['a = integer', 'b = integer(default=2)'],
+                                 Doubler())
+        cfg = ConfigObj(['a = 3'])
+        assert plan.validate(cfg) is True
+        assert cfg == {'a': 6, 'b': 4}
+        plan = co.ValidationPlan(['a = integer'], co.SimpleVal())
+        assert plan.validate(ConfigObj(['a = 1'])) is True
+        assert plan.validate(ConfigObj([])) is False
+
+
+class TestValidateMany(object):
+    spec = ['a = integer', '[s]', 'b = integer(min=1, default=3)']
+
+    def test_validate_many(self, tmpdir):
+        texts = ['a = 1\n[s]\nb = 2\n', 'a = x\n', 'a = 1\na = 2\n',
+                 'a = %(missing)s\n', '[s]\nb = 0\n']
+        paths = []
+        for index, text in enumerate(texts):
+            path = tmpdir.join('%d.ini' % index)
+            path.write(text)
+            paths.append(str(path))
+        paths.append(str(tmpdir.join('missing.ini')))
+        config = ConfigObj(['a = 9'])
+        configs = paths + [['a = 2'], config]
+        results = list(co.validate_many(configs, self.spec, Validator(),
+                                        workers=2, preserve_errors=True))
+        assert [entry for (entry, _) in results] == configs
+        errors = [[(path, key, type(error).__name__, str(error))
+                   for (path, key, error) in result]
+                  for (_, result) in results]
+        assert errors == [
+            [],
+            [([], 'a', 'VdtTypeError', 'the value "x" is of the wrong type.')],
+            [([], None, 'DuplicateError', 'Duplicate keyword name at line 2.')],
+            [([], None, 'MissingInterpolationOption',
+              'missing option "missing" in interpolation.')],
+            [([], 'a', 'bool', 'False'),
+             (['s'], 'b', 'VdtValueTooSmallError', 'the value "0" is too small.')],
+            [([], None, 'OSError', 'Config file not found: "%s".' % paths[-1])],
+            [],
+            [],
+        ]
+        # validated in a worker
+        assert config == {'a': '9'}
+
+    def test_errors_without_preserve_errors(self):
+        results = list(co.validate_many([['a = x'], ['[s]']], self.spec,
+                                        Validator(), workers=1))
+        assert [errors for (_, errors) in results] == [
+            [([], 'a', False)], [([], 'a', False)]]
+
+    def test_bad_configspec(self):
+        # raised straight away, not when the results are first read
+        with pytest.raises(co.ConfigspecError):
+            co.validate_many([['a = 1']], ['[s'], Validator())
+
+    def test_missing_files(self, tmpdir):
+        missing = str(tmpdir.join('missing.ini'))
+        [(_, errors)] = co.validate_many([missing], self.spec, Validator(),
+                                         workers=1)
+        [(path, key, error)] = errors
+        assert (path, key) == ([], None)
+        assert isinstance(error, IOError)
+        # unless they are allowed
+        results = list(co.validate_many([missing], self.spec, Validator(),
+                                        workers=1, file_error=False))
+        assert results == [(missing, [([], 'a', False)])]
+
+    def test_pickled_errors_keep_their_message(self):
+        for error in (co.MissingInterpolationOption('x'),
+                      co.InterpolationLoopError('y', [((), 'y'), ((), 'y')]),
+                      co.ParseError('bad line', 3, 'line')):
+            copied = pickle.loads(pickle.dumps(error))
+            assert type(copied) is type(error)
+            assert str(copied) == str(error)
+            assert copied.__dict__ == error.__dict__
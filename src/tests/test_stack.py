@@ -0,0 +1,140 @@
+# coding=utf-8
+import pytest
+
+from configobj import ConfigObj
+from configobj.stack import ConfigStack, StackSection
+
+
+DEFAULTS = '''\
+home = /usr
+port = 80
+[server]
+    root = %(home)s/www
+    workers = 4
+    [[limits]]
+        size = 10
+        ratio = 0.5
+'''
+
+SITE = '''\
+port = 8080
+[server]
+    workers = 8
+    [[limits]]
+        size = 20
+'''
+
+USER = '''\
+home = /home/fred
+[server]
+    limits = none
+'''
+
+
+@pytest.fixture
+def layers(tmpdir):
+    configs = []
+    for name, text in (('defaults', DEFAULTS), ('site', SITE), ('user', USER)):
+        path = tmpdir.join(name + '.ini')
+        path.write(text)
+        configs.append(ConfigObj(str(path)))
+    return configs
+
+
+def merged(layers):
+    config = ConfigObj()
+    for layer in layers:
+        # merging a section shares it, so merge copies
+        config.merge(layer.dict())
+    return config
+
+
+def test_lookup(layers):
+    stack = ConfigStack(layers)
+    assert stack['port'] == '8080'
+    assert stack['home'] == '/home/fred'
+    server = stack['server']
+    assert isinstance(server, StackSection)
+    assert server.path == ('server',)
+    assert server.name == 'server'
+    assert server['workers'] == '8'
+    # values are interpolated in the layer that provides them
+    assert server['root'] == '/usr/www'
+    # a value hides the sections below it
+    assert server['limits'] == 'none'
+    assert 'missing' not in stack
+    with pytest.raises(KeyError):
+        stack['missing']
+    assert stack.get('missing', 3) == 3
+    assert list(stack) == ['home', 'port', 'server']
+    assert len(server) == 3
+    assert server.layer_sections() == [
+        layers[2]['server'], layers[1]['server'], layers[0]['server']]
+
+
+def test_same_as_merge(layers):
+    assert ConfigStack(layers).dict() == merged(layers).dict()
+    assert ConfigStack(layers[:2]) == merged(layers[:2]).dict()
+    assert ConfigStack(layers[:2])['server']['limits'].dict() == {
+        'size': '20', 'ratio': '0.5'}
+
+
+def test_lookups_are_remembered(layers):
+    stack = ConfigStack(layers)
+    stack['server']['workers']
+    assert stack._lookups[('server',)]['workers'] is layers[1]['server']
+    assert stack._lookups[('server',)].get('missing', 1) == 1
+    assert 'missing' not in stack['server']
+    assert stack._lookups[('server',)]['missing'] is None
+
+
+def test_reload(layers, tmpdir):
+    stack = ConfigStack(layers)
+    assert stack.dict() == merged(layers).dict()
+    tmpdir.join('site.ini').write(SITE.replace('workers = 8', '') +
+                                  '[client]\n    retries = 3\n')
+    changed = stack.reload(layers[1])
+    assert changed == {(('server',), 'workers'), ((), 'client'),
+                       (('client',), 'retries')}
+    # only the keys that changed are looked up again
+    assert 'port' in stack._lookups[()]
+    assert 'limits' in stack._lookups[('server',)]
+    assert 'workers' not in stack._lookups[('server',)]
+    assert stack['server']['workers'] == '4'
+    assert stack['client']['retries'] == '3'
+    assert stack.dict() == merged(layers).dict()
+
+
+def test_reload_sections(layers, tmpdir):
+    stack = ConfigStack(layers)
+    server = stack['server']
+    assert server['limits'] == 'none'
+    tmpdir.join('user.ini').write('[server]\n    [[limits]]\n        size = 5\n')
+    stack.reload()
+    assert server['limits'].dict() == {'size': '5', 'ratio': '0.5'}
+    assert stack['home'] == '/usr'
+    assert stack.dict() == merged(layers).dict()
+
+
+def test_invalidate(layers):
+    stack = ConfigStack(layers)
+    assert stack['server']['workers'] == '8'
+    layers[2]['server']['workers'] = '16'
+    # changes made by hand aren't noticed until they are invalidated
+    assert stack['server']['workers'] == '8'
+    stack.invalidate({(('server',), 'workers')})
+    assert stack['server']['workers'] == '16'
+    del layers[2]['server']
+    stack.invalidate()
+    assert stack['server']['limits']['size'] == '20'
+
+
+def test_push(layers):
+    stack = ConfigStack(layers[:2])
+    assert stack['home'] == '/usr'
+    assert stack['server']['limits']['size'] == '20'
+    stack.push(layers[2])
+    assert stack.layers == layers
+    assert stack['home'] == '/home/fred'
+    assert stack['server']['limits'] == 'none'
+    assert stack.dict() == merged(layers).dict()
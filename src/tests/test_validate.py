@@ -1,6 +1,6 @@
 # coding=utf-8
 
-from configobj import ConfigObj
+from configobj import ConfigObj, ValidationPlan
 import pytest
 from configobj.validate import Validator, VdtValueTooSmallError
 
@@ -175,3 +175,101 @@ class TestBasic(object):
                     'test3': 3,
                     'test4': 6.0
         }}}
+
+
+class TestPickling(object):
+    def test_errors_keep_their_message(self):
+        import pickle
+        from configobj.validate import VdtMissingValue, VdtUnknownCheckError
+        for error in (VdtValueTooSmallError('0'), VdtUnknownCheckError('yoda'),
+                      VdtMissingValue()):
+            copied = pickle.loads(pickle.dumps(error))
+            assert type(copied) is type(error)
+            assert str(copied) == str(error)
+
+
+class TestCheckArguments(object):
+    def test_parsed_once(self, val):
+        parsed = val._parse_with_caching('integer(0, 10)')
+        assert parsed == ('integer', ('0', '10'), {}, None)
+        assert val._parse_with_caching('integer(0, 10)') is parsed
+        assert val.check('integer(0, 10)', '5') == 5
+
+    def test_mutating_functions_get_copies(self):
+        def take(value, choices=()):
+            choices.remove(value)
+            return value
+        take.mutates_args = True
+        vtor = Validator({'take': take})
+        for _ in range(2):
+            assert vtor.check('take(choices=list(a, b))', 'a') == 'a'
+        assert vtor._parse_with_caching('take(choices=list(a, b))')[2] == {
+            'choices': ['a', 'b']}
+        spec = ['x = take(choices=list(a, b))', 'y = take(choices=list(a, b))']
+        cfg = ConfigObj(['x = a', 'y = a'], configspec=spec)
+        assert cfg.validate(vtor) is True
+        plan = ValidationPlan(spec, vtor)
+        assert plan.validate(ConfigObj(['x = a', 'y = a'])) is True
+
+
+class TestCheckCache(object):
+    def test_statistics(self):
+        vtor = Validator()
+        assert vtor.cache_info() == (0, 0, 0, 1024, 0)
+        vtor.check('integer(0, 10)', '1')
+        vtor.check('integer(0, 10)', '2')
+        vtor.check('boolean', 'yes')
+        info = vtor.cache_info()
+        assert (info.hits, info.misses, info.evictions) == (1, 2, 0)
+        vtor.cache_clear()
+        assert vtor.cache_info() == (0, 0, 0, 1024, 0)
+
+    def test_bounded(self):
+        vtor = Validator(cache_size=2)
+        for check in ('integer', 'float', 'boolean', 'integer'):
+            vtor.check(check, '1')
+        assert vtor.cache_info() == (0, 4, 2, 2, 2)
+        assert list(vtor._cache) == ['boolean', 'integer']
+        # used checks are kept
+        vtor.check('boolean', '1')
+        vtor.check('float', '1')
+        assert list(vtor._cache) == ['boolean', 'float']
+        assert Validator(cache_size=None).cache_info().maxsize is None
+
+    def test_bounded_checks_with_arguments(self):
+        vtor = Validator(cache_size=2)
+        vtor.check('integer(0, 10)', '1')
+        vtor.check('integer(0, 10, default=1)', '1')
+        # the shared arguments don't take a place of their own
+        assert vtor.cache_info() == (1, 1, 0, 2, 2)
+        assert list(vtor._cache) == ['integer(0, 10)',
+                                     'integer(0, 10, default=1)']
+        assert list(vtor._shared) == [('integer', ('0', '10'))]
+        vtor.check('float(0, 1)', '1')
+        vtor.check('boolean', '1')
+        assert vtor.cache_info() == (1, 3, 2, 2, 2)
+        # dropped with the last check that shares them
+        assert list(vtor._shared) == [('float', ('0', '1'))]
+        vtor.cache_clear()
+        assert vtor._shared == {}
+
+    def test_defaults_share_arguments(self):
+        vtor = Validator()
+        assert vtor.check('integer(0, 10, default=1)', None, missing=True) == 1
+        assert vtor.check('integer(0,10,default=2)', None, missing=True) == 2
+        assert vtor.check('integer(0, 10)', '3') == 3
+        assert vtor.check("string_list(1, default=list(a, b))", None,
+                          missing=True) == ['a', 'b']
+        assert vtor.check("string('1', default=None)", None,
+                          missing=True) is None
+        assert vtor.check("string('1', default='None')", None,
+                          missing=True) == 'None'
+        info = vtor.cache_info()
+        assert (info.hits, info.misses) == (3, 3)
+        first = vtor._parse_with_caching('integer(0, 10, default=1)')
+        second = vtor._parse_with_caching('integer(0,10,default=2)')
+        assert first[1] is second[1]
+        assert first[3] == '1' and second[3] == '2'
+        # a keyword that only starts with default isn't one
+        assert vtor._parse_with_caching('string(defaults=x)')[2] == {
+            'defaults': 'x'}
@@ -0,0 +1,147 @@
+# coding=utf-8
+import os
+import threading
+import time
+
+import pytest
+
+from configobj import ConfigObj
+from configobj.watch import ConfigWatcher
+
+
+class Recorder(object):
+    """Collect the changes passed to a callback."""
+
+    def __init__(self):
+        self.changes = []
+        self.event = threading.Event()
+
+    def __call__(self, changed):
+        self.changes.append(changed)
+        self.event.set()
+
+    def wait(self, timeout=5):
+        assert self.event.wait(timeout)
+        self.event.clear()
+
+
+@pytest.fixture(params=[True, False], ids=['inotify', 'poll'])
+def inotify(request):
+    return request.param
+
+
+@pytest.fixture
+def path(tmpdir):
+    path = str(tmpdir.join('watched.ini'))
+    with open(path, 'w') as h:
+        h.write('a = 1\n[s]\nb = 2\n[t]\nc = 3\n')
+    return path
+
+
+def write(path, content):
+    with open(path, 'w') as h:
+        h.write(content)
+
+
+def test_reloads_on_change(path, inotify):
+    cfg = ConfigObj(path)
+    section = cfg['s']
+    recorder = Recorder()
+    with ConfigWatcher(cfg, recorder, interval=0.01, debounce=0.05,
+                       inotify=inotify):
+        write(path, 'a = 1\n[s]\nb = 5\n[t]\nc = 3\n')
+        recorder.wait()
+    assert recorder.changes == [set([(('s',), 'b')])]
+    assert cfg['s'] is section
+    assert section['b'] == '5'
+
+
+def test_replaced_file(path, inotify):
+    cfg = ConfigObj(path)
+    recorder = Recorder()
+    with ConfigWatcher(cfg, recorder, interval=0.01, debounce=0.05,
+                       inotify=inotify):
+        # as editors save files
+        write(path + '.tmp', 'a = 2\n[s]\nb = 2\n[t]\nc = 3\n')
+        os.replace(path + '.tmp', path)
+        recorder.wait()
+    assert recorder.changes == [set([((), 'a')])]
+
+
+def test_debounce(path, inotify):
+    cfg = ConfigObj(path)
+    recorder = Recorder()
+    with ConfigWatcher(cfg, recorder, interval=0.01, debounce=0.3,
+                       inotify=inotify):
+        for value in range(5):
+            write(path, 'a = %d\n' % value)
+            time.sleep(0.02)
+        recorder.wait()
+        time.sleep(0.4)
+    # reloaded once, after the last write
+    assert len(recorder.changes) == 1
+    assert cfg.dict() == {'a': '4'}
+
+
+def test_errors(path, inotify):
+    cfg = ConfigObj(path)
+    recorder = Recorder()
+    errors = []
+    def errback(error):
+        errors.append(error)
+        recorder.event.set()
+    watcher = ConfigWatcher(cfg, recorder, interval=0.01, debounce=0.05,
+                            errback=errback, inotify=inotify)
+    with watcher:
+        write(path, 'a = 1\nbad line\n')
+        recorder.wait()
+        assert watcher.error is errors[0]
+        assert cfg['s']['b'] == '2'
+        # picks up the fixed file
+        write(path, 'a = 2\n')
+        recorder.wait()
+    assert watcher.error is None
+    assert cfg.dict() == {'a': '2'}
+
+
+def test_needs_a_filename():
+    with pytest.raises(ValueError):
+        ConfigWatcher(ConfigObj())
+
+
+def test_method(path):
+    with ConfigWatcher(ConfigObj(path), inotify=False) as watcher:
+        assert watcher.method == 'poll'
+    with ConfigWatcher(ConfigObj(path)) as watcher:
+        assert watcher.method in ('inotify', 'poll')
+
+
+def test_stop_from_callback(path, inotify):
+    cfg = ConfigObj(path)
+    recorder = Recorder()
+    watcher = ConfigWatcher(cfg, interval=0.01, debounce=0.05,
+                            inotify=inotify)
+    def callback(changed):
+        watcher.stop()
+        recorder(changed)
+    watcher.add_callback(callback)
+    errors = []
+    run = watcher._run
+    def checked_run(*args):
+        try:
+            run(*args)
+        except Exception as e:
+            errors.append(e)
+    watcher._run = checked_run
+    watcher.start()
+    thread = watcher._thread
+    write(path, 'a = 2\n')
+    recorder.wait()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert errors == []
+    # and it can be started again
+    with watcher:
+        write(path, 'a = 3\n')
+        recorder.wait()
+    assert cfg.dict() == {'a': '3'}